@@ -1,8 +1,19 @@
 import argparse
 import logging
+import os
 
 from visabot.config import load_settings
-from visabot.worker import run_check_once, run_forever, _send_status_message
+from visabot.config_reload import ConfigReloader
+from visabot.profiling import profile_check
+from visabot.runtime import WorkerRuntime
+from visabot.slot_providers import RecordingSlotProvider, ReplaySlotProvider, SlotProvider
+from visabot.worker import (
+    SeleniumSlotProvider,
+    reap_orphaned_browsers,
+    run_check_once,
+    run_forever,
+    _send_status_message,
+)
 
 
 def _setup_logging() -> None:
@@ -12,14 +23,44 @@ def _setup_logging() -> None:
     )
 
 
+def _build_provider(args: argparse.Namespace) -> SlotProvider | None:
+    # None — воркер сам возьмёт Selenium-провайдер по умолчанию.
+    if not args.record and not args.replay:
+        return None
+    provider: SlotProvider
+    if args.replay:
+        provider = ReplaySlotProvider.from_file(args.replay, speed=args.replay_speed)
+    else:
+        provider = SeleniumSlotProvider()
+    if args.record:
+        provider = RecordingSlotProvider(provider, args.record)
+    return provider
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="KzVisaBot: visa slot watcher")
     parser.add_argument("--once", action="store_true", help="Run single check and exit")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="With --once: profile the check (folded stacks + WebDriver command summary next to the state file)",
+    )
+    parser.add_argument("--record", metavar="PATH", help="Append every check (outcome, slots, duration) to a JSONL recording")
+    parser.add_argument("--replay", metavar="PATH", help="Play back a recording instead of opening a browser")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Replay speed factor (0 = no delays)")
     args = parser.parse_args()
+    if args.profile and not args.once:
+        parser.error("--profile requires --once")
 
     _setup_logging()
     settings = load_settings()
 
+    # Chrome от предыдущего запуска (kill -9, OOM, рестарт контейнера) — убираем до старта нового.
+    try:
+        reap_orphaned_browsers(settings)
+    except Exception:
+        logging.getLogger(__name__).warning("Failed to reap orphaned browser processes", exc_info=True)
+
     # Уведомление о старте (best-effort)
     try:
         _send_status_message(
@@ -33,12 +74,22 @@ def main() -> int:
     except Exception:
         logging.getLogger(__name__).warning("Failed to send Telegram startup message", exc_info=True)
 
+    provider = _build_provider(args)
+
     try:
         if args.once:
-            run_check_once(settings)
+            if args.profile:
+                with profile_check(os.path.dirname(os.path.abspath(settings.state_file))):
+                    run_check_once(settings, provider=provider)
+            else:
+                run_check_once(settings, provider=provider)
             return 0
 
-        run_forever(settings)
+        # Hot reload: SIGHUP или изменение CONFIG_FILE/ACCOUNTS_FILE/SUBSCRIBERS_FILE.
+        runtime = WorkerRuntime()
+        reloader = ConfigReloader(load_settings, on_request=runtime.wake)
+        reloader.install_signal_handler()
+        run_forever(settings, runtime, reloader=reloader, provider=provider)
         return 0
 
     except Exception as e:
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+_PROC = "/proc"
+_BROWSER_NAMES = ("chrome", "chromedriver", "chrome_crashpad", "google-chrome")
+
+
+@dataclass(frozen=True)
+class _ProcInfo:
+    pid: int
+    ppid: int
+    pgrp: int
+    name: str
+    rss_bytes: int
+
+
+def _read_proc(pid: int) -> _ProcInfo | None:
+    try:
+        with open(f"{_PROC}/{pid}/stat", "r", encoding="utf-8", errors="replace") as f:
+            stat = f.read()
+        with open(f"{_PROC}/{pid}/statm", "r", encoding="utf-8") as f:
+            statm = f.read().split()
+    except OSError:
+        return None
+
+    # comm может содержать пробелы и скобки, поэтому режем по последней ')'.
+    name = stat[stat.index("(") + 1 : stat.rindex(")")]
+    fields = stat[stat.rindex(")") + 2 :].split()
+    state = fields[0]
+    if state == "Z":
+        rss = 0
+    else:
+        rss = int(statm[1]) * os.sysconf("SC_PAGE_SIZE")
+    return _ProcInfo(pid=pid, ppid=int(fields[1]), pgrp=int(fields[2]), name=name, rss_bytes=rss)
+
+
+def _all_processes() -> list[_ProcInfo]:
+    if not os.path.isdir(_PROC):
+        return []
+    result: list[_ProcInfo] = []
+    for entry in os.listdir(_PROC):
+        if entry.isdigit():
+            info = _read_proc(int(entry))
+            if info is not None:
+                result.append(info)
+    return result
+
+
+def _is_browser(name: str) -> bool:
+    return any(name.startswith(n) for n in _BROWSER_NAMES)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _group_alive(pgid: int) -> bool:
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_zombies(pgids: Iterable[int] = ()) -> int:
+    """Забирает завершившихся потомков из групп браузеров `pgids`.
+
+    Чужих потомков (сервисы chromedriver, selenium-manager, subprocess других потоков) не
+    трогаем: их владельцы сами ждут код возврата. Исключение — контейнер, где python — PID 1:
+    к нему переподвешиваются осиротевшие процессы Chrome, и без общего waitpid они
+    остаются зомби навсегда.
+    """
+
+    targets = [-pgid for pgid in pgids if pgid > 1]
+    if os.getpid() == 1:
+        targets.append(-1)
+
+    reaped = 0
+    for target in targets:
+        while True:
+            try:
+                pid, _ = os.waitpid(target, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            reaped += 1
+    return reaped
+
+
+def kill_process_group(pgid: int, *, grace_seconds: float = 3.0) -> bool:
+    """SIGTERM всей группе, затем SIGKILL оставшимся. True, если кого-то пришлось убивать."""
+
+    collect_zombies((pgid,))
+    # Свою группу (и init) не трогаем ни при каких обстоятельствах.
+    if not hasattr(os, "killpg") or pgid <= 1 or pgid == os.getpgrp() or not _group_alive(pgid):
+        return False
+
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return False
+
+    deadline = time.monotonic() + grace_seconds
+    while time.monotonic() < deadline:
+        collect_zombies((pgid,))
+        if not _group_alive(pgid):
+            return True
+        time.sleep(0.1)
+
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    collect_zombies((pgid,))
+    return True
+
+
+class BrowserProcessTracker:
+    """Учёт групп процессов chromedriver/Chrome, запущенных этим воркером.
+
+    chromedriver стартует в отдельной сессии (`start_new_session=True`), поэтому его pid —
+    это pgid всей группы вместе с Chrome. После `driver.quit()` группа добивается целиком.
+    Группы записываются в `registry_file`: если процесс убили посреди проверки, следующий
+    запуск найдёт их и уберёт (`reap_orphans`).
+    """
+
+    def __init__(self, registry_file: str | None) -> None:
+        self.registry_file = registry_file
+        self._lock = threading.Lock()
+        self._groups: set[int] = set()
+
+    def register(self, driver) -> int | None:
+        try:
+            pgid = driver.service.process.pid
+        except Exception:
+            return None
+        if not isinstance(pgid, int) or pgid <= 1:
+            return None
+        with self._lock:
+            self._groups.add(pgid)
+            self._save_registry()
+        return pgid
+
+    def release(self, pgid: int | None) -> bool:
+        """Вызывается после quit(): добивает всё, что осталось от группы."""
+
+        if pgid is None:
+            return False
+        killed = kill_process_group(pgid)
+        if killed:
+            logger.warning("Killed leftover browser processes of group %s after quit", pgid)
+        with self._lock:
+            self._groups.discard(pgid)
+            self._save_registry()
+        collect_zombies((pgid,))
+        return killed
+
+    def reap_orphans(self) -> int:
+        """Убирает группы, оставшиеся от предыдущих (умерших) процессов бота."""
+
+        killed = 0
+        killed_groups: list[int] = []
+        for entry in self._load_registry():
+            owner = int(entry.get("owner_pid", 0))
+            pgid = int(entry.get("pgid", 0))
+            if pgid <= 1 or pgid in self._groups or (owner != os.getpid() and _pid_alive(owner)):
+                continue
+            # pid могли переиспользовать — трогаем только если в группе действительно браузер.
+            if not any(p.pgrp == pgid and _is_browser(p.name) for p in _all_processes()):
+                continue
+            if kill_process_group(pgid):
+                killed += 1
+                killed_groups.append(pgid)
+        if killed:
+            logger.warning("Killed %d orphaned browser process group(s) left by a previous run", killed)
+        with self._lock:
+            self._save_registry()
+        collect_zombies(killed_groups)
+        return killed
+
+    def usage(self) -> tuple[int, int]:
+        """(число живых процессов браузера, суммарный RSS в байтах) — наши группы и потомки."""
+
+        procs = _all_processes()
+        with self._lock:
+            groups = set(self._groups)
+
+        children: dict[int, list[_ProcInfo]] = {}
+        for p in procs:
+            children.setdefault(p.ppid, []).append(p)
+
+        ours: dict[int, _ProcInfo] = {p.pid: p for p in procs if p.pgrp in groups}
+        stack = [os.getpid()]
+        while stack:
+            for child in children.get(stack.pop(), []):
+                if child.pid not in ours and _is_browser(child.name):
+                    ours[child.pid] = child
+                stack.append(child.pid)
+
+        live = [p for p in ours.values() if p.rss_bytes > 0]
+        return len(live), sum(p.rss_bytes for p in live)
+
+    def _load_registry(self) -> list[dict]:
+        if not self.registry_file or not os.path.exists(self.registry_file):
+            return []
+        try:
+            with open(self.registry_file, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return []
+        return [e for e in raw if isinstance(e, dict)] if isinstance(raw, list) else []
+
+    def _save_registry(self) -> None:
+        if not self.registry_file:
+            return
+        # Записи других живых процессов (несколько ботов на одной машине) сохраняем.
+        others = [
+            e
+            for e in self._load_registry()
+            if int(e.get("owner_pid", 0)) != os.getpid() and _pid_alive(int(e.get("owner_pid", 0)))
+        ]
+        data = others + [{"pgid": g, "owner_pid": os.getpid()} for g in sorted(self._groups)]
+
+        folder = os.path.dirname(os.path.abspath(self.registry_file))
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8", dir=folder, suffix=".tmp") as tf:
+            json.dump(data, tf)
+            tmp_name = tf.name
+        os.replace(tmp_name, self.registry_file)
@@ -0,0 +1,159 @@
+"""Постоянные профили Chrome (`--user-data-dir`) по аккаунтам.
+
+С постоянным профилем браузер стартует «тёплым»: HTTP-кэш, скомпилированный JS сайта и
+cookies остаются с прошлой проверки. Профиль на время проверки берётся под эксклюзивную
+блокировку (flock), чтобы два драйвера никогда не открыли один каталог; битый профиль
+удаляется и создаётся заново.
+
+    python -m visabot.browser_profile https://ais.usvisa-info.com/ --runs 3
+
+— замер холодного и тёплого старта и загрузки первой страницы.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки нет, профили не делятся между процессами
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Chrome оставляет их после падения; под нашей блокировкой они заведомо устаревшие
+# и мешают запуску («profile is in use by another process»).
+_SINGLETON_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+_JSON_FILES = ("Local State", os.path.join("Default", "Preferences"))
+
+
+class ProfileBusyError(RuntimeError):
+    """Профиль аккаунта уже открыт другим драйвером (в этом или другом процессе)."""
+
+
+class BrowserProfile:
+    """Каталог профиля одного аккаунта, захваченный под блокировку.
+
+    Использование: `with BrowserProfile(root, key) as profile: start_driver(user_data_dir=profile.path)`.
+    """
+
+    def __init__(self, root: str, key: str) -> None:
+        self.path = os.path.join(root, key)
+        self.lock_path = os.path.join(root, f"{key}.lock")
+        self.warm = False
+        self._lock_fd: int | None = None
+
+    def acquire(self) -> BrowserProfile:
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                raise ProfileBusyError(f"Browser profile {self.path} is locked by another driver") from None
+        self._lock_fd = fd
+
+        self._remove_stale_singletons()
+        if self.is_corrupt():
+            logger.warning("Browser profile %s is corrupt, recreating it", self.path)
+            self.reset()
+        self.warm = os.path.isdir(os.path.join(self.path, "Default"))
+        os.makedirs(self.path, exist_ok=True)
+        return self
+
+    def release(self) -> None:
+        if self._lock_fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+    def __enter__(self) -> BrowserProfile:
+        return self.acquire()
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def is_corrupt(self) -> bool:
+        for name in _JSON_FILES:
+            path = os.path.join(self.path, name)
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    json.load(f)
+            except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+                return True
+        return False
+
+    def reset(self) -> None:
+        """Удаляет профиль целиком (следующий старт — холодный). Вызывать только под блокировкой."""
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.warm = False
+
+    def _remove_stale_singletons(self) -> None:
+        for name in _SINGLETON_FILES:
+            path = os.path.join(self.path, name)
+            # SingletonLock — симлинк на несуществующий «host-pid», exists() для него False.
+            if os.path.lexists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    logger.warning("Failed to remove stale %s", path, exc_info=True)
+
+
+def measure_starts(url: str, *, runs: int = 3, headless: bool = True) -> dict[str, float]:
+    """Медианы (секунды) старта браузера и загрузки `url` с одноразовым и с постоянным профилем."""
+
+    from visabot.selenium_provider import start_driver
+
+    def one(user_data_dir: str | None) -> tuple[float, float]:
+        started = time.perf_counter()
+        driver = start_driver(headless=headless, user_data_dir=user_data_dir)
+        start_seconds = time.perf_counter() - started
+        try:
+            started = time.perf_counter()
+            driver.get(url)
+            return start_seconds, time.perf_counter() - started
+        finally:
+            driver.quit()
+
+    with tempfile.TemporaryDirectory(prefix="kzvisabot-profile-") as root:
+        cold = [one(None) for _ in range(runs)]
+        with BrowserProfile(root, "measure") as profile:
+            one(profile.path)  # прогрев профиля
+            warm = [one(profile.path) for _ in range(runs)]
+
+    return {
+        "cold_start": statistics.median(s for s, _ in cold),
+        "cold_first_page": statistics.median(p for _, p in cold),
+        "warm_start": statistics.median(s for s, _ in warm),
+        "warm_first_page": statistics.median(p for _, p in warm),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure cold vs warm Chrome profile start")
+    parser.add_argument("url", help="First page to load, e.g. the sign-in page")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--no-headless", action="store_true")
+    args = parser.parse_args()
+
+    result = measure_starts(args.url, runs=args.runs, headless=not args.no_headless)
+    for kind in ("cold", "warm"):
+        print(f"{kind}: start {result[f'{kind}_start']:.2f}s, first page {result[f'{kind}_first_page']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
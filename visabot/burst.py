@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from visabot.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Burst:
+    started_at: float
+    ends_at: float
+    due_at: float
+    checks: int = 0
+    changes: int = 0
+    new_slots: int = 0
+    quiet: int = 0
+
+
+class BurstScheduler:
+    """Учащённые проверки аккаунта после того, как его календарь изменился.
+
+    Даты выходят волнами: заметив изменение, проверяем аккаунт каждые `interval` секунд
+    (на уже авторизованной сессии: контекст общего браузера или свой Chrome, который на время
+    всплеска не закрывается). Каждая проверка без изменений удваивает интервал; новое
+    изменение сбрасывает его и продлевает окно. Всплеск заканчивается по окну `window`, по
+    лимиту `max_checks` или когда интервал дорос до обычного — дальше обычный
+    CHECK_INTERVAL_SECONDS.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float,
+        window: float,
+        max_checks: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.interval = interval
+        self.window = window
+        self.max_checks = max_checks
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._bursts: dict[str, _Burst] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> BurstScheduler | None:
+        if settings.burst_window_seconds <= 0:
+            return None
+        return cls(
+            interval=settings.burst_interval_seconds,
+            window=settings.burst_window_seconds,
+            max_checks=settings.burst_max_checks,
+        )
+
+    def _next_interval(self, burst: _Burst) -> float:
+        return self.interval * 2**burst.quiet
+
+    def record(self, key: str, *, changed: bool, new_slots: int, normal_interval: float, extra: bool = False) -> None:
+        """Учитывает результат проверки аккаунта `key` (успешной или нет).
+
+        `extra` — проверку назначил сам всплеск. Только такие расходуют `max_checks` и
+        удваивают интервал; обычная проверка по расписанию внутри окна лишь сообщает об
+        изменении календаря.
+        """
+
+        now = self._clock()
+        with self._lock:
+            burst = self._bursts.get(key)
+            if burst is None:
+                if changed and self.interval < normal_interval:
+                    self._bursts[key] = _Burst(started_at=now, ends_at=now + self.window, due_at=now + self.interval)
+                    logger.info(
+                        "Burst started for %s: every %.0fs for up to %.0fs (max %d extra checks)",
+                        key,
+                        self.interval,
+                        self.window,
+                        self.max_checks,
+                    )
+                return
+
+            if changed:
+                burst.changes += 1
+                burst.new_slots += new_slots
+                burst.quiet = 0
+                burst.ends_at = max(burst.ends_at, now + self.window)
+            elif extra:
+                burst.quiet += 1
+            if not extra:
+                # Проверка по расписанию лимит всплеска не тратит.
+                burst.due_at = min(burst.due_at, now + self._next_interval(burst))
+                return
+
+            burst.checks += 1
+            logger.info(
+                "Burst check %d/%d for %s: changed=%s new_slots=%d",
+                burst.checks,
+                self.max_checks,
+                key,
+                changed,
+                new_slots,
+            )
+
+            interval = self._next_interval(burst)
+            if burst.checks >= self.max_checks or now + interval > burst.ends_at or interval >= normal_interval:
+                del self._bursts[key]
+                logger.info(
+                    "Burst finished for %s after %.0fs: extra checks=%d, changes=%d, new slots=%d",
+                    key,
+                    now - burst.started_at,
+                    burst.checks,
+                    burst.changes,
+                    burst.new_slots,
+                )
+                return
+            burst.due_at = now + interval
+
+    def active(self, key: str) -> bool:
+        with self._lock:
+            return key in self._bursts
+
+    def seconds_until(self, key: str) -> float | None:
+        """Через сколько секунд очередная учащённая проверка аккаунта; None — всплеска нет."""
+
+        with self._lock:
+            burst = self._bursts.get(key)
+            return None if burst is None else max(0.0, burst.due_at - self._clock())
+
+    def due(self) -> list[str]:
+        now = self._clock()
+        with self._lock:
+            return [key for key, burst in self._bursts.items() if burst.due_at <= now]
+
+    def next_due_at(self) -> float | None:
+        with self._lock:
+            return min((b.due_at for b in self._bursts.values()), default=None)
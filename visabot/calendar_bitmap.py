@@ -0,0 +1,239 @@
+"""Компактное представление доступных дат: по битовой маске на facility.
+
+Бит `i` маски facility означает, что свободна дата `base + i` дней (`base` — ordinal даты).
+Сравнение двух проверок — это `&`, `|` и `& ~` над целыми числами вместо множеств `Slot`
+со строками. Преобразование в `Slot` и обратно (и в формат state-файла) без потерь.
+
+    python -m visabot.calendar_bitmap --accounts 200 --facilities 4 --days 365
+
+— микробенчмарк против сравнения множеств `Slot`.
+
+Только для замеров: воркер по-прежнему сравнивает множества `Slot` — для одного аккаунта
+(десятки дат) они быстрее, а построение маски из `Slot` дороже самой разности множеств.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import random
+import time
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from visabot.domain import Slot
+
+
+# Одни и те же даты повторяются у всех аккаунтов и facility — разбираем каждую строку один раз.
+@lru_cache(maxsize=8192)
+def _ordinal(date_iso: str) -> int:
+    return dt.date.fromisoformat(date_iso).toordinal()
+
+
+@lru_cache(maxsize=8192)
+def _date_iso(ordinal: int) -> str:
+    return dt.date.fromordinal(ordinal).isoformat()
+
+
+class CalendarBitmap:
+    __slots__ = ("base", "bits")
+
+    def __init__(self, base: int = 0, bits: dict[int, int] | None = None) -> None:
+        self.base = base
+        # Пустые маски не храним, чтобы сравнение и len() не зависели от истории операций.
+        self.bits = {facility: mask for facility, mask in (bits or {}).items() if mask}
+
+    @classmethod
+    def from_slots(cls, slots: Iterable[Slot]) -> CalendarBitmap:
+        """ValueError, если `date_iso` не дата YYYY-MM-DD."""
+
+        days = [(slot.facility_id, _ordinal(slot.date_iso)) for slot in slots]
+        if not days:
+            return cls()
+        base = min(day for _, day in days)
+        bits: dict[int, int] = {}
+        for facility, day in days:
+            bits[facility] = bits.get(facility, 0) | (1 << (day - base))
+        return cls(base, bits)
+
+    def to_slots(self) -> set[Slot]:
+        return set(self)
+
+    @classmethod
+    def from_state(cls, items: Iterable[dict]) -> CalendarBitmap:
+        """Из списка `slots` state-файла (`[{"date_iso": ..., "facility_id": ...}]`)."""
+
+        return cls.from_slots(Slot(date_iso=str(i["date_iso"]), facility_id=int(i["facility_id"])) for i in items)
+
+    def to_state(self) -> list[dict]:
+        """В тот же список `slots`, что пишет state_file.save_slots."""
+
+        return [asdict(slot) for slot in sorted(self)]
+
+    def __iter__(self) -> Iterator[Slot]:
+        for facility, mask in self.bits.items():
+            while mask:
+                low = mask & -mask
+                day = self.base + low.bit_length() - 1
+                yield Slot(date_iso=_date_iso(day), facility_id=facility)
+                mask ^= low
+
+    def __len__(self) -> int:
+        return sum(mask.bit_count() for mask in self.bits.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.bits)
+
+    def __contains__(self, slot: object) -> bool:
+        if not isinstance(slot, Slot):
+            return False
+        offset = _ordinal(slot.date_iso) - self.base
+        return offset >= 0 and bool(self.bits.get(slot.facility_id, 0) >> offset & 1)
+
+    def _aligned(self, other: CalendarBitmap) -> tuple[int, dict[int, int], dict[int, int]]:
+        # Маски с разной базой сдвигаем к меньшей из баз.
+        if not self.bits or not other.bits or self.base == other.base:
+            base = self.base if self.bits else other.base
+            return base, self.bits, other.bits
+        base = min(self.base, other.base)
+        a, b = self.base - base, other.base - base
+        return (
+            base,
+            {f: m << a for f, m in self.bits.items()} if a else self.bits,
+            {f: m << b for f, m in other.bits.items()} if b else other.bits,
+        )
+
+    def __sub__(self, other: CalendarBitmap) -> CalendarBitmap:
+        base, a, b = self._aligned(other)
+        return CalendarBitmap(base, {f: m & ~b.get(f, 0) for f, m in a.items()})
+
+    def __and__(self, other: CalendarBitmap) -> CalendarBitmap:
+        base, a, b = self._aligned(other)
+        return CalendarBitmap(base, {f: m & b[f] for f, m in a.items() if f in b})
+
+    def __or__(self, other: CalendarBitmap) -> CalendarBitmap:
+        base, a, b = self._aligned(other)
+        merged = dict(a)
+        for f, m in b.items():
+            merged[f] = merged.get(f, 0) | m
+        return CalendarBitmap(base, merged)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CalendarBitmap):
+            return NotImplemented
+        _, a, b = self._aligned(other)
+        return a == b
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"CalendarBitmap({sorted(self)!r})"
+
+
+def diff_slots(previous: Iterable[Slot], current: Iterable[Slot]) -> tuple[set[Slot], set[Slot]]:
+    """(появившиеся, исчезнувшие) слоты между двумя проверками."""
+
+    # Входы читаем один раз: генератор второй раз (в запасном пути) был бы уже пуст.
+    previous, current = list(previous), list(current)
+    try:
+        prev, cur = CalendarBitmap.from_slots(previous), CalendarBitmap.from_slots(current)
+    except ValueError:
+        # В state-файле может оказаться что-то, что не дата; сравниваем как раньше.
+        prev_set, cur_set = set(previous), set(current)
+        return cur_set - prev_set, prev_set - cur_set
+    return (cur - prev).to_slots(), (prev - cur).to_slots()
+
+
+def _random_calendars(
+    accounts: int, facilities: int, days: int, density: float, churn: float, seed: int
+) -> list[tuple[set[Slot], set[Slot]]]:
+    # Между двумя проверками меняется небольшая доля дней (`churn`), как на живом сайте.
+    rng = random.Random(seed)
+    start = dt.date.today().toordinal()
+    pairs = []
+    for _ in range(accounts):
+        previous: set[Slot] = set()
+        current: set[Slot] = set()
+        for f in range(facilities):
+            for d in range(days):
+                slot = Slot(date_iso=dt.date.fromordinal(start + d).isoformat(), facility_id=100 + f)
+                was = rng.random() < density
+                now = (not was) if rng.random() < churn else was
+                if was:
+                    previous.add(slot)
+                if now:
+                    current.add(slot)
+        pairs.append((previous, current))
+    return pairs
+
+
+def benchmark(
+    *,
+    accounts: int,
+    facilities: int,
+    days: int,
+    density: float = 0.1,
+    churn: float = 0.02,
+    rounds: int = 20,
+    seed: int = 1,
+) -> dict[str, float]:
+    """Секунды на один цикл (все аккаунты) для каждого способа сравнения."""
+
+    pairs = _random_calendars(accounts, facilities, days, density, churn, seed)
+    bitmaps = [(CalendarBitmap.from_slots(p), CalendarBitmap.from_slots(c)) for p, c in pairs]
+
+    def timed(fn) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - started) / rounds
+
+    def sets() -> None:
+        for previous, current in pairs:
+            set(current) - set(previous)
+            set(previous) - set(current)
+
+    def bitmap_diff() -> None:
+        for previous, current in bitmaps:
+            current - previous
+            previous - current
+
+    def bitmap_from_slots() -> None:
+        for previous, current in pairs:
+            diff_slots(previous, current)
+
+    return {
+        "slots": float(sum(len(p) + len(c) for p, c in pairs)),
+        "set_diff": timed(sets),
+        "bitmap_diff": timed(bitmap_diff),
+        "bitmap_diff_with_conversion": timed(bitmap_from_slots),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare Slot set diffing with calendar bitmaps")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--facilities", type=int, default=4)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--density", type=float, default=0.1, help="Share of days with an available slot")
+    parser.add_argument("--churn", type=float, default=0.02, help="Share of days that change between two checks")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    result = benchmark(
+        accounts=args.accounts,
+        facilities=args.facilities,
+        days=args.days,
+        density=args.density,
+        churn=args.churn,
+        rounds=args.rounds,
+    )
+    print(f"slots per cycle: {result['slots']:.0f}")
+    for name in ("set_diff", "bitmap_diff", "bitmap_diff_with_conversion"):
+        print(f"{name:28s} {result[name] * 1000:9.3f} ms/cycle  ({result['set_diff'] / result[name]:.1f}x vs sets)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,278 @@
+"""Чтение календаря напрямую через Chrome DevTools Protocol, минуя chromedriver.
+
+Каждая Selenium-команда идёт Python → chromedriver (HTTP) → Chrome (CDP), и в `read_calendar`
+таких команд десятки на месяц (элементы, `.text` каждого дня, клик, пауза 0.7s). Здесь
+Selenium только запускает браузер, логинится и открывает календарь, а чтение идёт по
+websocket страницы (`debuggerAddress` → `/json`): один `Runtime.evaluate` на все видимые
+месяцы и один на перелистывание, которое ждёт перерисовки через MutationObserver.
+
+Сравнение двух путей на локальной подмене сайта (нужен Chrome):
+
+    python -m visabot.cdp_calendar --rounds 10 --months 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import statistics
+import time
+
+import httpx
+from selenium import webdriver
+
+try:
+    import websocket  # websocket-client, приходит зависимостью selenium
+except ImportError:
+    websocket = None  # type: ignore[assignment]
+
+from visabot import selenium_provider
+from visabot.deadline import UNLIMITED, Deadline
+from visabot.domain import Slot
+from visabot.metrics import METRICS
+from visabot.selenium_provider import CalendarProgress, _open_datepicker_if_possible, _parse_date, read_calendar
+from visabot.stand_in_site import StandInSite
+
+logger = logging.getLogger(__name__)
+
+# Все видимые месяцы datepicker: [{month, year, days: ["1", "15", ...]}].
+_READ_MONTHS_JS = """
+Array.from(document.querySelectorAll(".ui-datepicker-group")).map((group) => {
+  const text = (selector) => {
+    const el = group.querySelector(selector);
+    return el ? el.innerText.trim() : null;
+  };
+  return {
+    month: text(".ui-datepicker-month"),
+    year: text(".ui-datepicker-year"),
+    days: Array.from(group.querySelectorAll('td[data-handler="selectDay"] .ui-state-default'))
+      .map((el) => el.innerText.trim()),
+  };
+})
+"""
+
+# Клик «вперёд» и ожидание, пока заголовки месяцев сменятся. jQuery UI перерисовывает
+# синхронно, тогда ответ сразу; иначе ждём мутации DOM не дольше timeoutMs.
+_NEXT_MONTH_JS = """
+(async (timeoutMs) => {
+  const titles = () => Array.from(document.querySelectorAll(".ui-datepicker-group .ui-datepicker-title"))
+    .map((el) => el.textContent).join("|");
+  const next = document.querySelector(".ui-datepicker-next");
+  if (!next || next.classList.contains("ui-state-disabled")) return false;
+  const before = titles();
+  next.click();
+  if (titles() !== before) return true;
+  return await new Promise((resolve) => {
+    const root = document.getElementById("ui-datepicker-div") || document.body;
+    const observer = new MutationObserver(() => {
+      if (titles() !== before) {
+        clearTimeout(timer);
+        observer.disconnect();
+        resolve(true);
+      }
+    });
+    const timer = setTimeout(() => {
+      observer.disconnect();
+      resolve(titles() !== before);
+    }, timeoutMs);
+    observer.observe(root, { childList: true, subtree: true, characterData: true });
+  });
+})(%d)
+"""
+
+
+class CdpError(RuntimeError):
+    """Канал DevTools недоступен или команда не удалась — читаем календарь через Selenium."""
+
+
+class CdpChannel:
+    """Websocket DevTools одной вкладки: синхронные вызовы `call()` с ответом по id."""
+
+    def __init__(self, ws_url: str, *, timeout: float = 10.0) -> None:
+        if websocket is None:
+            raise CdpError("websocket-client is not installed")
+
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        try:
+            # Без Origin: иначе Chrome 111+ отклоняет подключение без --remote-allow-origins.
+            self._ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        except Exception as e:
+            raise CdpError(f"Cannot connect to DevTools at {ws_url} ({type(e).__name__}: {e})") from e
+
+    @classmethod
+    def for_driver(cls, driver: webdriver.Chrome, *, timeout: float = 10.0) -> CdpChannel:
+        """Канал к вкладке, в которой сейчас работает `driver`."""
+
+        address = (driver.capabilities.get("goog:chromeOptions") or {}).get("debuggerAddress")
+        if not address:
+            raise CdpError("Chrome did not report a debuggerAddress")
+        # В chromedriver handle окна — это targetId вкладки (в старых версиях с префиксом).
+        target_id = driver.current_window_handle.removeprefix("CDwindow-")
+        try:
+            targets = httpx.get(f"http://{address}/json", timeout=timeout).json()
+        except Exception as e:
+            raise CdpError(f"Cannot list DevTools targets at {address} ({type(e).__name__}: {e})") from e
+        for target in targets:
+            if target.get("id") == target_id and target.get("webSocketDebuggerUrl"):
+                return cls(target["webSocketDebuggerUrl"], timeout=timeout)
+        raise CdpError(f"DevTools target {target_id} not found at {address}")
+
+    def call(self, method: str, params: dict | None = None, *, timeout: float | None = None) -> dict:
+        message_id = next(self._ids)
+        try:
+            self._ws.settimeout(timeout or self.timeout)
+            self._ws.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+            while True:
+                message = json.loads(self._ws.recv())
+                # События (без id) и чужие ответы пропускаем.
+                if message.get("id") == message_id:
+                    break
+        except Exception as e:
+            raise CdpError(f"{method} failed ({type(e).__name__}: {e})") from e
+        if "error" in message:
+            raise CdpError(f"{method} failed: {message['error'].get('message')}")
+        return message.get("result", {})
+
+    def evaluate(self, expression: str, *, await_promise: bool = False, timeout: float | None = None):
+        result = self.call(
+            "Runtime.evaluate",
+            {"expression": expression, "returnByValue": True, "awaitPromise": await_promise},
+            timeout=timeout,
+        )
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CdpError(f"JS error: {details.get('exception', {}).get('description') or details.get('text')}")
+        return result.get("result", {}).get("value")
+
+    def close(self) -> None:
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+    def __enter__(self) -> CdpChannel:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_calendar_cdp(
+    channel: CdpChannel,
+    *,
+    facility_id: int,
+    months_ahead: int = 6,
+    progress: CalendarProgress | None = None,
+    deadline: Deadline = UNLIMITED,
+) -> set[Slot]:
+    """То же, что `read_calendar`, но через DevTools: datepicker уже открыт Selenium."""
+
+    progress = progress if progress is not None else CalendarProgress()
+
+    while progress.months_read < months_ahead:
+        months = channel.evaluate(_READ_MONTHS_JS, timeout=deadline.timeout(10, "calendar read"))
+        if not months:
+            # Закрылся посреди чтения — Selenium откроет его заново и дочитает с первого месяца.
+            raise CdpError("Calendar is not open")
+
+        for month in months:
+            if not month.get("month") or not month.get("year"):
+                continue
+            for day in month.get("days") or []:
+                try:
+                    d = _parse_date(day, month["month"], month["year"])
+                except ValueError:
+                    continue
+                progress.slots.add(Slot(date_iso=d.isoformat(), facility_id=facility_id))
+
+        wait = deadline.timeout(10, "next month")
+        if not channel.evaluate(_NEXT_MONTH_JS % int(wait * 1000), await_promise=True, timeout=wait + 5):
+            break
+        progress.months_read += 1
+
+    return set(progress.slots)
+
+
+def read_calendar_via_devtools(
+    driver: webdriver.Chrome,
+    *,
+    facility_id: int,
+    months_ahead: int = 6,
+    progress: CalendarProgress | None = None,
+    deadline: Deadline = UNLIMITED,
+) -> set[Slot]:
+    with CdpChannel.for_driver(driver, timeout=deadline.timeout(10, "DevTools connect")) as channel:
+        slots = read_calendar_cdp(
+            channel, facility_id=facility_id, months_ahead=months_ahead, progress=progress, deadline=deadline
+        )
+    METRICS.inc("cdp_calendar_reads")
+    return slots
+
+
+def benchmark(driver: webdriver.Chrome, *, facility_id: int, rounds: int, months: int) -> dict:
+    """Чтение одного и того же открытого календаря: Selenium против DevTools, по `rounds` раз."""
+
+    timings: dict[str, list[float]] = {"selenium": [], "cdp": []}
+    results: dict[str, set[Slot]] = {}
+    with CdpChannel.for_driver(driver) as channel:
+        for _ in range(rounds):
+            # Клик по полю даты снова показывает первый месяц.
+            _open_datepicker_if_possible(driver)
+            started = time.perf_counter()
+            results["selenium"] = read_calendar(driver, facility_id=facility_id, months_ahead=months)
+            timings["selenium"].append(time.perf_counter() - started)
+
+            _open_datepicker_if_possible(driver)
+            started = time.perf_counter()
+            results["cdp"] = read_calendar_cdp(channel, facility_id=facility_id, months_ahead=months)
+            timings["cdp"].append(time.perf_counter() - started)
+
+    return {
+        "rounds": rounds,
+        "months": months,
+        "slots": len(results["cdp"]),
+        "same_slots": results["selenium"] == results["cdp"],
+        **{f"{path}_median_seconds": statistics.median(values) for path, values in timings.items()},
+        **{f"{path}_max_seconds": max(values) for path, values in timings.items()},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare Selenium and DevTools calendar reads on a local stand-in site")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--facility", type=int, default=134)
+    parser.add_argument("--no-headless", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+
+    with StandInSite(facilities=(args.facility,), density=0.2) as site:
+        driver = selenium_provider.start_driver(headless=not args.no_headless)
+        try:
+            selenium_provider.log_in(
+                driver,
+                sign_in_url=selenium_provider.build_sign_in_url(site.url, "ru-kz"),
+                username="bench@example.com",
+                password="bench",
+            )
+            selenium_provider.open_appointments_calendar(
+                driver,
+                appointments_url=selenium_provider.build_appointments_url(site.url, "ru-kz", "1"),
+                facility_id=args.facility,
+            )
+            result = benchmark(driver, facility_id=args.facility, rounds=args.rounds, months=args.months)
+        finally:
+            driver.quit()
+
+    print(f"rounds={result['rounds']} months={result['months']} slots={result['slots']} same={result['same_slots']}")
+    for path in ("selenium", "cdp"):
+        print(f"{path:>8}: median {result[f'{path}_median_seconds']:.3f}s  max {result[f'{path}_max_seconds']:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
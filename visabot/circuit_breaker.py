@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+import time
+from enum import Enum
+from typing import Callable
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Предохранитель вокруг сайта (ключ — country_code).
+
+    - closed: проверки идут как обычно, считаем подряд идущие BusyError/ошибки;
+    - open: после `failure_threshold` неудач подряд проверки пропускаются без запуска
+      браузера, пока не пройдёт `cooldown_seconds`;
+    - half-open: после паузы пропускаем ровно одну пробную проверку. Успех закрывает
+      предохранитель, неудача снова открывает его на следующий cooldown. Проба, которая
+      не записала результат (`abandon_probe`) или не отчиталась за целый cooldown,
+      не блокирует следующую.
+
+    Методы `record_*` возвращают пару (было, стало) при смене состояния, чтобы
+    вызывающий код сообщил о ней один раз.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        *,
+        failure_threshold: int,
+        cooldown_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.HALF_OPEN:
+                if now - self._probe_started_at < self.cooldown_seconds:
+                    # Пробная проверка уже выполняется.
+                    return False
+                # Проба не отчиталась за целый cooldown — считаем её потерянной.
+            elif now - self._opened_at < self.cooldown_seconds:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probe_started_at = now
+            return True
+
+    def abandon_probe(self) -> None:
+        """Пробная проверка закончилась без record_*: следующая проверка снова будет пробной."""
+
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN:
+                self.state = CircuitState.OPEN
+
+    def snapshot(self) -> tuple[CircuitState, int]:
+        with self._lock:
+            return self.state, self.consecutive_failures
+
+    def seconds_until_probe(self) -> float:
+        with self._lock:
+            if self.state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown_seconds - (self._clock() - self._opened_at))
+
+    def record_success(self) -> tuple[CircuitState, CircuitState] | None:
+        with self._lock:
+            before = self.state
+            self.state = CircuitState.CLOSED
+            self.consecutive_failures = 0
+        return (before, CircuitState.CLOSED) if before != CircuitState.CLOSED else None
+
+    def record_failure(self) -> tuple[CircuitState, CircuitState] | None:
+        with self._lock:
+            before = self.state
+            self.consecutive_failures += 1
+            if before == CircuitState.HALF_OPEN or (
+                before == CircuitState.CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = CircuitState.OPEN
+                self._opened_at = self._clock()
+        return (before, self.state) if before != self.state else None
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import json
 import os
+import socket
+import tempfile
 from dataclasses import dataclass
+from typing import Mapping
 
-from dotenv import load_dotenv
+from dotenv import dotenv_values, load_dotenv
+
+from visabot.subscribers import Subscriber, load_subscribers
+
+DEFAULT_BASE_URL = "https://ais.usvisa-info.com"
 
 
 def _parse_telegram_chat_ids(raw: str) -> tuple[str, ...]:
@@ -56,6 +64,22 @@ def _parse_optional_telegram_chat_id(raw: str | None) -> str | None:
     return value
 
 
+@dataclass(frozen=True)
+class Account:
+    """Один личный кабинет (schedule), который проверяет воркер."""
+
+    visa_username: str
+    visa_password: str
+    country_code: str
+    schedule_id: str
+    facility_id: int
+
+    @property
+    def key(self) -> str:
+        # Стабильный идентификатор: ключ в очереди задач, суффикс state/session-файлов.
+        return f"{self.country_code}_{self.schedule_id}_{self.facility_id}"
+
+
 @dataclass(frozen=True)
 class Settings:
     visa_username: str
@@ -71,20 +95,199 @@ class Settings:
     check_interval_seconds: int = 300
     headless: bool = True
 
+    # Appointment site; overridden only to run against a local stand-in (load_test, cdp_calendar)
+    base_url: str = DEFAULT_BASE_URL
+
+    # run_forever: status/busy/failure messages are aggregated into one digest every N seconds
+    # (0 = a message after every check); "admin" sends it to the admin chat, "all" to every chat
+    status_digest_seconds: int = 3600
+    status_digest_to: str = "admin"
+
+    # Start the browser and log in ahead of the tick (run_forever, local mode only)
+    prelogin: bool = False
+    prelogin_lead_seconds: int = 60
+
+    # Burst mode: after the calendar changes, re-check that account every burst_interval_seconds
+    # (doubling while nothing changes) for up to burst_window_seconds / burst_max_checks (0 = disabled)
+    burst_window_seconds: int = 0
+    burst_interval_seconds: int = 30
+    burst_max_checks: int = 10
+
+    # run_forever: accounts watching the same (country_code, facility_id) share one calendar
+    # read for this many seconds (0 = every account reads its own calendar)
+    facility_cache_seconds: int = 0
+
+    # One Chrome for all accounts (isolated browser context per account) in run_forever
+    shared_browser: bool = False
+    # Recycle an account's browser context once its page JS heap grows beyond this (MiB)
+    shared_browser_max_heap_mb: int = 256
+
     # Retry tuning
-    # How many times we allow a full check (login + fetch) to be retried on failure.
+    # How many times we allow a full check (new browser + login + fetch) when the browser session died.
     check_retry_attempts: int = 2
 
+    # Wall-clock budget for one whole check, shared by all its waits and retries
+    # (None = 80% of check_interval_seconds, at least 60s; 0 = unlimited)
+    check_deadline_seconds: int | None = None
+
+    # Per-phase attempts on the same browser session
+    driver_start_retry_attempts: int = 2
+    login_retry_attempts: int = 2
+    facility_retry_attempts: int = 2
+    calendar_retry_attempts: int = 2
+
+    # Read the open calendar over the page's DevTools websocket instead of chromedriver
+    # (falls back to Selenium if DevTools is unreachable)
+    cdp_calendar: bool = False
+
     # Selenium tuning
     # How many times we allow page refresh/rehydration attempts while trying to open the calendar.
     appointments_max_refresh_attempts: int = 5
 
+    # Token-bucket budget for requests to the site, per country_code (0 = unlimited)
+    rate_limit_per_minute: float = 0.0
+    rate_limits: tuple[tuple[str, float], ...] = ()
+    rate_limit_burst: int = 5
+    # Shared between processes on the host via a lock file in this directory (None = per process)
+    rate_limit_dir: str | None = None
+
+    # Circuit breaker around the site: open after N consecutive busy/failed checks (0 = disabled)
+    circuit_breaker_threshold: int = 5
+    circuit_breaker_cooldown_seconds: int = 900
+
     # Where we store last seen slots
     state_file: str = "state.json"
 
+    # Where we store authenticated cookies between restarts (None = always log in)
+    session_file: str | None = None
+
+    # Slot appear/disappear journal (JSONL) and its incremental aggregates (None = disabled)
+    slot_events_file: str | None = None
+    slot_stats_file: str | None = None
+
+    # Persistent per-account Chrome profiles (--user-data-dir) for warm starts (None = throwaway profile)
+    browser_profile_dir: str | None = None
+
+    # Registry of browser process groups, used to kill orphans after a crash (None = in-memory only)
+    browser_registry_file: str | None = None
+
+    # JSON snapshot of process metrics, rewritten after every check (None = disabled)
+    metrics_file: str | None = None
+
+    # Additional accounts (besides the primary one from VISA_USERNAME/...)
+    extra_accounts: tuple[Account, ...] = ()
+
+    # Per-chat filters for new-slot alerts (empty = every chat gets every alert)
+    subscribers: tuple[Subscriber, ...] = ()
+
+    # Long-polling Telegram commands (/status, /slots, /pause, /resume, /checknow)
+    telegram_commands_enabled: bool = False
+
+    # Shared work queue (SQLite on a shared volume). None = every process checks every account.
+    work_queue_db: str | None = None
+    work_queue_lease_seconds: int = 900
+    # Outbox lease, renewed before each send: must outlive one Telegram call (20 s timeout)
+    work_queue_outbox_lease_seconds: int = 60
+    worker_id: str = "local"
+
+    # Files the settings were read from (CONFIG_FILE, ACCOUNTS_FILE, SUBSCRIBERS_FILE); watched for hot reload
+    config_sources: tuple[str, ...] = ()
+
+    @property
+    def primary_account(self) -> Account:
+        return Account(
+            visa_username=self.visa_username,
+            visa_password=self.visa_password,
+            country_code=self.country_code,
+            schedule_id=self.schedule_id,
+            facility_id=self.facility_id,
+        )
+
+    @property
+    def check_deadline(self) -> int | None:
+        """Бюджет одной проверки в секундах; None — без ограничения."""
+
+        if self.check_deadline_seconds is None:
+            # С запасом укладываемся в интервал, чтобы проверка не наезжала на следующую.
+            return max(60, int(self.check_interval_seconds * 0.8))
+        return self.check_deadline_seconds or None
+
+    def accounts(self) -> tuple[Account, ...]:
+        result: list[Account] = [self.primary_account]
+        seen = {self.primary_account.key}
+        for account in self.extra_accounts:
+            if account.key in seen:
+                continue
+            seen.add(account.key)
+            result.append(account)
+        return tuple(result)
+
+
+def _load_accounts_file(path: str, *, default_country_code: str) -> tuple[Account, ...]:
+    # ACCOUNTS_FILE: JSON-список кабинетов, например
+    #   [{"username": "a@b.c", "password": "...", "schedule_id": "123", "facility_id": 134}]
+    # country_code необязателен (по умолчанию COUNTRY_CODE).
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuntimeError(f"Failed to read ACCOUNTS_FILE {path!r}: {e}") from e
 
-def _require(name: str) -> str:
-    value = os.getenv(name)
+    if not isinstance(raw, list):
+        raise RuntimeError("ACCOUNTS_FILE must contain a JSON list of accounts")
+
+    accounts: list[Account] = []
+    for i, item in enumerate(raw):
+        try:
+            accounts.append(
+                Account(
+                    visa_username=str(item["username"]),
+                    visa_password=str(item["password"]),
+                    country_code=str(item.get("country_code") or default_country_code),
+                    schedule_id=str(item["schedule_id"]),
+                    facility_id=int(item["facility_id"]),
+                )
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise RuntimeError(f"Invalid account #{i} in ACCOUNTS_FILE: {e}") from e
+    return tuple(accounts)
+
+
+def _getenv_int(env: Mapping[str, str], name: str, default: int, *, minimum: int) -> int:
+    value = int(env.get(name, str(default)))
+    if value < minimum:
+        raise RuntimeError(f"{name} must be >= {minimum}")
+    return value
+
+
+def _optional_path(env: Mapping[str, str], name: str, default: str) -> str | None:
+    # Переменная не задана — путь по умолчанию; задана пустой — функция выключена.
+    raw = env.get(name)
+    if raw is None:
+        return default
+    return raw.strip() or None
+
+
+def _parse_rate_limits(raw: str) -> tuple[tuple[str, float], ...]:
+    # RATE_LIMITS: "ru-kz=30,am-am=12" — запросов в минуту для отдельных country_code.
+    result: list[tuple[str, float]] = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        country_code, sep, value = part.partition("=")
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = -1.0
+        if not sep or not country_code.strip() or rate < 0:
+            raise RuntimeError(f"RATE_LIMITS: expected <country_code>=<requests per minute>, got {part!r}")
+        result.append((country_code.strip(), rate))
+    return tuple(result)
+
+
+def _require(env: Mapping[str, str], name: str) -> str:
+    value = env.get(name)
     if not value:
         raise RuntimeError(f"Missing required environment variable: {name}")
     return value
@@ -101,32 +304,160 @@ def load_settings(dotenv_path: str | None = None) -> Settings:
         if auto:
             load_dotenv(override=False)
 
-    check_interval_seconds = int(os.getenv("CHECK_INTERVAL_SECONDS", "300"))
-    headless_raw = os.getenv("HEADLESS", "1").strip().lower()
+    # CONFIG_FILE — dotenv-файл, который перечитывается при hot reload (SIGHUP/изменение файла).
+    # Его значения важнее переменных окружения процесса: окружение после старта не поменять,
+    # а файл — можно. os.environ при этом не трогаем.
+    env: Mapping[str, str] = os.environ
+    config_file = os.getenv("CONFIG_FILE", "").strip() or None
+    if config_file:
+        file_values = {k: v for k, v in dotenv_values(config_file).items() if v is not None}
+        env = {**os.environ, **file_values}
+
+    check_interval_seconds = int(env.get("CHECK_INTERVAL_SECONDS", "300"))
+    headless_raw = env.get("HEADLESS", "1").strip().lower()
     headless = headless_raw not in {"0", "false", "no"}
+    base_url = env.get("VISA_BASE_URL", "").strip().rstrip("/") or DEFAULT_BASE_URL
+
+    status_digest_seconds = _getenv_int(env, "STATUS_DIGEST_SECONDS", 3600, minimum=0)
+    status_digest_to = env.get("STATUS_DIGEST_TO", "admin").strip().lower() or "admin"
+    if status_digest_to not in {"admin", "all"}:
+        raise RuntimeError(f"Invalid STATUS_DIGEST_TO value: {status_digest_to!r}. Expected 'admin' or 'all'.")
+
+    prelogin = env.get("PRELOGIN", "0").strip().lower() in {"1", "true", "yes"}
+    prelogin_lead_seconds = _getenv_int(env, "PRELOGIN_LEAD_SECONDS", 60, minimum=1)
+
+    burst_window_seconds = _getenv_int(env, "BURST_WINDOW_SECONDS", 0, minimum=0)
+    burst_interval_seconds = _getenv_int(env, "BURST_INTERVAL_SECONDS", 30, minimum=5)
+    burst_max_checks = _getenv_int(env, "BURST_MAX_CHECKS", 10, minimum=1)
 
-    check_retry_attempts = int(os.getenv("CHECK_RETRY_ATTEMPTS", "2"))
+    facility_cache_seconds = _getenv_int(env, "FACILITY_CACHE_SECONDS", 0, minimum=0)
+
+    shared_browser = env.get("SHARED_BROWSER", "0").strip().lower() in {"1", "true", "yes"}
+    shared_browser_max_heap_mb = _getenv_int(env, "SHARED_BROWSER_MAX_HEAP_MB", 256, minimum=16)
+
+    check_retry_attempts = int(env.get("CHECK_RETRY_ATTEMPTS", "2"))
     if check_retry_attempts < 1:
         raise RuntimeError("CHECK_RETRY_ATTEMPTS must be >= 1")
 
-    appointments_max_refresh_attempts = int(os.getenv("APPOINTMENTS_MAX_REFRESH_ATTEMPTS", "5"))
+    # Не задано — считается от интервала (Settings.check_deadline) и следует за ним при перезагрузке.
+    check_deadline_raw = env.get("CHECK_DEADLINE_SECONDS", "").strip()
+    check_deadline_seconds = int(check_deadline_raw) if check_deadline_raw else None
+    if check_deadline_seconds is not None and check_deadline_seconds < 0:
+        raise RuntimeError("CHECK_DEADLINE_SECONDS must be >= 0")
+
+    driver_start_retry_attempts = _getenv_int(env, "DRIVER_START_RETRY_ATTEMPTS", 2, minimum=1)
+    login_retry_attempts = _getenv_int(env, "LOGIN_RETRY_ATTEMPTS", 2, minimum=1)
+    facility_retry_attempts = _getenv_int(env, "FACILITY_RETRY_ATTEMPTS", 2, minimum=1)
+    calendar_retry_attempts = _getenv_int(env, "CALENDAR_RETRY_ATTEMPTS", 2, minimum=1)
+
+    cdp_calendar = env.get("CDP_CALENDAR", "0").strip().lower() in {"1", "true", "yes"}
+
+    appointments_max_refresh_attempts = int(env.get("APPOINTMENTS_MAX_REFRESH_ATTEMPTS", "5"))
     if appointments_max_refresh_attempts < 1:
         raise RuntimeError("APPOINTMENTS_MAX_REFRESH_ATTEMPTS must be >= 1")
 
-    state_file = os.getenv("STATE_FILE", "state.json")
+    rate_limit_per_minute = float(env.get("RATE_LIMIT_PER_MINUTE", "0"))
+    if rate_limit_per_minute < 0:
+        raise RuntimeError("RATE_LIMIT_PER_MINUTE must be >= 0")
+    rate_limits = _parse_rate_limits(env.get("RATE_LIMITS", ""))
+    rate_limit_burst = _getenv_int(env, "RATE_LIMIT_BURST", 5, minimum=1)
+    rate_limit_dir = env.get("RATE_LIMIT_DIR", "").strip() or None
+
+    circuit_breaker_threshold = int(env.get("CIRCUIT_BREAKER_THRESHOLD", "5"))
+    if circuit_breaker_threshold < 0:
+        raise RuntimeError("CIRCUIT_BREAKER_THRESHOLD must be >= 0")
+
+    circuit_breaker_cooldown_seconds = int(env.get("CIRCUIT_BREAKER_COOLDOWN_SECONDS", "900"))
+    if circuit_breaker_cooldown_seconds < 1:
+        raise RuntimeError("CIRCUIT_BREAKER_COOLDOWN_SECONDS must be >= 1")
+
+    state_file = env.get("STATE_FILE", "state.json")
+
+    # По умолчанию кладём cookies рядом со state-файлом (тот же volume в docker).
+    # Пустое значение SESSION_FILE отключает сохранение сессии.
+    session_file = _optional_path(env, "SESSION_FILE", os.path.join(os.path.dirname(state_file), "session.json"))
+
+    # Журнал появления/исчезновения слотов и агрегаты по нему — рядом со state-файлом.
+    slot_events_file = _optional_path(env, "SLOT_EVENTS_FILE", os.path.join(os.path.dirname(state_file), "slot_events.jsonl"))
+    slot_stats_file = _optional_path(env, "SLOT_STATS_FILE", os.path.join(os.path.dirname(state_file), "slot_stats.json"))
+
+    # Реестр групп процессов браузера должен быть локальным для контейнера/хоста
+    # (pid из другого pid namespace ничего не значат), поэтому по умолчанию — во временной папке.
+    browser_registry_file = env.get("BROWSER_REGISTRY_FILE", "").strip() or os.path.join(
+        tempfile.gettempdir(), f"kzvisabot-browsers-{os.getuid() if hasattr(os, 'getuid') else 0}.json"
+    )
+
+    browser_profile_dir = env.get("BROWSER_PROFILE_DIR", "").strip() or None
+
+    metrics_file = _optional_path(env, "METRICS_FILE", os.path.join(os.path.dirname(state_file), "metrics.json"))
+
+    country_code = _require(env, "COUNTRY_CODE")
+    accounts_file = env.get("ACCOUNTS_FILE", "").strip()
+    extra_accounts = _load_accounts_file(accounts_file, default_country_code=country_code) if accounts_file else ()
+
+    subscribers_file = env.get("SUBSCRIBERS_FILE", "").strip()
+    subscribers = load_subscribers(subscribers_file) if subscribers_file else ()
+
+    telegram_commands_enabled = env.get("TELEGRAM_COMMANDS", "0").strip().lower() in {"1", "true", "yes"}
+
+    work_queue_db = env.get("WORK_QUEUE_DB", "").strip() or None
+    work_queue_lease_seconds = int(env.get("WORK_QUEUE_LEASE_SECONDS", "900"))
+    if work_queue_lease_seconds < 1:
+        raise RuntimeError("WORK_QUEUE_LEASE_SECONDS must be >= 1")
+    work_queue_outbox_lease_seconds = _getenv_int(env, "WORK_QUEUE_OUTBOX_LEASE_SECONDS", 60, minimum=30)
+    worker_id = env.get("WORKER_ID", "").strip() or f"{socket.gethostname()}-{os.getpid()}"
+
+    config_sources = tuple(p for p in (config_file, accounts_file, subscribers_file) if p)
 
     return Settings(
-        visa_username=_require("VISA_USERNAME"),
-        visa_password=_require("VISA_PASSWORD"),
-        country_code=_require("COUNTRY_CODE"),
-        schedule_id=_require("SCHEDULE_ID"),
-        facility_id=int(_require("APPOINTMENTS_CONSULATE_APPOINTMENT_FACILITY_ID")),
-        telegram_bot_token=_require("TELEGRAM_BOT_TOKEN"),
-        telegram_chat_ids=_parse_telegram_chat_ids(_require("TELEGRAM_CHAT_ID")),
-        telegram_admin_chat_id=_parse_optional_telegram_chat_id(os.getenv("TELEGRAM_ADMIN_CHAT_ID")),
+        visa_username=_require(env, "VISA_USERNAME"),
+        visa_password=_require(env, "VISA_PASSWORD"),
+        country_code=country_code,
+        schedule_id=_require(env, "SCHEDULE_ID"),
+        facility_id=int(_require(env, "APPOINTMENTS_CONSULATE_APPOINTMENT_FACILITY_ID")),
+        telegram_bot_token=_require(env, "TELEGRAM_BOT_TOKEN"),
+        telegram_chat_ids=_parse_telegram_chat_ids(_require(env, "TELEGRAM_CHAT_ID")),
+        telegram_admin_chat_id=_parse_optional_telegram_chat_id(env.get("TELEGRAM_ADMIN_CHAT_ID")),
         check_interval_seconds=check_interval_seconds,
         headless=headless,
+        base_url=base_url,
+        status_digest_seconds=status_digest_seconds,
+        status_digest_to=status_digest_to,
+        prelogin=prelogin,
+        prelogin_lead_seconds=prelogin_lead_seconds,
+        burst_window_seconds=burst_window_seconds,
+        burst_interval_seconds=burst_interval_seconds,
+        burst_max_checks=burst_max_checks,
+        facility_cache_seconds=facility_cache_seconds,
+        shared_browser=shared_browser,
+        shared_browser_max_heap_mb=shared_browser_max_heap_mb,
         check_retry_attempts=check_retry_attempts,
+        check_deadline_seconds=check_deadline_seconds,
+        driver_start_retry_attempts=driver_start_retry_attempts,
+        login_retry_attempts=login_retry_attempts,
+        facility_retry_attempts=facility_retry_attempts,
+        calendar_retry_attempts=calendar_retry_attempts,
+        cdp_calendar=cdp_calendar,
         appointments_max_refresh_attempts=appointments_max_refresh_attempts,
+        rate_limit_per_minute=rate_limit_per_minute,
+        rate_limits=rate_limits,
+        rate_limit_burst=rate_limit_burst,
+        rate_limit_dir=rate_limit_dir,
+        circuit_breaker_threshold=circuit_breaker_threshold,
+        circuit_breaker_cooldown_seconds=circuit_breaker_cooldown_seconds,
         state_file=state_file,
+        session_file=session_file,
+        browser_profile_dir=browser_profile_dir,
+        browser_registry_file=browser_registry_file,
+        metrics_file=metrics_file,
+        slot_events_file=slot_events_file,
+        slot_stats_file=slot_stats_file,
+        extra_accounts=extra_accounts,
+        subscribers=subscribers,
+        telegram_commands_enabled=telegram_commands_enabled,
+        work_queue_db=work_queue_db,
+        work_queue_lease_seconds=work_queue_lease_seconds,
+        work_queue_outbox_lease_seconds=work_queue_outbox_lease_seconds,
+        worker_id=worker_id,
+        config_sources=config_sources,
     )
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+import signal
+import threading
+from typing import Callable
+
+from visabot.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def changed_fields(old: Settings, new: Settings) -> set[str]:
+    return {f.name for f in dataclasses.fields(Settings) if getattr(old, f.name) != getattr(new, f.name)}
+
+
+class ConfigReloader:
+    """Перечитывает настройки по SIGHUP или при изменении файлов конфигурации.
+
+    Новые `Settings` собираются тем же `load_settings()` (с теми же проверками).
+    Если конфиг невалиден, остаёмся на старых настройках. Подмена происходит
+    только между проверками — через `poll()` из цикла воркера.
+    """
+
+    def __init__(self, load: Callable[[], Settings], *, on_request: Callable[[], None] | None = None) -> None:
+        self._load = load
+        self._on_request = on_request
+        self._requested = threading.Event()
+        self._mtimes: dict[str, float | None] = {}
+
+    def install_signal_handler(self) -> None:
+        # SIGHUP есть только на POSIX; сигналы ставятся только из главного потока.
+        if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGHUP, lambda *_: self.request())
+
+    def request(self) -> None:
+        self._requested.set()
+        if self._on_request is not None:
+            self._on_request()
+
+    def watch(self, settings: Settings) -> None:
+        self._mtimes = {path: self._mtime(path) for path in settings.config_sources}
+
+    @staticmethod
+    def _mtime(path: str) -> float | None:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _files_changed(self) -> bool:
+        return any(self._mtime(path) != mtime for path, mtime in self._mtimes.items())
+
+    def poll(self, current: Settings) -> Settings | None:
+        """Новые Settings, если конфиг поменялся и прошёл валидацию, иначе None."""
+
+        if not self._requested.is_set() and not self._files_changed():
+            return None
+        self._requested.clear()
+
+        try:
+            new = self._load()
+        except Exception as e:
+            logger.error("Config reload failed, keeping current settings (%s: %s)", type(e).__name__, e)
+            # Запоминаем текущие mtime, чтобы не перечитывать тот же битый файл каждый тик.
+            self._mtimes = {path: self._mtime(path) for path in self._mtimes}
+            return None
+
+        self.watch(new)
+        if new == current:
+            logger.info("Config reloaded: no changes")
+            return None
+        return new
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable
+
+from visabot.domain import DeadlineExceeded
+
+
+class Deadline:
+    """Общий бюджет времени одной проверки.
+
+    Все ожидания и паузы берут таймаут через `timeout(cap)`: не больше своего обычного
+    лимита и не больше, чем осталось до дедлайна. Когда время вышло — DeadlineExceeded.
+    `Deadline(None)` — без ограничения (поведение как раньше).
+    """
+
+    def __init__(self, seconds: float | None, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.seconds = seconds
+        self._ends_at = None if seconds is None else clock() + seconds
+
+    def remaining(self) -> float:
+        if self._ends_at is None:
+            return math.inf
+        return self._ends_at - self._clock()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, what: str = "check") -> None:
+        if self.expired():
+            raise DeadlineExceeded(f"Превышен лимит времени проверки ({self.seconds:.0f}s): {what}")
+
+    def timeout(self, cap: float, what: str = "wait") -> float:
+        self.check(what)
+        return min(cap, self.remaining())
+
+    def sleep(self, seconds: float, what: str = "pause") -> None:
+        time.sleep(self.timeout(seconds, what))
+        # Если пауза упёрлась в дедлайн, не продолжаем работу «на ноль секунд».
+        self.check(what)
+
+
+UNLIMITED = Deadline(None)
@@ -14,9 +14,58 @@ class Slot:
     facility_id: int
 
 
+@dataclass(frozen=True)
+class OutboxMessage:
+    """Уведомление, ожидающее доставки одному чату.
+
+    `id` = `<id события>:<chat_id>` — по нему доставка идемпотентна для каждого получателя.
+    """
+
+    id: str
+    chat_id: str
+    text: str
+    created_at: float
+    attempts: int = 0
+
+
 class BusyError(RuntimeError):
     """Штатное состояние сайта: он временно отвечает 'Система занята...'.
 
     Это не является 'реальной' ошибкой бизнес-логики, поэтому такие исключения
     не должны приводить к Telegram-алертам.
     """
+
+
+class SessionLostError(RuntimeError):
+    """Браузерная сессия мертва (Chrome/chromedriver упал, DevTools отвалился).
+
+    Повторять отдельный шаг на такой сессии бессмысленно — нужен полный перезапуск.
+    """
+
+
+class LoggedOutError(RuntimeError):
+    """Сайт отправил на страницу входа: браузер жив, но авторизация протухла."""
+
+
+class DeadlineExceeded(RuntimeError):
+    """Проверка не уложилась в общий лимит времени (CHECK_DEADLINE_SECONDS).
+
+    Не повторяется: время уже кончилось, следующая попытка — по расписанию.
+    """
+
+
+class PageStructureError(RuntimeError):
+    """Страница не похожа на ожидаемую: сайт поменял разметку (селекторы больше не находятся).
+
+    Повторять шаги и ждать полные таймауты бессмысленно — нужна правка селекторов.
+    `snapshot` — префикс сохранённых debug-файлов (.html/.png), если их удалось записать.
+    """
+
+    def __init__(self, page: str, missing: list[str], snapshot: str | None = None) -> None:
+        self.page = page
+        self.missing = missing
+        self.snapshot = snapshot
+        message = f"Страница '{page}' изменилась: не найдено {', '.join(missing)}"
+        if snapshot:
+            message += f" (снимок: {snapshot}.html/.png)"
+        super().__init__(message)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Hashable
+
+from visabot.config import Settings
+from visabot.domain import Slot
+from visabot.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    fetched_at: float
+    slots: frozenset[Slot]
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    slots: frozenset[Slot] = frozenset()
+    error: BaseException | None = None
+
+
+class FacilityCache:
+    """Последний календарь консульства, общий для всех аккаунтов, которые его смотрят.
+
+    Ключ — (country_code, facility_id). Свежий (моложе `ttl` секунд) результат отдаётся без
+    браузера; если календарь уже читается другим потоком, ждём его результат (или его ошибку,
+    например BusyError), а не открываем ещё одну сессию. Кешируются только успешные чтения.
+    """
+
+    def __init__(self, ttl: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, _Entry] = {}
+        self._inflight: dict[Hashable, _Flight] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> FacilityCache | None:
+        if settings.facility_cache_seconds <= 0:
+            return None
+        return cls(settings.facility_cache_seconds)
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], set[Slot]]) -> set[Slot]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry.fetched_at < self.ttl:
+                METRICS.inc("facility_cache_hits")
+                logger.info("Facility %s: using calendar read %.0fs ago", key, self._clock() - entry.fetched_at)
+                return set(entry.slots)
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            METRICS.inc("facility_cache_shared")
+            logger.info("Facility %s: waiting for the calendar read already in progress", key)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return set(flight.slots)
+
+        METRICS.inc("facility_cache_misses")
+        try:
+            slots = frozenset(fetch())
+            flight.slots = slots
+            with self._lock:
+                self._entries[key] = _Entry(fetched_at=self._clock(), slots=slots)
+            return set(slots)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
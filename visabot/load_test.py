@@ -0,0 +1,243 @@
+"""Нагрузочный тест: N аккаунтов против локальной подмены сайта за T минут.
+
+    python -m visabot.load_test --accounts 20 --concurrency 4 --minutes 5 --latency 0.3 --busy-rate 0.1
+
+Проверки идут через настоящий `run_check_once` (Chrome, логин, календарь, state, события слотов),
+только сайт — `StandInSite` на localhost, а Telegram не вызывается (получателей нет).
+Итог: пропускная способность, перцентили длительности проверки, пиковый RSS (воркер +
+браузеры), число процессов браузера, CPU и разбивка исходов.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import queue
+import resource
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from visabot.config import DEFAULT_BASE_URL, Account, Settings
+from visabot.runtime import WorkerRuntime
+from visabot.stand_in_site import StandInSite
+from visabot.worker import _browser_tracker, run_check_once
+
+
+def load_test_settings(
+    state_dir: str,
+    *,
+    accounts: int,
+    facilities: tuple[int, ...],
+    headless: bool = True,
+    base_url: str = DEFAULT_BASE_URL,
+) -> Settings:
+    simulated = [
+        Account(
+            visa_username=f"load{i}@example.com",
+            visa_password="load-test",
+            country_code="ru-kz",
+            schedule_id=str(10_000 + i),
+            facility_id=facilities[i % len(facilities)],
+        )
+        for i in range(accounts)
+    ]
+    primary = simulated[0]
+    return Settings(
+        visa_username=primary.visa_username,
+        visa_password=primary.visa_password,
+        country_code=primary.country_code,
+        schedule_id=primary.schedule_id,
+        facility_id=primary.facility_id,
+        telegram_bot_token="",
+        telegram_chat_ids=(),
+        headless=headless,
+        base_url=base_url,
+        # Меряем сам конвейер: предохранитель не должен пропускать проверки при busy.
+        circuit_breaker_threshold=0,
+        state_file=os.path.join(state_dir, "state.json"),
+        browser_registry_file=os.path.join(state_dir, "browsers.json"),
+        metrics_file=None,
+        extra_accounts=tuple(simulated[1:]),
+    )
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return math.nan
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _ResourceSampler(threading.Thread):
+    """Раз в `interval` секунд снимает RSS воркера и браузеров; хранит пики."""
+
+    def __init__(self, settings: Settings, interval: float) -> None:
+        super().__init__(name="load-test-sampler", daemon=True)
+        self._tracker = _browser_tracker(settings.browser_registry_file)
+        self.interval = interval
+        self._stop = threading.Event()
+        self.peak_rss_bytes = 0
+        self.peak_worker_rss_bytes = 0
+        self.peak_browser_processes = 0
+
+    def sample(self) -> None:
+        # ru_maxrss — пик самого процесса воркера (в КиБ на Linux).
+        worker_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        browsers, browser_rss = self._tracker.usage()
+        self.peak_worker_rss_bytes = max(self.peak_worker_rss_bytes, worker_rss)
+        self.peak_rss_bytes = max(self.peak_rss_bytes, worker_rss + browser_rss)
+        self.peak_browser_processes = max(self.peak_browser_processes, browsers)
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def run_load_test(
+    settings: Settings,
+    *,
+    minutes: float,
+    concurrency: int,
+    check: Callable[..., None] = run_check_once,
+    sample_interval: float = 1.0,
+) -> dict:
+    """Гоняет проверки всех аккаунтов по кругу `concurrency` потоками, пока не выйдет время.
+
+    Один аккаунт никогда не проверяется двумя потоками сразу (как в run_forever и очереди).
+    """
+
+    accounts: queue.Queue[Account] = queue.Queue()
+    for account in settings.accounts():
+        accounts.put(account)
+
+    latencies: list[float] = []
+    outcomes: Counter[str] = Counter()
+    lock = threading.Lock()
+    ends_at = time.monotonic() + minutes * 60
+
+    def work() -> None:
+        while time.monotonic() < ends_at:
+            try:
+                account = accounts.get(timeout=1)
+            except queue.Empty:
+                continue
+            # Свой runtime на каждую проверку: если она ничего не записала, исход — «skipped»,
+            # а не исход прошлой проверки этого аккаунта.
+            runtime = WorkerRuntime()
+            started = time.perf_counter()
+            try:
+                check(settings, account, runtime=runtime)
+                status = runtime.snapshot().get(account.key)
+                outcome = (status.last_outcome if status else None) or "skipped"
+            except Exception as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                outcomes[outcome] += 1
+            accounts.put(account)
+
+    sampler = _ResourceSampler(settings, sample_interval)
+    cpu_before = os.times()
+    started = time.monotonic()
+    sampler.start()
+    threads = [threading.Thread(target=work, name=f"load-test-{i}") for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    sampler.stop()
+    sampler.sample()
+    elapsed = time.monotonic() - started
+    cpu_after = os.times()
+
+    cpu_seconds = sum(after - before for after, before in zip(cpu_after[:4], cpu_before[:4]))
+    latencies.sort()
+    checks = len(latencies)
+    return {
+        "accounts": len(settings.accounts()),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "checks": checks,
+        "checks_per_minute": checks / elapsed * 60 if elapsed > 0 else 0.0,
+        "latency_p50": _percentile(latencies, 0.50),
+        "latency_p90": _percentile(latencies, 0.90),
+        "latency_p99": _percentile(latencies, 0.99),
+        "latency_max": latencies[-1] if latencies else math.nan,
+        "outcomes": dict(outcomes),
+        "peak_rss_bytes": sampler.peak_rss_bytes,
+        "peak_worker_rss_bytes": sampler.peak_worker_rss_bytes,
+        "peak_browser_processes": sampler.peak_browser_processes,
+        "cpu_seconds": cpu_seconds,
+        "cpu_cores_used": cpu_seconds / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _print_report(result: dict) -> None:
+    mib = 2**20
+    print(f"accounts={result['accounts']} concurrency={result['concurrency']} duration={result['seconds']:.0f}s")
+    print(f"checks: {result['checks']} ({result['checks_per_minute']:.1f}/min)")
+    print(
+        "latency: p50 {latency_p50:.1f}s  p90 {latency_p90:.1f}s  p99 {latency_p99:.1f}s  max {latency_max:.1f}s".format(
+            **result
+        )
+    )
+    print(
+        f"peak RSS: {result['peak_rss_bytes'] / mib:.0f} MiB (worker {result['peak_worker_rss_bytes'] / mib:.0f} MiB), "
+        f"peak browser processes: {result['peak_browser_processes']}"
+    )
+    print(f"CPU: {result['cpu_seconds']:.1f}s ({result['cpu_cores_used']:.2f} cores)")
+    print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(result["outcomes"].items())))
+    if "site_requests" in result:
+        print(f"site: {result['site_requests']} requests, {result['site_logins']} logins")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the check pipeline against a local stand-in site")
+    parser.add_argument("--accounts", type=int, default=10, help="Simulated accounts")
+    parser.add_argument("--concurrency", type=int, default=2, help="Parallel checks (= chromedriver instances)")
+    parser.add_argument("--minutes", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stand-in site response latency, seconds")
+    parser.add_argument("--busy-rate", type=float, default=0.0, help="Share of 'system is busy' appointment pages")
+    parser.add_argument("--facilities", default="134", help="Comma-separated facility ids")
+    parser.add_argument("--no-headless", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+
+    if args.accounts < 1 or args.concurrency < 1:
+        raise RuntimeError("--accounts and --concurrency must be >= 1")
+    facilities = tuple(int(f) for f in args.facilities.split(",") if f.strip())
+
+    with StandInSite(facilities=facilities, latency=args.latency, busy_rate=args.busy_rate) as site:
+        with tempfile.TemporaryDirectory(prefix="kzvisabot-load-") as state_dir:
+            settings = load_test_settings(
+                state_dir,
+                accounts=args.accounts,
+                facilities=facilities,
+                headless=not args.no_headless,
+                base_url=site.url,
+            )
+            result = run_load_test(settings, minutes=args.minutes, concurrency=args.concurrency)
+        result["site_requests"] = site.requests
+        result["site_logins"] = site.logins
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_report(result)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class Metrics:
+    """Простейший реестр метрик процесса: счётчики и текущие значения (gauges).
+
+    Снимок пишется в JSON (`METRICS_FILE`) после каждой проверки и показывается в `/status`;
+    этого достаточно, чтобы смотреть на бота без отдельной системы мониторинга.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name: str, default: float = 0.0) -> float:
+        with self._lock:
+            if name in self._gauges:
+                return self._gauges[name]
+            return self._counters.get(name, default)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+
+
+METRICS = Metrics()
+
+
+def write_metrics_file(path: str, metrics: Metrics = METRICS) -> None:
+    data = {"updated_at": time.time(), **metrics.snapshot()}
+
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    # Atomic write
+    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8", dir=folder, suffix=".tmp") as tf:
+        json.dump(data, tf, ensure_ascii=False, indent=2, sort_keys=True)
+        tmp_name = tf.name
+
+    os.replace(tmp_name, path)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from visabot.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Job:
+    description: str
+    send: Callable[[], None]
+    enqueued_at: float
+
+
+class NotifyStage(threading.Thread):
+    """Стадия уведомлений: проверка кладёт сообщения в ограниченную очередь, поток их отправляет.
+
+    Медленный или недоступный api.telegram.org (20 с таймаута на каждый чат) больше не сдвигает
+    следующую проверку. Если очередь полна, проверка ждёт не дольше `put_timeout` (backpressure),
+    после чего сообщение отбрасывается: здесь только статусные/служебные сообщения, уведомления
+    о новых датах идут через outbox и не теряются.
+
+    Глубина очереди и задержка (сколько сообщение ждало отправки) — в METRICS и `/status`.
+    `stop()` дожидается отправки уже поставленных сообщений, но в пределах своего таймаута.
+    """
+
+    def __init__(self, *, maxsize: int = 100, put_timeout: float = 1.0) -> None:
+        super().__init__(name="notify-stage", daemon=True)
+        self.put_timeout = put_timeout
+        self._queue: queue.Queue[_Job | None] = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._stopping = threading.Event()
+        self._stop_at = float("inf")
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, description: str, send: Callable[[], None]) -> bool:
+        if self._stopping.is_set():
+            logger.warning("Notify stage is stopping, dropping %s", description)
+            return False
+        try:
+            self._queue.put(_Job(description, send, time.monotonic()), timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            METRICS.inc("notify_dropped")
+            logger.warning("Notify queue is full (%d), dropping %s", self._queue.maxsize, description)
+            return False
+        METRICS.set("notify_queue_depth", self.depth)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Дописывает очередь не дольше `timeout` секунд и останавливает поток.
+
+        Что не успело уйти за это время, отбрасывается с предупреждением в логе.
+        """
+
+        self._stop_at = time.monotonic() + timeout
+        self._stopping.set()
+        try:
+            # None — маркер остановки: всё, что стоит в очереди до него, ещё будет отправлено.
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        if self.is_alive():
+            self.join(max(0.0, self._stop_at - time.monotonic()))
+
+        unsent = 0
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                unsent += 1
+        if unsent:
+            self.dropped += unsent
+            METRICS.inc("notify_dropped", unsent)
+            logger.warning("Notify stage stopped after %.0fs, dropping %d unsent messages", timeout, unsent)
+
+    def run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            lag = time.monotonic() - job.enqueued_at
+            METRICS.set("notify_lag_seconds", lag)
+            METRICS.set("notify_queue_depth", self.depth)
+            try:
+                job.send()
+            except Exception as e:
+                METRICS.inc("notify_failed")
+                logger.warning("Failed to send %s (%s: %s)", job.description, type(e).__name__, e)
+            else:
+                METRICS.inc("notify_sent")
+            if self._stopping.is_set() and time.monotonic() >= self._stop_at:
+                # Время на остановку вышло; остаток очереди отбросит stop().
+                break
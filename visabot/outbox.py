@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Iterable, Protocol
+
+from visabot.domain import OutboxMessage
+from visabot.state_file import load_outbox, update_outbox
+from visabot.work_queue import SqliteWorkQueue
+
+logger = logging.getLogger(__name__)
+
+# После стольких неудачных попыток сообщение выбрасывается (чат удалён, бот заблокирован и т.п.).
+MAX_DELIVERY_ATTEMPTS = 20
+
+
+class OutboxStore(Protocol):
+    def pending(self) -> list[OutboxMessage]: ...
+
+    def hold(self, message_id: str) -> bool:
+        """Продлевает право на отправку прямо перед ней; False — сообщение уже не наше."""
+        ...
+
+    def update(self, *, sent: Iterable[str] = (), failed: Iterable[str] = (), dropped: Iterable[str] = ()) -> None: ...
+
+
+def new_outbox_messages(messages: Iterable[tuple[str, str]], *, now: float | None = None) -> list[OutboxMessage]:
+    """Одно событие (например, «появились даты») → по сообщению на каждого получателя."""
+
+    event_id = uuid.uuid4().hex
+    created_at = time.time() if now is None else now
+    return [
+        OutboxMessage(id=f"{event_id}:{chat_id}", chat_id=chat_id, text=text, created_at=created_at)
+        for chat_id, text in messages
+    ]
+
+
+class FileOutbox:
+    """Outbox внутри state-файла аккаунта (пишется атомарно вместе со слотами)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def pending(self) -> list[OutboxMessage]:
+        return load_outbox(self.path)
+
+    def hold(self, message_id: str) -> bool:
+        # Файл аккаунта пишет один процесс — делить сообщения не с кем.
+        return True
+
+    def update(self, *, sent: Iterable[str] = (), failed: Iterable[str] = (), dropped: Iterable[str] = ()) -> None:
+        update_outbox(self.path, sent=sent, failed=failed, dropped=dropped)
+
+
+class QueueOutbox:
+    """Outbox в общей SQLite-базе очереди: сообщения берутся в аренду, чтобы реплики не дублировали отправку."""
+
+    def __init__(self, queue: SqliteWorkQueue, keys: Iterable[str], *, retry_seconds: float = 30.0) -> None:
+        self.queue = queue
+        self.keys = list(keys)
+        self.retry_seconds = retry_seconds
+
+    def pending(self) -> list[OutboxMessage]:
+        return self.queue.claim_outbox(self.keys)
+
+    def hold(self, message_id: str) -> bool:
+        return self.queue.renew_outbox_lease(message_id)
+
+    def update(self, *, sent: Iterable[str] = (), failed: Iterable[str] = (), dropped: Iterable[str] = ()) -> None:
+        self.queue.update_outbox(sent=sent, failed=failed, dropped=dropped, retry_at=time.time() + self.retry_seconds)
+
+
+def deliver_outbox(
+    store: OutboxStore,
+    send: Callable[[str, str], None],
+    *,
+    extra: Iterable[OutboxMessage] = (),
+) -> tuple[int, int]:
+    """Отправляет всё недоставленное из `store` (плюс `extra`), возвращает (sent, failed).
+
+    Каждое доставленное сообщение сразу отмечается в хранилище: если процесс упадёт посреди
+    рассылки, повторно уйдёт максимум одно сообщение, а не вся пачка. Неудачные копятся и
+    повторяются следующей пачкой. Перед каждой отправкой аренда сообщения продлевается
+    (`hold`): медленный проход, переживший аренду пачки, не отправит то, что уже забрала
+    другая реплика.
+    """
+
+    messages = {m.id: m for m in store.pending()}
+    for m in extra:
+        messages.setdefault(m.id, m)
+
+    sent = 0
+    failed: list[str] = []
+    dropped: list[str] = []
+    for m in sorted(messages.values(), key=lambda m: (m.created_at, m.id)):
+        if not store.hold(m.id):
+            logger.info("Notification %s is taken by another replica or already sent, skipping", m.id)
+            continue
+        try:
+            send(m.chat_id, m.text)
+        except Exception as e:
+            if m.attempts + 1 >= MAX_DELIVERY_ATTEMPTS:
+                logger.error("Dropping notification %s for chat_id=%s after %d attempts (%s)", m.id, m.chat_id, m.attempts + 1, e)
+                dropped.append(m.id)
+            else:
+                logger.warning("Failed to deliver notification to chat_id=%s (%s: %s)", m.chat_id, type(e).__name__, e)
+                failed.append(m.id)
+            continue
+        store.update(sent=[m.id])
+        sent += 1
+
+    if failed or dropped:
+        store.update(failed=failed, dropped=dropped)
+    return sent, len(failed) + len(dropped)
+
+
+class OutboxDeliveryLoop(threading.Thread):
+    """Фоновая доставка уведомлений из outbox для run_forever.
+
+    Проверка только пишет события вместе со state и будит поток (`wake`); отправка в Telegram
+    идёт здесь, вне критического пути проверки. Недоставленное повторяется раз в `retry_seconds`.
+    """
+
+    def __init__(
+        self,
+        stores: Callable[[], list[OutboxStore]],
+        send: Callable[[str, str], None],
+        *,
+        retry_seconds: float = 30.0,
+    ) -> None:
+        super().__init__(name="outbox-delivery", daemon=True)
+        self._stores = stores
+        self._send = send
+        self.retry_seconds = retry_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Останавливает поток и ждёт не дольше `timeout` секунд, пока он доотправит текущий проход."""
+
+        self._stopping.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.retry_seconds)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            self.drain()
+
+    def drain(self) -> None:
+        for store in self._stores():
+            try:
+                sent, failed = deliver_outbox(store, self._send)
+            except Exception as e:
+                logger.error("Outbox delivery failed (%s: %s)", type(e).__name__, e)
+                continue
+            if sent or failed:
+                logger.info("Outbox delivery: sent=%d failed=%d", sent, failed)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from visabot.config import Account
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PreparedSession:
+    """Браузер, заранее запущенный и авторизованный для аккаунта.
+
+    `seconds` — сколько заняли старт и логин; ровно столько проверка не тратит на тике.
+    `kept` — не подготовлена заранее, а оставлена открытой после прошлой проверки (всплеск).
+    """
+
+    key: str
+    driver: Any
+    pgid: int | None
+    profile: Any
+    seconds: float
+    prepared_at: float
+    used: bool = False
+    kept: bool = False
+
+
+class PreLogin:
+    """Подготовка сессий в фоне: пока идёт простой или проверка соседнего аккаунта,
+    для следующего аккаунта уже запускается браузер и восстанавливается/выполняется логин.
+
+    `prepare(account)` возвращает PreparedSession (или бросает исключение — тогда проверка
+    просто сделает всё сама), `close(session)` освобождает неиспользованную сессию.
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[Account], PreparedSession],
+        close: Callable[[PreparedSession], None],
+    ) -> None:
+        self._prepare = prepare
+        self._close = close
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[threading.Thread | None, list[PreparedSession]]] = {}
+
+    def start(self, account: Account) -> None:
+        """Начинает подготовку сессии аккаунта, если она ещё не начата."""
+
+        with self._lock:
+            if account.key in self._pending:
+                return
+            result: list[PreparedSession] = []
+            thread = threading.Thread(
+                target=self._run, args=(account, result), name=f"prelogin-{account.key}", daemon=True
+            )
+            self._pending[account.key] = (thread, result)
+        thread.start()
+
+    def put(self, session: PreparedSession) -> None:
+        """Кладёт уже готовую сессию; прежняя сессия того же аккаунта закрывается."""
+
+        with self._lock:
+            entry = self._pending.get(session.key)
+            self._pending[session.key] = (None, [session])
+        if entry is not None:
+            thread, result = entry
+            if thread is not None:
+                thread.join()
+            for previous in result:
+                self._close_quietly(previous)
+
+    def _run(self, account: Account, result: list[PreparedSession]) -> None:
+        started = time.monotonic()
+        try:
+            result.append(self._prepare(account))
+        except Exception as e:
+            logger.warning("Pre-login for %s failed (%s: %s)", account.key, type(e).__name__, e)
+            return
+        logger.info("Pre-login for %s ready in %.1fs", account.key, time.monotonic() - started)
+
+    def pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def take(self, key: str) -> PreparedSession | None:
+        """Готовая сессия аккаунта (дожидается начатой подготовки) или None."""
+
+        with self._lock:
+            entry = self._pending.pop(key, None)
+        if entry is None:
+            return None
+        thread, result = entry
+        if thread is not None:
+            thread.join()
+        return result[0] if result else None
+
+    def discard(self, key: str) -> None:
+        """Закрывает подготовленную сессию аккаунта, если она есть (или готовится)."""
+
+        session = self.take(key)
+        if session is not None:
+            self._close_quietly(session)
+
+    def _close_quietly(self, session: PreparedSession) -> None:
+        try:
+            self._close(session)
+        except Exception:
+            logger.warning("Failed to close pre-login session for %s", session.key, exc_info=True)
+
+    def discard_all(self) -> None:
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self.discard(key)
@@ -0,0 +1,167 @@
+"""Профилирование одной проверки (`main.py --once --profile`).
+
+Два независимых источника:
+
+* сэмплирующий профайлер: фоновый поток раз в `interval` снимает стек потока проверки
+  и копит их в формате folded stacks (`a;b;c 42`) — его понимают flamegraph.pl и speedscope;
+* учёт команд WebDriver: обёртка над `RemoteConnection.execute` (command executor драйвера)
+  считает команды по типам и время round trip до chromedriver, включая ожидание страницы.
+
+Разница между общим временем и временем команд — это Python и наши паузы (`time.sleep`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    def __init__(self, *, interval: float = 0.005, thread_id: int | None = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            parts: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@dataclass
+class WebDriverCommandStats:
+    counts: Counter[str] = field(default_factory=Counter)
+    seconds: dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, command: str, elapsed: float) -> None:
+        with self._lock:
+            self.counts[command] += 1
+            self.seconds[command] = self.seconds.get(command, 0.0) + elapsed
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    @contextmanager
+    def installed(self) -> Iterator[WebDriverCommandStats]:
+        original = RemoteConnection.execute
+        stats = self
+
+        def execute(connection, command, params):
+            name = command
+            if command == "executeCdpCommand" and isinstance(params, dict):
+                name = f"{command}:{params.get('cmd')}"
+            started = time.perf_counter()
+            try:
+                return original(connection, command, params)
+            finally:
+                stats.add(name, time.perf_counter() - started)
+
+        RemoteConnection.execute = execute
+        try:
+            yield self
+        finally:
+            RemoteConnection.execute = original
+
+
+@dataclass
+class ProfileResult:
+    wall_seconds: float
+    cpu_seconds: float
+    commands: WebDriverCommandStats
+    profiler: SamplingProfiler
+
+    def summary(self) -> dict:
+        webdriver_seconds = self.commands.total_seconds
+        return {
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "webdriver_seconds": round(webdriver_seconds, 3),
+            "other_seconds": round(max(0.0, self.wall_seconds - webdriver_seconds), 3),
+            "webdriver_commands_total": sum(self.commands.counts.values()),
+            "webdriver_commands": {
+                name: {"count": n, "seconds": round(self.commands.seconds[name], 3)}
+                for name, n in sorted(self.commands.counts.items(), key=lambda kv: -self.commands.seconds[kv[0]])
+            },
+            "samples": self.profiler.samples,
+            "sample_interval_seconds": self.profiler.interval,
+        }
+
+
+@contextmanager
+def profile_check(output_dir: str, *, interval: float = 0.005) -> Iterator[None]:
+    """Профилирует блок и пишет `profile.folded` и `profile-summary.json` в `output_dir`."""
+
+    profiler = SamplingProfiler(interval=interval)
+    commands = WebDriverCommandStats()
+    started, cpu_started = time.perf_counter(), time.process_time()
+    profiler.start()
+    try:
+        with commands.installed():
+            yield
+    finally:
+        profiler.stop()
+        result = ProfileResult(
+            wall_seconds=time.perf_counter() - started,
+            cpu_seconds=time.process_time() - cpu_started,
+            commands=commands,
+            profiler=profiler,
+        )
+        _write_results(output_dir, result)
+
+
+def _write_results(output_dir: str, result: ProfileResult) -> None:
+    os.makedirs(output_dir or ".", exist_ok=True)
+    folded_path = os.path.join(output_dir, "profile.folded")
+    summary_path = os.path.join(output_dir, "profile-summary.json")
+
+    result.profiler.write_folded(folded_path)
+    summary = result.summary()
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    logger.info(
+        "Profile: wall=%.1fs cpu=%.1fs webdriver=%.1fs in %d commands; written %s and %s",
+        summary["wall_seconds"],
+        summary["cpu_seconds"],
+        summary["webdriver_seconds"],
+        summary["webdriver_commands_total"],
+        folded_path,
+        summary_path,
+    )
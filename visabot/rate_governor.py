@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Protocol
+
+try:
+    import fcntl
+except ImportError:  # Windows: общий между процессами бюджет недоступен
+    fcntl = None  # type: ignore[assignment]
+
+from visabot.config import Settings
+from visabot.deadline import UNLIMITED, Deadline
+from visabot.domain import DeadlineExceeded
+from visabot.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# https://ais.usvisa-info.com/ru-kz/niv/... — бюджет выбирается по country_code из пути.
+_COUNTRY_RE = re.compile(r"^[a-z]+://[^/]+/(?P<cc>[\w-]+)/niv(?:/|$)")
+
+
+class _Bucket(Protocol):
+    def reserve(self) -> float: ...
+
+    def refund(self) -> None: ...
+
+
+class TokenBucket:
+    """Token bucket внутри процесса: `rate_per_minute` запросов в минуту, до `burst` подряд.
+
+    `reserve()` сразу забирает токен (баланс может уйти в минус) и возвращает, сколько ждать:
+    так ожидающие обслуживаются по очереди, а не гоняются за каждым новым токеном.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self) -> None:
+        """Возвращает токен запроса, который так и не был сделан."""
+
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class FileTokenBucket:
+    """Тот же token bucket, но общий для всех процессов на хосте: состояние в файле под flock."""
+
+    def __init__(self, path: str, rate_per_minute: float, burst: int, *, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._clock = clock
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _update(self, delta: float) -> float:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            with os.fdopen(os.dup(fd), "r+", encoding="utf-8") as f:
+                try:
+                    state = json.loads(f.read() or "{}")
+                except json.JSONDecodeError:
+                    state = {}
+                now = self._clock()
+                tokens = float(state.get("tokens", self.burst))
+                updated = float(state.get("updated", now))
+                tokens = min(self.burst, min(self.burst, tokens + max(0.0, now - updated) * self.rate) + delta)
+                f.seek(0)
+                f.truncate()
+                json.dump({"tokens": tokens, "updated": now}, f)
+            return tokens
+        finally:
+            os.close(fd)  # закрытие снимает flock
+
+    def reserve(self) -> float:
+        tokens = self._update(-1)
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    def refund(self) -> None:
+        self._update(1)
+
+
+class RateGovernor:
+    """Общий регулятор частоты запросов к сайту записи.
+
+    Через него проходит каждая навигация, refresh и отправка формы входа (selenium_provider).
+    Бюджет — на country_code (`RATE_LIMIT_PER_MINUTE`, `RATE_LIMITS`); с `RATE_LIMIT_DIR`
+    он общий для всех процессов на хосте. Время ожидания токенов копится в METRICS.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._config: tuple | None = None
+        self._buckets: dict[str, _Bucket | None] = {}
+
+    def configure(self, settings: Settings) -> None:
+        config = (
+            settings.rate_limit_per_minute,
+            settings.rate_limits,
+            settings.rate_limit_burst,
+            settings.rate_limit_dir,
+        )
+        with self._lock:
+            if config == self._config:
+                return
+            # Новые лимиты (в т.ч. после перезагрузки конфига) — новые корзины.
+            self._config = config
+            self._buckets = {}
+
+    def _bucket(self, country_code: str) -> _Bucket | None:
+        with self._lock:
+            if self._config is None:
+                return None
+            if country_code not in self._buckets:
+                default, per_country, burst, directory = self._config
+                rate = dict(per_country).get(country_code, default)
+                if rate <= 0:
+                    bucket = None
+                elif directory:
+                    bucket = FileTokenBucket(os.path.join(directory, f"rate-{country_code}.json"), rate, burst)
+                else:
+                    bucket = TokenBucket(rate, burst)
+                self._buckets[country_code] = bucket
+            return self._buckets[country_code]
+
+    def acquire(self, country_code: str, what: str = "request", deadline: Deadline = UNLIMITED) -> float:
+        """Ждёт своей очереди на запрос; возвращает, сколько секунд ждали."""
+
+        bucket = self._bucket(country_code)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve()
+        if wait > 0 and wait >= deadline.remaining():
+            # До своей очереди не доживём: токен возвращаем, иначе за несостоявшимся
+            # запросом встанут все следующие.
+            bucket.refund()
+            raise DeadlineExceeded(f"Превышен лимит времени проверки: очередь к сайту {wait:.0f}s ({what})")
+        METRICS.inc("rate_governor_requests")
+        if wait > 0:
+            METRICS.inc("rate_governor_waits")
+            METRICS.inc("rate_governor_wait_seconds", wait)
+            if wait >= 1:
+                logger.info("Rate limit for %s: waiting %.1fs before %s", country_code, wait, what)
+            try:
+                deadline.sleep(wait, f"rate limit ({what})")
+            except BaseException:
+                bucket.refund()
+                raise
+        return wait
+
+    def acquire_for_url(self, url: str, what: str = "request", deadline: Deadline = UNLIMITED) -> float:
+        m = _COUNTRY_RE.match(url or "")
+        if m is None:
+            return 0.0
+        return self.acquire(m["cc"], what, deadline)
+
+
+GOVERNOR = RateGovernor()
@@ -0,0 +1,148 @@
+"""Прогон записанных проверок через воркер без браузера и без Telegram.
+
+    python -m visabot.replay recording.jsonl --speed 0
+
+Запись проигрывается через настоящий `run_forever` (тики планировщика, сравнение с прошлым
+состоянием, state, outbox, уведомления подписчикам), подменена только отправка `_send_one`:
+сообщения считаются, а не уходят в Telegram. Так цифры отражают накладные расходы
+планировщика, state и уведомлений.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from unittest import mock
+
+from visabot import worker
+from visabot.config import Account, Settings
+from visabot.domain import BusyError, Slot
+from visabot.metrics import METRICS
+from visabot.outbox import deliver_outbox
+from visabot.runtime import WorkerRuntime
+from visabot.slot_providers import ReplaySlotProvider, load_recording
+
+REPLAY_CHAT_ID = "replay-subscriber"
+REPLAY_ADMIN_CHAT_ID = "replay-admin"
+
+
+def replay_settings(checks, state_dir: str) -> Settings:
+    accounts = []
+    for check in checks:
+        if all(a.key != check.key for a in accounts):
+            accounts.append(check.account())
+    primary = accounts[0]
+    return Settings(
+        visa_username=primary.visa_username,
+        visa_password=primary.visa_password,
+        country_code=primary.country_code,
+        schedule_id=primary.schedule_id,
+        facility_id=primary.facility_id,
+        # Получатели настоящие, чтобы уведомления шли полным путём; сама отправка подменяется.
+        telegram_bot_token="replay",
+        telegram_chat_ids=(REPLAY_CHAT_ID,),
+        telegram_admin_chat_id=REPLAY_ADMIN_CHAT_ID,
+        # Тики без пауз: меряем планировщик, а не интервал между проверками.
+        check_interval_seconds=0,
+        # Предохранитель пропускал бы записанные busy-проверки, и запись не кончилась бы.
+        circuit_breaker_threshold=0,
+        state_file=os.path.join(state_dir, "state.json"),
+        metrics_file=None,
+        extra_accounts=tuple(accounts[1:]),
+    )
+
+
+class _StopWhenExhausted:
+    """Останавливает run_forever, как только у какого-то аккаунта кончилась запись.
+
+    Текущий тик доходит до конца, следующий не начинается — запись не обрывается на `ReplayExhausted`.
+    """
+
+    def __init__(self, inner: ReplaySlotProvider, runtime: WorkerRuntime) -> None:
+        self.inner = inner
+        self.runtime = runtime
+        self.outcomes: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def fetch(self, settings: Settings, account: Account, browser=None) -> set[Slot]:
+        outcome = "error"
+        try:
+            slots = self.inner.fetch(settings, account, browser)
+            outcome = "ok"
+            return slots
+        except BusyError:
+            outcome = "busy"
+            raise
+        finally:
+            with self._lock:
+                self.outcomes[outcome] += 1
+            if not self.inner.remaining(account.key):
+                self.runtime.stop()
+
+
+def run_replay(path: str, *, speed: float, state_dir: str) -> dict[str, float]:
+    checks = load_recording(path)
+    if not checks:
+        raise RuntimeError(f"{path}: recording is empty")
+
+    settings = replay_settings(checks, state_dir)
+    runtime = WorkerRuntime()
+    provider = _StopWhenExhausted(ReplaySlotProvider(checks, speed=speed), runtime)
+
+    sent: Counter[str] = Counter()
+    sent_lock = threading.Lock()
+
+    def send(_settings: Settings, chat_id: str, text: str) -> None:
+        with sent_lock:
+            sent[chat_id] += 1
+
+    METRICS.reset()
+    with mock.patch.object(worker, "_send_one", send):
+        started = time.perf_counter()
+        worker.run_forever(settings, runtime, provider=provider)
+        # Поток outbox уже остановлен; дописываем то, что он не успел забрать.
+        for account in settings.accounts():
+            deliver_outbox(worker._outbox_store(settings, account, None), lambda chat_id, text: send(settings, chat_id, text))
+        elapsed = time.perf_counter() - started
+
+    replayed = sum(provider.outcomes.values())
+    return {
+        "checks": replayed,
+        "failed": provider.outcomes["error"],
+        "busy": provider.outcomes["busy"],
+        "seconds": elapsed,
+        "checks_per_second": replayed / elapsed if elapsed > 0 else float("inf"),
+        "new_slot_notifications": METRICS.get("new_slot_notifications"),
+        "messages_sent": sent[REPLAY_CHAT_ID],
+        "admin_messages_sent": sent[REPLAY_ADMIN_CHAT_ID],
+        "recorded_seconds": sum(c.duration for c in checks),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a KzVisaBot check recording without a browser")
+    parser.add_argument("recording", help="JSONL file written by main.py --record")
+    parser.add_argument("--speed", type=float, default=0.0, help="Speed factor for recorded check durations (0 = no delays)")
+    parser.add_argument("--state-dir", help="Where to keep replay state (default: a temporary directory)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+
+    if args.state_dir:
+        result = run_replay(args.recording, speed=args.speed, state_dir=args.state_dir)
+    else:
+        with tempfile.TemporaryDirectory() as state_dir:
+            result = run_replay(args.recording, speed=args.speed, state_dir=state_dir)
+
+    for name, value in result.items():
+        print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
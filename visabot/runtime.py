@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+from visabot.circuit_breaker import CircuitBreaker, CircuitState
+from visabot.domain import Slot
+
+
+@dataclass
+class AccountStatus:
+    last_check_at: float | None = None
+    last_outcome: str | None = None  # ok | busy | error | deadline
+    last_error: str | None = None
+    current_slots: set[Slot] | None = None
+
+
+@dataclass
+class WorkerRuntime:
+    """In-memory состояние работающего воркера.
+
+    Его читают команды Telegram (`/status`, `/slots`), поэтому отвечать на них можно
+    без запуска браузера. Все изменения — под одной блокировкой: воркер и поток
+    long-polling работают параллельно.
+    """
+
+    started_at: float = field(default_factory=time.time)
+    paused: bool = False
+    accounts: dict[str, AccountStatus] = field(default_factory=dict)
+    breakers: dict[str, CircuitBreaker] = field(default_factory=dict)
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _wake: threading.Event = field(default_factory=threading.Event, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, repr=False)
+    _check_now_pending: bool = False
+
+    def record_check(
+        self,
+        key: str,
+        *,
+        outcome: str,
+        slots: set[Slot] | None = None,
+        error: str | None = None,
+    ) -> None:
+        with self._lock:
+            status = self.accounts.setdefault(key, AccountStatus())
+            status.last_check_at = time.time()
+            status.last_outcome = outcome
+            status.last_error = error
+            if slots is not None:
+                status.current_slots = set(slots)
+
+    def breaker_for(self, key: str, *, failure_threshold: int, cooldown_seconds: float) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(key, failure_threshold=failure_threshold, cooldown_seconds=cooldown_seconds)
+                self.breakers[key] = breaker
+            return breaker
+
+    def breaker_states(self) -> dict[str, tuple[CircuitState, int]]:
+        """Состояние и число неудач подряд каждого предохранителя (для /status)."""
+
+        with self._lock:
+            breakers = list(self.breakers.values())
+        return {breaker.key: breaker.snapshot() for breaker in breakers}
+
+    def reset_breakers(self) -> None:
+        with self._lock:
+            self.breakers.clear()
+
+    def wake(self) -> None:
+        """Будит воркер без внеочередной проверки (например, чтобы применить новый конфиг)."""
+
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Просит run_forever выйти: текущий тик доводится до конца, новый не начинается."""
+
+        self._stop.set()
+        self._wake.set()
+
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def snapshot(self) -> dict[str, AccountStatus]:
+        with self._lock:
+            return {
+                k: AccountStatus(
+                    last_check_at=v.last_check_at,
+                    last_outcome=v.last_outcome,
+                    last_error=v.last_error,
+                    current_slots=set(v.current_slots) if v.current_slots is not None else None,
+                )
+                for k, v in self.accounts.items()
+            }
+
+    def set_paused(self, paused: bool) -> None:
+        with self._lock:
+            self.paused = paused
+
+    def is_paused(self) -> bool:
+        with self._lock:
+            return self.paused
+
+    def request_check_now(self) -> bool:
+        """Просит воркер проверить досрочно.
+
+        Запросы склеиваются: пока предыдущий не обработан, новые ничего не добавляют.
+        Возвращает True, если запрос новый.
+        """
+
+        with self._lock:
+            if self._check_now_pending:
+                return False
+            self._check_now_pending = True
+        self._wake.set()
+        return True
+
+    def wait_for_tick(self, timeout: float) -> bool:
+        """Спит до следующей проверки; True — если разбудил `/checknow`."""
+
+        self._wake.wait(timeout)
+        with self._lock:
+            requested = self._check_now_pending
+            self._check_now_pending = False
+            self._wake.clear()
+        return requested
@@ -4,6 +4,7 @@ import datetime as dt
 import os
 import shutil
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
 import logging
 
@@ -17,12 +18,12 @@ from selenium.webdriver.support.ui import WebDriverWait, Select
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.core.driver_cache import DriverCacheManager
 
-from visabot.domain import Slot, BusyError
+from visabot.deadline import UNLIMITED, Deadline
+from visabot.domain import Slot, BusyError, DeadlineExceeded, LoggedOutError, PageStructureError, SessionLostError
+from visabot.rate_governor import GOVERNOR
 
 logger = logging.getLogger(__name__)
 
-BASE_URL = "https://ais.usvisa-info.com"
-
 
 _MONTHS = {
     # English month names as used by jQuery UI datepicker
@@ -48,13 +49,13 @@ def _parse_date(day: str, month_name: str, year: str) -> dt.date:
     return dt.date(int(year), m, int(day))
 
 
-def build_sign_in_url(country_code: str) -> str:
+def build_sign_in_url(base_url: str, country_code: str) -> str:
     # e.g. ru-kz
-    return f"{BASE_URL}/{country_code}/niv/users/sign_in"
+    return f"{base_url}/{country_code}/niv/users/sign_in"
 
 
-def build_appointments_url(country_code: str, schedule_id: str) -> str:
-    return f"{BASE_URL}/{country_code}/niv/schedule/{schedule_id}/appointment"
+def build_appointments_url(base_url: str, country_code: str, schedule_id: str) -> str:
+    return f"{base_url}/{country_code}/niv/schedule/{schedule_id}/appointment"
 
 
 def _running_in_docker() -> bool:
@@ -93,7 +94,7 @@ def _ensure_wdm_cache_dir() -> str | None:
     return cache_dir
 
 
-def start_driver(*, headless: bool) -> webdriver.Chrome:
+def start_driver(*, headless: bool, user_data_dir: str | None = None) -> webdriver.Chrome:
     options = Options()
 
     # In containers there's usually no display server.
@@ -110,6 +111,9 @@ def start_driver(*, headless: bool) -> webdriver.Chrome:
     options.add_argument("--disable-setuid-sandbox")
     options.add_argument("--disable-software-rasterizer")
     options.add_argument("--window-size=1200,900")
+    # Постоянный профиль (см. browser_profile): кэш и cookies переживают перезапуск браузера.
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={user_data_dir}")
     options.add_argument("--disable-dev-shm-usage")
     # Let Chrome pick a free port (helps in some container environments)
     options.add_argument("--remote-debugging-port=0")
@@ -127,21 +131,140 @@ def start_driver(*, headless: bool) -> webdriver.Chrome:
     if chrome_bin:
         options.binary_location = chrome_bin
 
+    # chromedriver в своей сессии => его pid — pgid всей группы вместе с Chrome,
+    # и после quit() остатки можно убрать одним killpg (см. browser_processes).
+    popen_kw = {"start_new_session": True} if os.name == "posix" else {}
+
     cache_dir = _ensure_wdm_cache_dir()
     if cache_dir:
-        service = Service(ChromeDriverManager(cache_manager=DriverCacheManager(root_dir=cache_dir)).install())
+        service = Service(
+            ChromeDriverManager(cache_manager=DriverCacheManager(root_dir=cache_dir)).install(),
+            popen_kw=popen_kw,
+        )
     else:
-        service = Service(ChromeDriverManager().install())
+        service = Service(ChromeDriverManager().install(), popen_kw=popen_kw)
 
     return webdriver.Chrome(service=service, options=options)
 
 
-def log_in(driver: webdriver.Chrome, *, sign_in_url: str, username: str, password: str, wait_seconds: int = 60) -> None:
-    driver.get(sign_in_url)
+# Как у chromedriver по умолчанию; дедлайн проверки может урезать.
+_PAGE_LOAD_SECONDS = 300
+
+_POLICY_CHECKBOX_XPATH = '//*[@id="sign_in_form"]/div[3]/label/div'
+_SIGN_IN_SUBMIT_XPATH = '//*[@id="sign_in_form"]/p[1]/input'
+_FACILITY_SELECT_ID = "appointments_consulate_appointment_facility_id"
+_DATE_INPUT_ID = "appointments_consulate_appointment_date"
+_TIME_SELECT_ID = "appointments_consulate_appointment_time"
+_BUSY_CONTAINER_ID = "consulate_date_time_not_available"
+
+# Ориентиры страниц: каждый — набор альтернативных локаторов, достаточно одного.
+# Если после навигации какого-то ориентира нет, разметка сайта поменялась — ждать полные
+# таймауты и повторять шаги бессмысленно.
+_LANDMARKS: dict[str, tuple[tuple[tuple[str, str], ...], ...]] = {
+    "sign_in": (
+        ((By.NAME, "user[email]"),),
+        ((By.NAME, "user[password]"),),
+        ((By.XPATH, _POLICY_CHECKBOX_XPATH),),
+        ((By.XPATH, _SIGN_IN_SUBMIT_XPATH),),
+    ),
+    "appointments": (
+        ((By.ID, _FACILITY_SELECT_ID),),
+        (
+            (By.ID, _DATE_INPUT_ID),
+            (By.ID, _BUSY_CONTAINER_ID),
+            (By.XPATH, "//*[contains(text(), 'Система занята')]"),
+        ),
+    ),
+    "calendar": (
+        ((By.CLASS_NAME, "ui-datepicker-month"),),
+        ((By.CLASS_NAME, "ui-datepicker-year"),),
+        ((By.CLASS_NAME, "ui-datepicker-next"),),
+    ),
+}
+
+# Сколько ждать появления ориентиров после навигации (успевает пройти и проверка Cloudflare).
+_STRUCTURE_GRACE_SECONDS = 15
+
 
-    # Cloudflare/captcha can appear; this MVP just waits for the form.
-    wait = WebDriverWait(driver, wait_seconds)
-    wait.until(EC.presence_of_element_located((By.NAME, "user[email]")))
+def _wait_until(driver: webdriver.Chrome, deadline: Deadline, cap: float, condition, what: str):
+    """WebDriverWait с таймаутом min(cap, остаток дедлайна)."""
+
+    try:
+        return WebDriverWait(driver, deadline.timeout(cap, what)).until(condition)
+    except TimeoutException:
+        # Ожидание оборвал дедлайн, а не собственный лимит — это другой исход.
+        deadline.check(what)
+        raise
+
+
+def _get(driver: webdriver.Chrome, url: str, deadline: Deadline) -> None:
+    GOVERNOR.acquire_for_url(url, "navigation", deadline)
+    if deadline is not UNLIMITED:
+        driver.set_page_load_timeout(deadline.timeout(_PAGE_LOAD_SECONDS, "page load"))
+    try:
+        driver.get(url)
+    except TimeoutException:
+        deadline.check("page load")
+        raise
+
+
+def _save_snapshot(driver: webdriver.Chrome, name: str) -> str | None:
+    """Сохраняет debug_<name>_<ts>.png/html в текущую папку, возвращает префикс файлов."""
+
+    base = f"debug_{name}_{int(time.time())}"
+    try:
+        driver.save_screenshot(f"{base}.png")
+        with open(f"{base}.html", "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+    except Exception:
+        return None
+    return base
+
+
+def _missing_landmarks(driver: webdriver.Chrome, page: str) -> list[str]:
+    return [
+        " | ".join(value for _, value in alternatives)
+        for alternatives in _LANDMARKS[page]
+        if not any(driver.find_elements(by, value) for by, value in alternatives)
+    ]
+
+
+def check_page_structure(
+    driver: webdriver.Chrome,
+    page: str,
+    *,
+    grace_seconds: float = _STRUCTURE_GRACE_SECONDS,
+    deadline: Deadline = UNLIMITED,
+) -> None:
+    """Быстрая проверка «отпечатка» страницы: все ориентиры `page` на месте.
+
+    Иначе — PageStructureError со снимком страницы (не повторяется воркером).
+    """
+
+    try:
+        _wait_until(driver, deadline, grace_seconds, lambda _: not _missing_landmarks(driver, page), f"{page} page")
+    except TimeoutException:
+        missing = _missing_landmarks(driver, page)
+        if missing:
+            raise PageStructureError(page, missing, _save_snapshot(driver, f"structure_{page}")) from None
+
+
+def log_in(
+    driver: webdriver.Chrome,
+    *,
+    sign_in_url: str,
+    username: str,
+    password: str,
+    wait_seconds: int = 60,
+    deadline: Deadline = UNLIMITED,
+) -> None:
+    _get(driver, sign_in_url, deadline)
+
+    # Cloudflare/captcha can appear; this MVP just waits for the form. Не дождались — это
+    # медленная загрузка или проверка Cloudflare, обычный TimeoutException (шаг повторится).
+    _wait_until(driver, deadline, wait_seconds, EC.presence_of_element_located((By.NAME, "user[email]")), "sign-in form")
+    # Форма загрузилась — теперь отсутствие остальных ориентиров значит смену разметки.
+    check_page_structure(driver, "sign_in", grace_seconds=2, deadline=deadline)
 
     # Cookie consent sometimes appears
     try:
@@ -159,11 +282,57 @@ def log_in(driver: webdriver.Chrome, *, sign_in_url: str, username: str, passwor
     password_box.send_keys(password)
 
     # Accept privacy policy checkbox
-    driver.find_element(By.XPATH, '//*[@id="sign_in_form"]/div[3]/label/div').click()
+    driver.find_element(By.XPATH, _POLICY_CHECKBOX_XPATH).click()
     # Submit
-    driver.find_element(By.XPATH, '//*[@id="sign_in_form"]/p[1]/input').click()
+    GOVERNOR.acquire_for_url(sign_in_url, "sign-in submit", deadline)
+    driver.find_element(By.XPATH, _SIGN_IN_SUBMIT_XPATH).click()
+
+    _wait_until(driver, deadline, wait_seconds, EC.url_changes(sign_in_url), "login redirect")
+
+
+def _on_sign_in_page(driver: webdriver.Chrome) -> bool:
+    try:
+        return "/users/sign_in" in (driver.current_url or "")
+    except Exception:
+        return True
+
+
+def restore_session(
+    driver: webdriver.Chrome,
+    *,
+    sign_in_url: str,
+    cookies: list[dict],
+    deadline: Deadline = UNLIMITED,
+) -> bool:
+    """Подкладывает сохранённые cookies и проверяет, что сессия ещё жива.
+
+    Проверка дешёвая: залогиненного пользователя сайт сразу уводит со страницы
+    входа, поэтому достаточно открыть sign_in и посмотреть, куда нас отправили.
+    Возвращает False, если нужно логиниться заново.
+    """
 
-    wait.until(EC.url_changes(sign_in_url))
+    if not cookies:
+        return False
+
+    # Cookies можно ставить только для текущего домена, поэтому сначала открываем сайт.
+    _get(driver, sign_in_url, deadline)
+    restored = 0
+    for cookie in cookies:
+        # expiry из get_cookies() иногда приходит float — add_cookie его не принимает.
+        c = {k: v for k, v in cookie.items() if k in {"name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite"}}
+        if "expiry" in c:
+            c["expiry"] = int(c["expiry"])
+        try:
+            driver.add_cookie(c)
+            restored += 1
+        except Exception:
+            continue
+
+    if not restored:
+        return False
+
+    _get(driver, sign_in_url, deadline)
+    return not _on_sign_in_page(driver)
 
 
 def _busy_message_present(driver: webdriver.Chrome) -> bool:
@@ -175,7 +344,7 @@ def _busy_message_present(driver: webdriver.Chrome) -> bool:
 
     # 1) Стандартный контейнер ошибки на appointment-странице.
     try:
-        els = driver.find_elements(By.ID, "consulate_date_time_not_available")
+        els = driver.find_elements(By.ID, _BUSY_CONTAINER_ID)
         if els:
             # Если элемент существует, то ориентируемся на видимость.
             # В нормальном состоянии ("поля даты/времени показаны") этот блок присутствует, но скрыт.
@@ -193,17 +362,21 @@ def _busy_message_present(driver: webdriver.Chrome) -> bool:
     return "система занята" in text and "повторите попытку позже" in text
 
 
-def _select_facility(driver: webdriver.Chrome, *, facility_id: int, wait_seconds: int = 30) -> None:
+def _select_facility(
+    driver: webdriver.Chrome,
+    *,
+    facility_id: int,
+    wait_seconds: int = 30,
+    deadline: Deadline = UNLIMITED,
+) -> None:
     """Выбирает 'Адрес консульского отдела' (facility).
 
     Важно: на странице appointment select может быть disabled до завершения загрузки.
     """
 
-    wait = WebDriverWait(driver, wait_seconds)
-
-    select_locator = (By.ID, "appointments_consulate_appointment_facility_id")
-    wait.until(EC.presence_of_element_located(select_locator))
-    wait.until(EC.element_to_be_clickable(select_locator))
+    select_locator = (By.ID, _FACILITY_SELECT_ID)
+    _wait_until(driver, deadline, wait_seconds, EC.presence_of_element_located(select_locator), "facility select")
+    _wait_until(driver, deadline, wait_seconds, EC.element_to_be_clickable(select_locator), "facility select")
 
     select_el = driver.find_element(*select_locator)
     select = Select(select_el)  # type: ignore[arg-type]
@@ -211,7 +384,7 @@ def _select_facility(driver: webdriver.Chrome, *, facility_id: int, wait_seconds
     def _has_option(_: object) -> bool:
         return any(o.get_attribute("value") == str(facility_id) for o in select.options)
 
-    wait.until(_has_option)
+    _wait_until(driver, deadline, wait_seconds, _has_option, "facility option")
 
     try:
         if select.first_selected_option.get_attribute("value") == str(facility_id):
@@ -226,52 +399,68 @@ def _select_facility(driver: webdriver.Chrome, *, facility_id: int, wait_seconds
     )
 
 
-def fetch_available_slots(
+def _date_widgets_exist(driver: webdriver.Chrome) -> bool:
+    # Элементы могут быть в DOM, но скрыты (display:none) — нам важно именно наличие.
+    return bool(driver.find_elements(By.ID, _DATE_INPUT_ID)) and bool(driver.find_elements(By.ID, _TIME_SELECT_ID))
+
+
+def _open_datepicker_if_possible(driver: webdriver.Chrome, deadline: Deadline = UNLIMITED) -> None:
+    # Календарь часто появляется только после клика по input даты.
+    if not driver.find_elements(By.ID, _DATE_INPUT_ID):
+        return
+
+    try:
+        el = driver.find_element(By.ID, _DATE_INPUT_ID)
+        # Иногда обычный click не срабатывает из-за перекрытий/скрытия. Пробуем оба.
+        try:
+            el.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", el)
+        deadline.sleep(0.5)
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        return
+
+
+def _refresh_or_session_lost(driver: webdriver.Chrome, deadline: Deadline = UNLIMITED) -> None:
+    try:
+        GOVERNOR.acquire_for_url(driver.current_url, "refresh", deadline)
+        driver.refresh()
+    except (InvalidSessionIdException, WebDriverException) as e:
+        raise SessionLostError("Сессия браузера упала во время refresh (DevTools disconnect)") from e
+
+
+def open_appointments_calendar(
     driver: webdriver.Chrome,
     *,
     appointments_url: str,
     facility_id: int,
-    months_ahead: int = 6,
     wait_seconds: int = 60,
     max_refresh_attempts: int = 5,
-) -> set[Slot]:
-    if max_refresh_attempts < 1:
-        raise ValueError("max_refresh_attempts must be >= 1")
+    deadline: Deadline = UNLIMITED,
+) -> None:
+    """Открывает страницу записи, выбирает консульство и раскрывает календарь.
 
-    driver.get(appointments_url)
-
-    wait = WebDriverWait(driver, wait_seconds)
-
-    date_input_id = "appointments_consulate_appointment_date"
-    time_select_id = "appointments_consulate_appointment_time"
-
-    def _date_widgets_exist() -> bool:
-        # Элементы могут быть в DOM, но скрыты (display:none) — нам важно именно наличие.
-        return bool(driver.find_elements(By.ID, date_input_id)) and bool(driver.find_elements(By.ID, time_select_id))
+    Бросает BusyError, если сайт так и не перестал отвечать "система занята",
+    и LoggedOutError, если сайт отправил нас на страницу входа (сессия протухла).
+    """
 
-    def _open_datepicker_if_possible() -> None:
-        # Календарь часто появляется только после клика по input даты.
-        if not driver.find_elements(By.ID, date_input_id):
-            return
+    if max_refresh_attempts < 1:
+        raise ValueError("max_refresh_attempts must be >= 1")
 
-        try:
-            el = driver.find_element(By.ID, date_input_id)
-            # Иногда обычный click не срабатывает из-за перекрытий/скрытия. Пробуем оба.
-            try:
-                el.click()
-            except Exception:
-                driver.execute_script("arguments[0].click();", el)
-            time.sleep(0.5)
-        except Exception:
-            return
+    _get(driver, appointments_url, deadline)
+    if _on_sign_in_page(driver):
+        raise LoggedOutError("Сайт перенаправил на страницу входа: сессия больше не авторизована")
+    check_page_structure(driver, "appointments", deadline=deadline)
 
     def _calendar_or_busy(_: object) -> bool:
         if _busy_message_present(driver):
             return True
         if driver.find_elements(By.CLASS_NAME, "ui-datepicker-group"):
             return True
-        if _date_widgets_exist():
-            _open_datepicker_if_possible()
+        if _date_widgets_exist(driver):
+            _open_datepicker_if_possible(driver, deadline)
             return bool(driver.find_elements(By.CLASS_NAME, "ui-datepicker-group"))
         return False
 
@@ -279,19 +468,13 @@ def fetch_available_slots(
     # Если busy — обновляем страницу и повторяем.
     for attempt in range(1, max_refresh_attempts + 1):
         try:
-            _select_facility(driver, facility_id=facility_id, wait_seconds=min(30, wait_seconds))
+            _select_facility(driver, facility_id=facility_id, wait_seconds=min(30, wait_seconds), deadline=deadline)
 
             # Ждём, пока появятся либо календарь, либо busy, либо хотя бы элементы даты/времени.
             try:
-                wait.until(_calendar_or_busy)
+                _wait_until(driver, deadline, wait_seconds, _calendar_or_busy, "calendar or busy message")
             except TimeoutException:
-                ts = int(time.time())
-                try:
-                    driver.save_screenshot(f"debug_appointments_{ts}.png")
-                    with open(f"debug_appointments_{ts}.html", "w", encoding="utf-8") as f:
-                        f.write(driver.page_source)
-                except Exception:
-                    pass
+                _save_snapshot(driver, "appointments")
                 raise RuntimeError(
                     "Не дождались календаря/busy и не нашли элементы даты/времени. Сохранил debug_appointments_*.png/html в корень проекта."
                 )
@@ -300,49 +483,40 @@ def fetch_available_slots(
                 break
 
             if _busy_message_present(driver):
-                time.sleep(min(10, 2 * attempt))
+                deadline.sleep(min(10, 2 * attempt), "busy back-off")
                 logger.info(
                     "Refreshing appointments page (attempt %s/%s, reason=busy_message)",
                     attempt,
                     max_refresh_attempts,
                 )
-                try:
-                    driver.refresh()
-                except (InvalidSessionIdException, WebDriverException) as e:
-                    raise RuntimeError("Сессия браузера упала во время refresh (DevTools disconnect)") from e
+                _refresh_or_session_lost(driver, deadline)
                 continue
 
             # Элементы даты/времени есть, но календарь не открылся — дадим шанс ещё раз.
-            if _date_widgets_exist():
-                _open_datepicker_if_possible()
+            if _date_widgets_exist(driver):
+                _open_datepicker_if_possible(driver, deadline)
                 if driver.find_elements(By.CLASS_NAME, "ui-datepicker-group"):
                     break
 
-                time.sleep(1)
+                deadline.sleep(1)
                 logger.info(
                     "Refreshing appointments page (attempt %s/%s, reason=datepicker_not_opened)",
                     attempt,
                     max_refresh_attempts,
                 )
-                try:
-                    driver.refresh()
-                except (InvalidSessionIdException, WebDriverException) as e:
-                    raise RuntimeError("Сессия браузера упала во время refresh (DevTools disconnect)") from e
+                _refresh_or_session_lost(driver, deadline)
                 continue
 
-            time.sleep(1)
+            deadline.sleep(1)
             logger.info(
                 "Refreshing appointments page (attempt %s/%s, reason=calendar_not_found)",
                 attempt,
                 max_refresh_attempts,
             )
-            try:
-                driver.refresh()
-            except (InvalidSessionIdException, WebDriverException) as e:
-                raise RuntimeError("Сессия браузера упала во время refresh (DevTools disconnect)") from e
+            _refresh_or_session_lost(driver, deadline)
 
         except (InvalidSessionIdException, WebDriverException) as e:
-            raise RuntimeError("Сессия Selenium оборвалась (not connected to DevTools)") from e
+            raise SessionLostError("Сессия Selenium оборвалась (not connected to DevTools)") from e
 
     if _busy_message_present(driver):
         raise BusyError("Сайт вернул сообщение 'Система занята. Пожалуйста, повторите попытку позже'.")
@@ -352,10 +526,42 @@ def fetch_available_slots(
             "Календарь не найден. Ожидали, что откроется после выбора консульства и клика по полю даты (appointments_consulate_appointment_date)."
         )
 
-    slots: set[Slot] = set()
 
-    current_month_index = 0
-    while current_month_index < months_ahead:
+@dataclass
+class CalendarProgress:
+    """Сколько месяцев уже прочитано — чтобы повтор чтения продолжил, а не начал заново."""
+
+    months_read: int = 0
+    slots: set[Slot] = field(default_factory=set)
+
+
+def read_calendar(
+    driver: webdriver.Chrome,
+    *,
+    facility_id: int,
+    months_ahead: int = 6,
+    progress: CalendarProgress | None = None,
+    deadline: Deadline = UNLIMITED,
+) -> set[Slot]:
+    """Читает свободные даты из уже открытого jQuery UI datepicker, листая месяцы вперёд."""
+
+    progress = progress if progress is not None else CalendarProgress()
+
+    if not driver.find_elements(By.CLASS_NAME, "ui-datepicker-group"):
+        # Календарь мог закрыться (например, после неудачного клика) — откроем снова.
+        _open_datepicker_if_possible(driver, deadline)
+        if not driver.find_elements(By.CLASS_NAME, "ui-datepicker-group"):
+            raise RuntimeError("Календарь закрылся и не открывается повторно")
+        if progress.months_read:
+            # Заново открытый календарь показывает первый месяц: листаем с начала, иначе
+            # последние месяцы молча не дочитаются. Уже найденные даты остаются.
+            logger.info("Calendar was reopened at the first month, re-reading %d months", progress.months_read)
+            progress.months_read = 0
+
+    # Календарь открыт — без месяца/года/«вперёд» прочитать его всё равно не выйдет.
+    check_page_structure(driver, "calendar", grace_seconds=2, deadline=deadline)
+
+    while progress.months_read < months_ahead:
         date_pickers = driver.find_elements(By.CLASS_NAME, "ui-datepicker-group")
         if not date_pickers:
             break
@@ -368,20 +574,51 @@ def fetch_available_slots(
                 for day in days:
                     day_text = day.find_element(By.CLASS_NAME, "ui-state-default").text
                     d = _parse_date(day_text, month, year)
-                    slots.add(Slot(date_iso=d.isoformat(), facility_id=facility_id))
+                    progress.slots.add(Slot(date_iso=d.isoformat(), facility_id=facility_id))
             except Exception:
                 continue
 
         # Next month
         try:
-            next_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CLASS_NAME, "ui-datepicker-next"))
+            next_button = _wait_until(
+                driver, deadline, 10, EC.element_to_be_clickable((By.CLASS_NAME, "ui-datepicker-next")), "next month"
             )
             next_button.click()
-            time.sleep(0.7)
+            deadline.sleep(0.7)
         except (TimeoutException, NoSuchElementException):
             break
 
-        current_month_index += 1
+        progress.months_read += 1
+
+    return set(progress.slots)
+
+
+def fetch_available_slots(
+    driver: webdriver.Chrome,
+    *,
+    appointments_url: str,
+    facility_id: int,
+    months_ahead: int = 6,
+    wait_seconds: int = 60,
+    max_refresh_attempts: int = 5,
+    deadline: Deadline = UNLIMITED,
+) -> set[Slot]:
+    open_appointments_calendar(
+        driver,
+        appointments_url=appointments_url,
+        facility_id=facility_id,
+        wait_seconds=wait_seconds,
+        max_refresh_attempts=max_refresh_attempts,
+        deadline=deadline,
+    )
+    return read_calendar(driver, facility_id=facility_id, months_ahead=months_ahead, deadline=deadline)
+
+
+def session_is_alive(driver: webdriver.Chrome) -> bool:
+    """True, если браузер и chromedriver ещё отвечают (дешёвый round-trip без навигации)."""
 
-    return slots
+    try:
+        driver.current_window_handle
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any
+
+# Сохранённая сессия живёт ограниченное время: сайт всё равно протухает сессии,
+# а старые cookies только добавляют лишний "пустой" заход перед реальным логином.
+DEFAULT_MAX_AGE_SECONDS = 12 * 60 * 60
+
+
+def _owner_fingerprint(username: str) -> str:
+    # Логин в файл не пишем: храним только хэш, чтобы не подхватить чужую сессию
+    # после смены VISA_USERNAME.
+    return hashlib.sha256(username.encode("utf-8")).hexdigest()
+
+
+def load_cookies(path: str, *, username: str, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> list[dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        # Битый файл сессии — не проблема, просто залогинимся заново.
+        return []
+
+    if not isinstance(raw, dict) or raw.get("owner") != _owner_fingerprint(username):
+        return []
+
+    try:
+        saved_at = float(raw.get("saved_at", 0))
+    except (TypeError, ValueError):
+        return []
+    if time.time() - saved_at > max_age_seconds:
+        return []
+
+    cookies = raw.get("cookies", [])
+    if not isinstance(cookies, list):
+        return []
+    return [c for c in cookies if isinstance(c, dict) and "name" in c and "value" in c]
+
+
+def save_cookies(path: str, cookies: list[dict[str, Any]], *, username: str) -> None:
+    data = {
+        "owner": _owner_fingerprint(username),
+        "saved_at": time.time(),
+        "cookies": cookies,
+    }
+
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    # Atomic write. Cookies == доступ к личному кабинету, поэтому файл только для владельца.
+    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8", dir=folder, suffix=".tmp") as tf:
+        os.chmod(tf.name, 0o600)
+        json.dump(data, tf, ensure_ascii=False)
+        tmp_name = tf.name
+
+    os.replace(tmp_name, path)
+
+
+def clear_cookies(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from visabot.browser_processes import BrowserProcessTracker
+from visabot.selenium_provider import session_is_alive, start_driver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Context:
+    browser_context_id: str
+    handle: str
+    logged_in: bool = False
+
+
+class SharedBrowser:
+    """Один Chrome на несколько аккаунтов.
+
+    Каждый аккаунт получает свой browser context (как отдельное инкогнито-окно:
+    свои cookies, localStorage и кэш) через CDP `Target.createBrowserContext` и своё окно в нём.
+    Проверки идут по очереди из одного потока воркера: перед проверкой драйвер переключается
+    на окно аккаунта (`acquire`), после — страница сбрасывается на about:blank (`release`).
+    Cookies контекста живут между проверками, поэтому после первого логина (`mark_logged_in`)
+    проверка сразу открывает календарь и логинится заново, только если сайт её выкинул.
+
+    Сбой одного аккаунта локализуется: после неудачной проверки или разросшейся JS-куче
+    его контекст уничтожается и при следующей проверке создаётся заново; весь браузер
+    перезапускается, только если перестал отвечать chromedriver.
+    """
+
+    def __init__(
+        self,
+        *,
+        headless: bool,
+        max_heap_mb: int = 256,
+        tracker: BrowserProcessTracker | None = None,
+        start: Callable[..., object] = start_driver,
+    ) -> None:
+        self.headless = headless
+        self.max_heap_mb = max_heap_mb
+        self._tracker = tracker
+        self._start = start
+        self._driver = None
+        self._pgid: int | None = None
+        self._contexts: dict[str, _Context] = {}
+        self.restarts = 0
+
+    @property
+    def contexts(self) -> int:
+        return len(self._contexts)
+
+    def acquire(self, key: str):
+        """Драйвер, переключённый на окно аккаунта `key` (контекст создаётся при необходимости)."""
+
+        if self._driver is None or not session_is_alive(self._driver):
+            self._restart()
+
+        context = self._contexts.get(key)
+        if context is not None and context.handle not in self._driver.window_handles:
+            logger.warning("Browser context of %s is gone, creating a new one", key)
+            self._contexts.pop(key, None)
+            context = None
+        if context is None:
+            context = self._contexts[key] = self._open_context()
+            logger.info("Opened browser context for %s (%d in total)", key, len(self._contexts))
+
+        self._driver.switch_to.window(context.handle)
+        return self._driver
+
+    def logged_in(self, key: str) -> bool:
+        context = self._contexts.get(key)
+        return context is not None and context.logged_in
+
+    def mark_logged_in(self, key: str) -> None:
+        context = self._contexts.get(key)
+        if context is not None:
+            context.logged_in = True
+
+    def release(self, key: str, *, healthy: bool) -> None:
+        if self._driver is None or key not in self._contexts:
+            return
+        if not healthy:
+            logger.info("Disposing browser context of %s after a failed check", key)
+            self.dispose(key)
+            return
+
+        heap_mb = self._heap_mb()
+        if heap_mb is not None and heap_mb > self.max_heap_mb:
+            logger.warning("Browser context of %s uses %.0f MiB of JS heap, recycling it", key, heap_mb)
+            self.dispose(key)
+            return
+
+        try:
+            # Страница с календарём держит таймеры и XHR; в простое окну ничего не нужно.
+            self._driver.get("about:blank")
+        except Exception:
+            logger.warning("Failed to blank the window of %s, disposing its context", key)
+            self.dispose(key)
+
+    def dispose(self, key: str) -> None:
+        context = self._contexts.pop(key, None)
+        if context is None or self._driver is None:
+            return
+        try:
+            self._driver.execute_cdp_cmd(
+                "Target.disposeBrowserContext",
+                {"browserContextId": context.browser_context_id},
+            )
+        except Exception as e:
+            logger.warning("Failed to dispose browser context of %s (%s: %s)", key, type(e).__name__, e)
+        self._switch_to_any_window()
+
+    def close(self) -> None:
+        driver, self._driver = self._driver, None
+        self._contexts.clear()
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                logger.warning("Failed to quit shared browser cleanly", exc_info=True)
+        if self._tracker is not None:
+            self._tracker.release(self._pgid)
+        self._pgid = None
+
+    def _restart(self) -> None:
+        if self._driver is not None:
+            logger.warning("Shared browser is not responding, restarting it (%d contexts lost)", len(self._contexts))
+            self.restarts += 1
+        self.close()
+
+        logger.info("Starting shared browser (headless=%s)", self.headless)
+        self._driver = self._start(headless=self.headless)
+        if self._tracker is not None:
+            self._pgid = self._tracker.register(self._driver)
+
+    def _open_context(self) -> _Context:
+        driver = self._driver
+        before = set(driver.window_handles)
+        browser_context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {"disposeOnDetach": False})[
+            "browserContextId"
+        ]
+        target_id = driver.execute_cdp_cmd(
+            "Target.createTarget",
+            {"url": "about:blank", "browserContextId": browser_context_id, "newWindow": True},
+        )["targetId"]
+
+        # В chromedriver handle окна совпадает с targetId; на всякий случай ищем и по разнице.
+        handles = driver.window_handles
+        if target_id in handles:
+            handle = target_id
+        else:
+            new = [h for h in handles if h not in before]
+            if not new:
+                raise RuntimeError("Не удалось найти окно нового browser context")
+            handle = new[0]
+        return _Context(browser_context_id=browser_context_id, handle=handle)
+
+    def _heap_mb(self) -> float | None:
+        try:
+            used = self._driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null"
+            )
+        except Exception:
+            return None
+        return used / 2**20 if isinstance(used, (int, float)) else None
+
+    def _switch_to_any_window(self) -> None:
+        # После закрытия контекста текущее окно могло исчезнуть; переключаемся на живое,
+        # чтобы проверка session_is_alive не приняла это за смерть всего браузера.
+        try:
+            handles = self._driver.window_handles
+            if handles:
+                self._driver.switch_to.window(handles[0])
+        except Exception:
+            pass
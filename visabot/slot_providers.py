@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Protocol
+
+from visabot.config import Account, Settings
+from visabot.domain import BusyError, Slot
+from visabot.facility_cache import FacilityCache
+
+if TYPE_CHECKING:
+    from visabot.shared_browser import SharedBrowser
+
+logger = logging.getLogger(__name__)
+
+
+class SlotProvider(Protocol):
+    """Источник слотов для воркера: одна проверка одного аккаунта.
+
+    Возвращает текущие слоты или бросает `BusyError` (сайт занят) / любую другую ошибку
+    (проверка не удалась) — ровно так, как это делает Selenium-провайдер.
+    """
+
+    def fetch(self, settings: Settings, account: Account, browser: SharedBrowser | None = None) -> set[Slot]: ...
+
+
+class ReplayExhausted(RuntimeError):
+    """В записи больше нет проверок для этого аккаунта."""
+
+
+@dataclass(frozen=True)
+class RecordedCheck:
+    key: str
+    country_code: str
+    schedule_id: str
+    facility_id: int
+    outcome: str  # ok | busy | error
+    duration: float
+    at: float
+    slots: tuple[Slot, ...] = ()
+    error: str | None = None
+
+    def account(self) -> Account:
+        return Account(
+            visa_username="replay",
+            visa_password="",
+            country_code=self.country_code,
+            schedule_id=self.schedule_id,
+            facility_id=self.facility_id,
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "key": self.key,
+            "country_code": self.country_code,
+            "schedule_id": self.schedule_id,
+            "facility_id": self.facility_id,
+            "outcome": self.outcome,
+            "duration": round(self.duration, 3),
+            "at": self.at,
+            "slots": [[s.date_iso, s.facility_id] for s in sorted(self.slots)],
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> RecordedCheck:
+        return cls(
+            key=str(data["key"]),
+            country_code=str(data["country_code"]),
+            schedule_id=str(data["schedule_id"]),
+            facility_id=int(data["facility_id"]),
+            outcome=str(data["outcome"]),
+            duration=float(data.get("duration", 0.0)),
+            at=float(data.get("at", 0.0)),
+            slots=tuple(Slot(date_iso=str(d), facility_id=int(f)) for d, f in data.get("slots", [])),
+            error=data.get("error"),
+        )
+
+
+def load_recording(path: str) -> list[RecordedCheck]:
+    checks: list[RecordedCheck] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                checks.append(RecordedCheck.from_json(json.loads(line)))
+            except (ValueError, KeyError, TypeError) as e:
+                raise RuntimeError(f"{path}:{lineno}: invalid recorded check ({e})") from e
+    return checks
+
+
+class RecordingSlotProvider:
+    """Обёртка над настоящим провайдером: дописывает каждую проверку в JSONL.
+
+    Пишется исход проверки (слоты / «система занята» / ошибка) и её длительность, но не сама
+    страница: воспроизведение идёт на уровне провайдера, без браузера, и HTML ему не нужен.
+    """
+
+    def __init__(self, inner: SlotProvider, path: str) -> None:
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def fetch(self, settings: Settings, account: Account, browser: SharedBrowser | None = None) -> set[Slot]:
+        started_at, started = time.time(), time.monotonic()
+        outcome, slots, error = "error", set(), None
+        try:
+            slots = self.inner.fetch(settings, account, browser)
+            outcome = "ok"
+            return slots
+        except BusyError as e:
+            outcome, error = "busy", str(e)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._append(
+                RecordedCheck(
+                    key=account.key,
+                    country_code=account.country_code,
+                    schedule_id=account.schedule_id,
+                    facility_id=account.facility_id,
+                    outcome=outcome,
+                    duration=time.monotonic() - started,
+                    at=started_at,
+                    slots=tuple(slots),
+                    error=error,
+                )
+            )
+
+    def _append(self, check: RecordedCheck) -> None:
+        folder = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(check.to_json(), ensure_ascii=False) + "\n")
+
+
+class CachedSlotProvider:
+    """Обёртка над провайдером: один прочитанный календарь консульства на все аккаунты с ним.
+
+    Аккаунты с тем же (country_code, facility_id) в пределах TTL получают слоты из
+    `FacilityCache`; поиск новых дат, state и уведомления остаются у каждого аккаунта свои.
+    `on_hit(account)` вызывается, когда браузер аккаунту не понадобился.
+    """
+
+    def __init__(
+        self,
+        inner: SlotProvider,
+        cache: FacilityCache,
+        *,
+        on_hit: Callable[[Account], None] | None = None,
+    ) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.on_hit = on_hit
+
+    def fetch(self, settings: Settings, account: Account, browser: SharedBrowser | None = None) -> set[Slot]:
+        fetched = False
+
+        def fetch_inner() -> set[Slot]:
+            nonlocal fetched
+            fetched = True
+            return self.inner.fetch(settings, account, browser)
+
+        slots = self.cache.get_or_fetch((account.country_code, account.facility_id), fetch_inner)
+        if not fetched and self.on_hit is not None:
+            self.on_hit(account)
+        return slots
+
+
+class ReplaySlotProvider:
+    """Проигрывает записанные проверки по аккаунтам, в записанном порядке.
+
+    `speed` масштабирует длительность проверок: 1 — как в жизни, 10 — в десять раз быстрее,
+    0 — без пауз (для замеров пропускной способности планировщика, state и уведомлений).
+    """
+
+    def __init__(self, checks: list[RecordedCheck], *, speed: float = 1.0, sleep=time.sleep) -> None:
+        if speed < 0:
+            raise RuntimeError("Replay speed must be >= 0")
+        self.speed = speed
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._queues: dict[str, deque[RecordedCheck]] = {}
+        for check in checks:
+            self._queues.setdefault(check.key, deque()).append(check)
+
+    @classmethod
+    def from_file(cls, path: str, *, speed: float = 1.0) -> ReplaySlotProvider:
+        return cls(load_recording(path), speed=speed)
+
+    def remaining(self, key: str | None = None) -> int:
+        """Сколько проверок осталось: всего или у аккаунта `key`."""
+
+        with self._lock:
+            if key is not None:
+                return len(self._queues.get(key, ()))
+            return sum(len(q) for q in self._queues.values())
+
+    def fetch(self, settings: Settings, account: Account, browser: SharedBrowser | None = None) -> set[Slot]:
+        with self._lock:
+            queue = self._queues.get(account.key)
+            if not queue:
+                raise ReplayExhausted(f"No recorded checks left for {account.key}")
+            check = queue.popleft()
+
+        if self.speed > 0 and check.duration > 0:
+            self._sleep(check.duration / self.speed)
+
+        if check.outcome == "ok":
+            return set(check.slots)
+        if check.outcome == "busy":
+            raise BusyError(check.error or "busy")
+        raise RuntimeError(check.error or "recorded check failed")
@@ -0,0 +1,271 @@
+"""Статистика жизни слотов: когда появляются, сколько живут, с какой задержкой мы их видим.
+
+Каждая успешная проверка сравнивается с предыдущей: появившиеся и исчезнувшие даты пишутся
+в журнал событий (JSONL), а агрегаты (гистограмма времени жизни, появления по часам и дням
+недели, оценка задержки обнаружения) обновляются инкрементально в небольшом JSON-файле.
+Отчёт читает только агрегаты, поэтому не замедляется на месяцах данных.
+
+    python -m visabot.slot_stats                      # отчёт по SLOT_STATS_FILE
+    python -m visabot.slot_stats --rebuild-from slot_events.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from visabot.domain import Slot
+
+# Границы корзин времени жизни (секунды); последняя корзина — всё, что дольше недели.
+LIFETIME_BUCKETS: tuple[float, ...] = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400)
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def _slot_id(key: str, slot: Slot) -> str:
+    return f"{key}|{slot.date_iso}|{slot.facility_id}"
+
+
+def _bucket_label(i: int) -> str:
+    def fmt(seconds: float) -> str:
+        if seconds >= 86400:
+            return f"{seconds / 86400:g}d"
+        if seconds >= 3600:
+            return f"{seconds / 3600:g}h"
+        return f"{seconds / 60:g}m"
+
+    if i == 0:
+        return f"< {fmt(LIFETIME_BUCKETS[0])}"
+    if i == len(LIFETIME_BUCKETS):
+        return f">= {fmt(LIFETIME_BUCKETS[-1])}"
+    return f"{fmt(LIFETIME_BUCKETS[i - 1])}-{fmt(LIFETIME_BUCKETS[i])}"
+
+
+@dataclass
+class SlotStats:
+    """Инкрементальные агрегаты по событиям появления/исчезновения слотов.
+
+    Момент появления известен с точностью до интервала между проверками
+    (`appeared_after` — предыдущая проверка, `first_seen` — текущая), исчезновения — так же.
+    Время жизни считается между серединами этих интервалов; слоты, увиденные первой же
+    проверкой аккаунта, в распределение не попадают (когда они появились, неизвестно).
+    """
+
+    last_check_at: dict[str, float] = field(default_factory=dict)
+    open_slots: dict[str, dict] = field(default_factory=dict)
+    lifetime_buckets: list[int] = field(default_factory=lambda: [0] * (len(LIFETIME_BUCKETS) + 1))
+    lifetime_count: int = 0
+    lifetime_sum: float = 0.0
+    appeared: int = 0
+    disappeared: int = 0
+    by_hour: list[int] = field(default_factory=lambda: [0] * 24)
+    by_weekday: list[int] = field(default_factory=lambda: [0] * 7)
+    detection_delay_sum: float = 0.0
+    detection_delay_max: float = 0.0
+    detection_delay_count: int = 0
+
+    def observe(self, key: str, previous: Iterable[Slot], current: Iterable[Slot], now: float) -> list[dict]:
+        """Учитывает результат проверки аккаунта `key`, возвращает новые события для журнала."""
+
+        previous, current = set(previous), set(current)
+        prev_check = self.last_check_at.get(key)
+        self.last_check_at[key] = now
+        events: list[dict] = []
+
+        for slot in sorted(current - previous):
+            self.open_slots[_slot_id(key, slot)] = {"first_seen": now, "appeared_after": prev_check}
+            event = {"event": "appeared", "at": now, "key": key, "date": slot.date_iso, "facility_id": slot.facility_id}
+            event["appeared_after"] = prev_check
+            events.append(event)
+            self._count_appearance(now, prev_check)
+
+        for slot in sorted(previous - current):
+            opened = self.open_slots.pop(_slot_id(key, slot), None)
+            event = {"event": "disappeared", "at": now, "key": key, "date": slot.date_iso, "facility_id": slot.facility_id}
+            event["last_seen"] = prev_check
+            if opened is not None:
+                event["first_seen"] = opened["first_seen"]
+                event["appeared_after"] = opened["appeared_after"]
+            events.append(event)
+            self._count_disappearance(now, prev_check, opened)
+
+        return events
+
+    def apply_event(self, event: dict) -> None:
+        """То же, что observe(), но по записи журнала (для пересборки агрегатов)."""
+
+        slot_id = _slot_id(event["key"], Slot(date_iso=event["date"], facility_id=int(event["facility_id"])))
+        now = float(event["at"])
+        self.last_check_at[event["key"]] = max(now, self.last_check_at.get(event["key"], 0.0))
+        if event["event"] == "appeared":
+            self.open_slots[slot_id] = {"first_seen": now, "appeared_after": event.get("appeared_after")}
+            self._count_appearance(now, event.get("appeared_after"))
+        else:
+            opened = self.open_slots.pop(slot_id, None)
+            self._count_disappearance(now, event.get("last_seen"), opened)
+
+    def _count_appearance(self, now: float, prev_check: float | None) -> None:
+        self.appeared += 1
+        if prev_check is None:
+            return
+        # Слот появился где-то между проверками; при равномерном распределении в среднем
+        # мы видим его через половину интервала, в худшем случае — через весь интервал.
+        gap = max(0.0, now - prev_check)
+        self.detection_delay_sum += gap / 2
+        self.detection_delay_max = max(self.detection_delay_max, gap)
+        self.detection_delay_count += 1
+
+        local = time.localtime(prev_check + gap / 2)
+        self.by_hour[local.tm_hour] += 1
+        self.by_weekday[local.tm_wday] += 1
+
+    def _count_disappearance(self, now: float, last_seen: float | None, opened: dict | None) -> None:
+        self.disappeared += 1
+        if opened is None or opened.get("appeared_after") is None or last_seen is None:
+            return
+        born = (opened["appeared_after"] + opened["first_seen"]) / 2
+        died = (last_seen + now) / 2
+        lifetime = max(0.0, died - born)
+
+        i = 0
+        while i < len(LIFETIME_BUCKETS) and lifetime >= LIFETIME_BUCKETS[i]:
+            i += 1
+        self.lifetime_buckets[i] += 1
+        self.lifetime_count += 1
+        self.lifetime_sum += lifetime
+
+    def lifetime_quantile(self, q: float) -> float | None:
+        """Приближённый квантиль времени жизни (верхняя граница корзины)."""
+
+        if self.lifetime_count == 0:
+            return None
+        target = q * self.lifetime_count
+        seen = 0
+        for i, n in enumerate(self.lifetime_buckets):
+            seen += n
+            if seen >= target and n:
+                return LIFETIME_BUCKETS[i] if i < len(LIFETIME_BUCKETS) else float("inf")
+        return float("inf")
+
+    def report(self) -> str:
+        lines = [
+            f"Slots appeared: {self.appeared}, disappeared: {self.disappeared}, currently open: {len(self.open_slots)}",
+        ]
+        if self.lifetime_count:
+            mean = self.lifetime_sum / self.lifetime_count
+            lines.append(
+                f"Lifetime ({self.lifetime_count} slots): mean {mean / 60:.1f} min, "
+                f"median <= {_fmt_seconds(self.lifetime_quantile(0.5))}, p90 <= {_fmt_seconds(self.lifetime_quantile(0.9))}"
+            )
+            for i, n in enumerate(self.lifetime_buckets):
+                if n:
+                    lines.append(f"  {_bucket_label(i):>12}: {n:6d} {'#' * max(1, round(40 * n / self.lifetime_count))}")
+        else:
+            lines.append("Lifetime: no completed observations yet")
+
+        if self.detection_delay_count:
+            lines.append(
+                f"Detection delay: mean ~{self.detection_delay_sum / self.detection_delay_count / 60:.1f} min, "
+                f"worst {self.detection_delay_max / 60:.1f} min"
+            )
+        if any(self.by_hour):
+            lines.append("Appearances by hour: " + " ".join(f"{h:02d}:{n}" for h, n in enumerate(self.by_hour) if n))
+            lines.append("Appearances by weekday: " + " ".join(f"{_WEEKDAYS[d]}:{n}" for d, n in enumerate(self.by_weekday) if n))
+        return "\n".join(lines)
+
+    def to_json(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_json(cls, data: dict) -> SlotStats:
+        stats = cls()
+        for name, value in data.items():
+            if hasattr(stats, name):
+                setattr(stats, name, value)
+        if len(stats.lifetime_buckets) != len(LIFETIME_BUCKETS) + 1:
+            # Границы корзин поменялись — гистограмму можно только пересобрать из журнала.
+            stats.lifetime_buckets = [0] * (len(LIFETIME_BUCKETS) + 1)
+        return stats
+
+
+def _fmt_seconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    if seconds == float("inf"):
+        return "inf"
+    return f"{seconds / 60:g} min"
+
+
+def load_stats(path: str) -> SlotStats:
+    if not os.path.exists(path):
+        return SlotStats()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return SlotStats()
+    return SlotStats.from_json(raw) if isinstance(raw, dict) else SlotStats()
+
+
+def save_stats(path: str, stats: SlotStats) -> None:
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    # Atomic write
+    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8", dir=folder, suffix=".tmp") as tf:
+        json.dump(stats.to_json(), tf)
+        tmp_name = tf.name
+
+    os.replace(tmp_name, path)
+
+
+def append_events(path: str, events: list[dict]) -> None:
+    if not events:
+        return
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def rebuild_stats(events_path: str) -> SlotStats:
+    stats = SlotStats()
+    with open(events_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                stats.apply_event(json.loads(line))
+    return stats
+
+
+def main() -> int:
+    from visabot.config import load_settings
+
+    parser = argparse.ArgumentParser(description="KzVisaBot slot lifetime report")
+    parser.add_argument("--stats", help="Aggregates file (default: SLOT_STATS_FILE from settings)")
+    parser.add_argument("--rebuild-from", metavar="EVENTS", help="Recompute aggregates from a slot events JSONL file")
+    args = parser.parse_args()
+
+    stats_path = args.stats or load_settings().slot_stats_file
+    if args.rebuild_from:
+        stats = rebuild_stats(args.rebuild_from)
+        if stats_path:
+            save_stats(stats_path, stats)
+    elif stats_path:
+        stats = load_stats(stats_path)
+    else:
+        raise RuntimeError("Slot statistics are disabled (SLOT_STATS_FILE is empty)")
+
+    print(stats.report())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,278 @@
+"""Локальная подмена ais.usvisa-info.com для нагрузочных тестов.
+
+Отдаёт те же элементы, что ищет selenium_provider: форму входа, страницу записи с выбором
+консульства, полями даты/времени, блоком «Система занята» и календарём с разметкой jQuery UI
+datepicker (без самого jQuery — сайт работает офлайн). Задержка ответа и доля «занятых»
+страниц настраиваются; свободные даты меняются со временем, как на живом сайте.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import html
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+_SESSION_COOKIE = "_yatri_session"
+
+_SIGN_IN_RE = re.compile(r"^/(?P<cc>[\w-]+)/niv/users/sign_in$")
+_ACCOUNT_RE = re.compile(r"^/(?P<cc>[\w-]+)/niv/account$")
+_APPOINTMENT_RE = re.compile(r"^/(?P<cc>[\w-]+)/niv/schedule/(?P<schedule>\w+)/appointment$")
+
+_SIGN_IN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Sign in</title></head>
+<body>
+<form id="sign_in_form" method="post" action="{action}">
+  <div><input type="email" name="user[email]"></div>
+  <div><input type="password" name="user[password]"></div>
+  <div><label><div class="icheckbox"><input type="checkbox" name="policy_confirmed" value="1"></div></label></div>
+  <p><input type="submit" name="commit" value="Sign In"></p>
+</form>
+</body></html>
+"""
+
+# Календарь рисуется тем же DOM, что у jQuery UI: .ui-datepicker-group с месяцем/годом и
+# td[data-handler=selectDay] > a.ui-state-default для свободных дней; .ui-datepicker-next листает.
+_APPOINTMENT_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Schedule appointment</title>
+<style>.hidden {{ display: none; }}</style></head>
+<body>
+<div id="consulate_date_time_not_available" class="{busy_class}">
+  Система занята. Пожалуйста, повторите попытку позже.
+</div>
+<select id="appointments_consulate_appointment_facility_id">
+  <option value=""></option>
+  {options}
+</select>
+<div id="consulate_date_time" class="{form_class}">
+  <input type="text" id="appointments_consulate_appointment_date" readonly>
+  <select id="appointments_consulate_appointment_time"></select>
+</div>
+<div id="ui-datepicker-div"></div>
+<script>
+const AVAILABLE = {available};
+const MONTHS = ["January","February","March","April","May","June","July","August","September","October","November","December"];
+let shownYear = null, shownMonth = null;
+
+function pad(n) {{ return String(n).padStart(2, "0"); }}
+
+function renderMonth(year, month, facility) {{
+  const days = new Set(AVAILABLE[facility] || []);
+  const first = new Date(year, month, 1).getDay();
+  const total = new Date(year, month + 1, 0).getDate();
+  let cells = "";
+  for (let i = 0; i < first; i++) cells += "<td></td>";
+  for (let d = 1; d <= total; d++) {{
+    const iso = year + "-" + pad(month + 1) + "-" + pad(d);
+    cells += days.has(iso)
+      ? '<td data-handler="selectDay"><a class="ui-state-default" href="#">' + d + "</a></td>"
+      : '<td class="ui-state-disabled"><span class="ui-state-default">' + d + "</span></td>";
+  }}
+  return '<div class="ui-datepicker-group"><div class="ui-datepicker-title">'
+    + '<span class="ui-datepicker-month">' + MONTHS[month] + "</span> "
+    + '<span class="ui-datepicker-year">' + year + "</span></div>"
+    + "<table><tbody><tr>" + cells + "</tr></tbody></table></div>";
+}}
+
+function render() {{
+  const facility = document.getElementById("appointments_consulate_appointment_facility_id").value;
+  const next = new Date(shownYear, shownMonth + 1, 1);
+  document.getElementById("ui-datepicker-div").innerHTML =
+    '<a class="ui-datepicker-next" href="#" onclick="advance(); return false;">Next</a>'
+    + renderMonth(shownYear, shownMonth, facility)
+    + renderMonth(next.getFullYear(), next.getMonth(), facility);
+}}
+
+function advance() {{
+  const next = new Date(shownYear, shownMonth + 1, 1);
+  shownYear = next.getFullYear();
+  shownMonth = next.getMonth();
+  render();
+}}
+
+document.getElementById("appointments_consulate_appointment_date").addEventListener("click", function () {{
+  const now = new Date();
+  shownYear = now.getFullYear();
+  shownMonth = now.getMonth();
+  render();
+}});
+</script>
+</body></html>
+"""
+
+
+class StandInSite:
+    """HTTP-сервер подмены сайта в фоновом потоке.
+
+    `latency` — задержка каждого ответа (секунды, ±`jitter` доля), `busy_rate` — доля страниц
+    записи с «Система занята», `density` — доля свободных дней. Набор свободных дат
+    пересчитывается раз в `churn_seconds`.
+    """
+
+    def __init__(
+        self,
+        *,
+        facilities: tuple[int, ...] = (134,),
+        latency: float = 0.0,
+        jitter: float = 0.2,
+        busy_rate: float = 0.0,
+        density: float = 0.05,
+        horizon_days: int = 210,
+        churn_seconds: float = 300.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.facilities = facilities
+        self.latency = latency
+        self.jitter = jitter
+        self.busy_rate = busy_rate
+        self.density = density
+        self.horizon_days = horizon_days
+        self.churn_seconds = churn_seconds
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._sessions: set[str] = set()
+        self._sessions_lock = threading.Lock()
+        self.requests = 0
+        self.logins = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> StandInSite:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> StandInSite:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def available_dates(self, facility_id: int, now: float | None = None) -> list[str]:
+        """Свободные даты facility: детерминированы в пределах одного окна `churn_seconds`."""
+
+        epoch = int((time.time() if now is None else now) // self.churn_seconds)
+        today = dt.date.today()
+        result = []
+        for offset in range(self.horizon_days):
+            day = today + dt.timedelta(days=offset)
+            digest = hashlib.blake2b(f"{facility_id}:{day}:{epoch}".encode(), digest_size=4).digest()
+            if int.from_bytes(digest, "big") / 2**32 < self.density:
+                result.append(day.isoformat())
+        return result
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _count_request(self) -> None:
+        with self._sessions_lock:
+            self.requests += 1
+        self._delay()
+
+    def _delay(self) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency * (1 + self.jitter * (2 * self._random() - 1)))
+
+    def _new_session(self) -> str:
+        token = secrets.token_hex(16)
+        with self._sessions_lock:
+            self._sessions.add(token)
+            self.logins += 1
+        return token
+
+    def _has_session(self, token: str | None) -> bool:
+        with self._sessions_lock:
+            return token is not None and token in self._sessions
+
+    def _appointment_page(self) -> str:
+        busy = self._random() < self.busy_rate
+        options = "\n  ".join(f'<option value="{f}">Facility {f}</option>' for f in self.facilities)
+        available = {str(f): self.available_dates(f) for f in self.facilities}
+        return _APPOINTMENT_PAGE.format(
+            busy_class="" if busy else "hidden",
+            form_class="hidden" if busy else "",
+            options=options,
+            # Внутри <script> HTML-экранирование не действует; достаточно не закрыть тег.
+            available=json.dumps(available).replace("</", "<\\/"),
+        )
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args) -> None:  # noqa: A002 - сигнатура базового класса
+                pass
+
+            def _session(self) -> str | None:
+                cookie = SimpleCookie(self.headers.get("Cookie", ""))
+                morsel = cookie.get(_SESSION_COOKIE)
+                return morsel.value if morsel else None
+
+            def _send(self, status: int, body: str = "", headers: dict[str, str] | None = None) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                site._count_request()
+                path = urlsplit(self.path).path
+                logged_in = site._has_session(self._session())
+
+                if m := _SIGN_IN_RE.match(path):
+                    if logged_in:
+                        self._send(302, headers={"Location": f"/{m['cc']}/niv/account"})
+                    else:
+                        self._send(200, _SIGN_IN_PAGE.format(action=html.escape(path)))
+                elif m := _ACCOUNT_RE.match(path):
+                    self._send(200, "<!DOCTYPE html><html><body><h1>Groups</h1></body></html>")
+                elif m := _APPOINTMENT_RE.match(path):
+                    if not logged_in:
+                        self._send(302, headers={"Location": f"/{m['cc']}/niv/users/sign_in"})
+                    else:
+                        self._send(200, site._appointment_page())
+                else:
+                    self._send(404, "<!DOCTYPE html><html><body>Not found</body></html>")
+
+            def do_POST(self) -> None:
+                site._count_request()
+                self.rfile.read(int(self.headers.get("Content-Length", "0") or 0))
+                path = urlsplit(self.path).path
+                if m := _SIGN_IN_RE.match(path):
+                    token = site._new_session()
+                    self._send(
+                        302,
+                        headers={
+                            "Location": f"/{m['cc']}/niv/account",
+                            "Set-Cookie": f"{_SESSION_COOKIE}={token}; Path=/; HttpOnly",
+                        },
+                    )
+                else:
+                    self._send(404)
+
+        return Handler
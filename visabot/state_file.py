@@ -3,22 +3,69 @@ from __future__ import annotations
 import json
 import os
 import tempfile
-from dataclasses import asdict
+import threading
+from dataclasses import asdict, replace
 from typing import Iterable
 
-from visabot.domain import Slot
+from visabot.domain import OutboxMessage, Slot
 
+# Файл переписывают и проверка (новые слоты), и доставка уведомлений (outbox) из другого потока.
+_LOCK = threading.Lock()
 
-def load_slots(path: str) -> set[Slot]:
+
+def _read(path: str) -> dict:
     if not os.path.exists(path):
-        return set()
+        return {}
 
     try:
         with open(path, "r", encoding="utf-8") as f:
             raw = json.load(f)
     except json.JSONDecodeError:
         # Corrupted state shouldn't brick the worker; start fresh.
-        return set()
+        return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def _write(path: str, data: dict) -> None:
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    # Atomic write
+    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8", dir=folder, suffix=".tmp") as tf:
+        json.dump(data, tf, ensure_ascii=False, indent=2)
+        tmp_name = tf.name
+
+    os.replace(tmp_name, path)
+
+
+def _outbox_from(raw: dict) -> list[OutboxMessage]:
+    messages: list[OutboxMessage] = []
+    for item in raw.get("outbox", []):
+        try:
+            messages.append(
+                OutboxMessage(
+                    id=str(item["id"]),
+                    chat_id=str(item["chat_id"]),
+                    text=str(item["text"]),
+                    created_at=float(item["created_at"]),
+                    attempts=int(item.get("attempts", 0)),
+                )
+            )
+        except Exception:
+            continue
+    return messages
+
+
+def _dump(slots: Iterable[Slot], outbox: list[OutboxMessage]) -> dict:
+    data: dict = {"slots": [asdict(s) for s in sorted(set(slots))]}
+    if outbox:
+        data["outbox"] = [asdict(m) for m in outbox]
+    return data
+
+
+def load_slots(path: str) -> set[Slot]:
+    raw = _read(path)
 
     slots_raw = raw.get("slots", [])
     slots: set[Slot] = set()
@@ -30,19 +77,41 @@ def load_slots(path: str) -> set[Slot]:
     return slots
 
 
-def save_slots(path: str, slots: Iterable[Slot]) -> None:
-    data = {
-        "slots": [asdict(s) for s in sorted(set(slots))],
-    }
+def save_slots(path: str, slots: Iterable[Slot], outbox: Iterable[OutboxMessage] = ()) -> None:
+    """Сохраняет слоты и (в той же атомарной записи) новые уведомления в outbox.
 
-    folder = os.path.dirname(os.path.abspath(path))
-    if folder and not os.path.exists(folder):
-        os.makedirs(folder, exist_ok=True)
+    Недоставленные уведомления из прошлых проверок сохраняются.
+    """
 
-    # Atomic write
-    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8", dir=folder, suffix=".tmp") as tf:
-        json.dump(data, tf, ensure_ascii=False, indent=2)
-        tmp_name = tf.name
+    with _LOCK:
+        pending = _outbox_from(_read(path))
+        known = {m.id for m in pending}
+        pending.extend(m for m in outbox if m.id not in known)
+        _write(path, _dump(slots, pending))
 
-    os.replace(tmp_name, path)
 
+def load_outbox(path: str) -> list[OutboxMessage]:
+    with _LOCK:
+        return _outbox_from(_read(path))
+
+
+def update_outbox(path: str, *, sent: Iterable[str] = (), failed: Iterable[str] = (), dropped: Iterable[str] = ()) -> None:
+    """Убирает доставленные/брошенные сообщения и увеличивает счётчик попыток у неудачных."""
+
+    sent_ids, failed_ids, dropped_ids = set(sent), set(failed), set(dropped)
+    with _LOCK:
+        if not os.path.exists(path):
+            return
+        raw = _read(path)
+        pending: list[OutboxMessage] = []
+        for m in _outbox_from(raw):
+            if m.id in sent_ids or m.id in dropped_ids:
+                continue
+            if m.id in failed_ids:
+                m = replace(m, attempts=m.attempts + 1)
+            pending.append(m)
+
+        data: dict = {"slots": raw.get("slots", [])}
+        if pending:
+            data["outbox"] = [asdict(m) for m in pending]
+        _write(path, data)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from visabot.config import Settings
+from visabot.metrics import METRICS
+
+_OUTCOME_LABELS = {
+    "ok": "успешно",
+    "busy": "система занята",
+    "error": "ошибки",
+    "deadline": "не уложились во время",
+    "structure": "изменилась разметка",
+}
+
+
+class StatusDigest:
+    """Сводка статусов проверок вместо сообщения после каждой из них.
+
+    В run_forever run_check_once не шлёт «новых дат не найдено», «система занята» и «проверка
+    не удалась» после каждой проверки, а записывает исход сюда; раз в `period` секунд уходит
+    одно сообщение. Уведомления о новых датах по-прежнему отправляются сразу.
+    """
+
+    def __init__(self, period: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.period = period
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._reset()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> StatusDigest | None:
+        if settings.status_digest_seconds <= 0:
+            return None
+        return cls(settings.status_digest_seconds)
+
+    def _reset(self) -> None:
+        self._started_at = self._clock()
+        self._telegram_before = METRICS.get("telegram_messages_sent")
+        self._outcomes: Counter[str] = Counter()
+        self._slots: dict[str, int] = {}
+        self._last_error: str | None = None
+
+    def record(self, key: str, outcome: str, *, slots: int | None = None, error: str | None = None) -> None:
+        with self._lock:
+            self._outcomes[outcome] += 1
+            if slots is not None:
+                self._slots[key] = slots
+            if error and outcome != "busy":
+                self._last_error = f"{key}: {error}"
+
+    def due(self) -> bool:
+        with self._lock:
+            return bool(self._outcomes) and self._clock() - self._started_at >= self.period
+
+    def take(self) -> str | None:
+        """Текст сводки за прошедший период (None — проверок не было); счётчики обнуляются."""
+
+        with self._lock:
+            if not self._outcomes:
+                return None
+            text = self._format()
+            self._reset()
+            return text
+
+    def _format(self) -> str:
+        elapsed = max(1.0, self._clock() - self._started_at)
+        telegram = METRICS.get("telegram_messages_sent") - self._telegram_before
+        outcomes = ", ".join(
+            f"{_OUTCOME_LABELS.get(outcome, outcome)}: {n}" for outcome, n in self._outcomes.most_common()
+        )
+        lines = [
+            f"Сводка за {elapsed / 60:.0f} мин.: проверок {sum(self._outcomes.values())} ({outcomes}).",
+        ]
+        if len(self._slots) == 1:
+            lines.append(f"Дат в календаре сейчас: {next(iter(self._slots.values()))}")
+        elif self._slots:
+            lines.append("Дат в календаре сейчас:")
+            lines.extend(f"• {key}: {n}" for key, n in sorted(self._slots.items()))
+        if self._last_error:
+            lines.append(f"Последняя ошибка: {self._last_error}")
+        lines.append(f"Сообщений в Telegram за период: {telegram:.0f} (≈{telegram * 86400 / elapsed:.0f} в сутки)")
+        return "\n".join(lines)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+from dataclasses import dataclass
+from typing import Iterable
+
+from visabot.domain import Slot
+
+_MIN_ORDINAL = dt.date.min.toordinal()
+_MAX_ORDINAL = dt.date.max.toordinal()
+
+
+@dataclass(frozen=True)
+class Subscriber:
+    """Получатель уведомлений со своими фильтрами.
+
+    None в фильтре означает "без ограничений".
+    """
+
+    chat_id: str
+    facility_ids: frozenset[int] | None = None
+    date_from: dt.date | None = None
+    date_to: dt.date | None = None
+
+    @property
+    def interval(self) -> tuple[int, int]:
+        start = self.date_from.toordinal() if self.date_from else _MIN_ORDINAL
+        end = self.date_to.toordinal() if self.date_to else _MAX_ORDINAL
+        return start, end
+
+
+def _parse_chat_id(raw: object, i: int) -> str:
+    value = str(raw).strip()
+    try:
+        int(value)
+    except ValueError as e:
+        raise RuntimeError(f"Invalid chat_id in subscriber #{i}: {value!r}. Expected integer chat id.") from e
+    if value == "0":
+        raise RuntimeError(f"Invalid chat_id in subscriber #{i}: '0' is not a valid chat id")
+    return value
+
+
+def _parse_date(raw: object, field: str, i: int) -> dt.date | None:
+    if raw in (None, ""):
+        return None
+    try:
+        return dt.date.fromisoformat(str(raw))
+    except ValueError as e:
+        raise RuntimeError(f"Invalid {field} in subscriber #{i}: {raw!r}. Expected YYYY-MM-DD.") from e
+
+
+def load_subscribers(path: str) -> tuple[Subscriber, ...]:
+    # SUBSCRIBERS_FILE: JSON-список, например
+    #   [{"chat_id": "123", "facility_ids": [134], "date_from": "2025-01-01", "date_to": "2025-03-31"}]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuntimeError(f"Failed to read SUBSCRIBERS_FILE {path!r}: {e}") from e
+
+    if not isinstance(raw, list):
+        raise RuntimeError("SUBSCRIBERS_FILE must contain a JSON list of subscribers")
+
+    result: list[Subscriber] = []
+    for i, item in enumerate(raw):
+        if not isinstance(item, dict) or "chat_id" not in item:
+            raise RuntimeError(f"Invalid subscriber #{i}: 'chat_id' is required")
+
+        facility_ids_raw = item.get("facility_ids")
+        try:
+            facility_ids = frozenset(int(f) for f in facility_ids_raw) if facility_ids_raw else None
+        except (TypeError, ValueError) as e:
+            raise RuntimeError(f"Invalid facility_ids in subscriber #{i}: {facility_ids_raw!r}") from e
+
+        sub = Subscriber(
+            chat_id=_parse_chat_id(item["chat_id"], i),
+            facility_ids=facility_ids,
+            date_from=_parse_date(item.get("date_from"), "date_from", i),
+            date_to=_parse_date(item.get("date_to"), "date_to", i),
+        )
+        start, end = sub.interval
+        if start > end:
+            raise RuntimeError(f"Invalid subscriber #{i}: date_from is after date_to")
+        result.append(sub)
+
+    return tuple(result)
+
+
+class _IntervalTree:
+    """Статическое центрированное дерево интервалов.
+
+    Запрос "какие интервалы содержат точку" — O(log n + k), где k — число совпадений.
+    """
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, intervals: list[tuple[int, int, str]]) -> None:
+        endpoints = sorted({p for s, e, _ in intervals for p in (s, e)})
+        self.center = endpoints[len(endpoints) // 2]
+
+        here = [iv for iv in intervals if iv[0] <= self.center <= iv[1]]
+        left = [iv for iv in intervals if iv[1] < self.center]
+        right = [iv for iv in intervals if iv[0] > self.center]
+
+        self.by_start = sorted(here, key=lambda iv: iv[0])
+        self.by_end = sorted(here, key=lambda iv: iv[1])
+        self.left = _IntervalTree(left) if left else None
+        self.right = _IntervalTree(right) if right else None
+
+    def stab(self, point: int, out: set[str]) -> None:
+        node: _IntervalTree | None = self
+        while node is not None:
+            if point < node.center:
+                # Все интервалы узла заканчиваются не раньше center > point:
+                # подходят те, что начались не позже point.
+                for s, _, chat_id in node.by_start:
+                    if s > point:
+                        break
+                    out.add(chat_id)
+                node = node.left
+            elif point > node.center:
+                for _, e, chat_id in reversed(node.by_end):
+                    if e < point:
+                        break
+                    out.add(chat_id)
+                node = node.right
+            else:
+                out.update(chat_id for _, _, chat_id in node.by_start)
+                return
+
+
+class SubscriberIndex:
+    """Индекс подписчиков: facility_id -> дерево интервалов дат.
+
+    Подписчики без фильтра по facility лежат в отдельном дереве и проверяются для
+    любого слота.
+    """
+
+    def __init__(self, subscribers: Iterable[Subscriber]) -> None:
+        per_facility: dict[int | None, list[tuple[int, int, str]]] = {}
+        for sub in subscribers:
+            start, end = sub.interval
+            facilities: Iterable[int | None] = sub.facility_ids if sub.facility_ids else (None,)
+            for facility_id in facilities:
+                per_facility.setdefault(facility_id, []).append((start, end, sub.chat_id))
+
+        self._trees = {k: _IntervalTree(v) for k, v in per_facility.items()}
+
+    def chats_for(self, slot: Slot) -> set[str]:
+        point = dt.date.fromisoformat(slot.date_iso).toordinal()
+        out: set[str] = set()
+        for key in (slot.facility_id, None):
+            tree = self._trees.get(key)
+            if tree is not None:
+                tree.stab(point, out)
+        return out
+
+    def match(self, slots: Iterable[Slot]) -> dict[str, set[Slot]]:
+        """Для каждого chat_id — только те слоты, которые попали в его фильтры."""
+
+        result: dict[str, set[Slot]] = {}
+        for slot in slots:
+            for chat_id in self.chats_for(slot):
+                result.setdefault(chat_id, set()).add(slot)
+        return result
+
+
+def effective_subscribers(chat_ids: Iterable[str], subscribers: Iterable[Subscriber]) -> list[Subscriber]:
+    """Чаты из TELEGRAM_CHAT_ID без своей записи в SUBSCRIBERS_FILE получают всё, как раньше."""
+
+    result = list(subscribers)
+    known = {s.chat_id for s in result}
+    for chat_id in chat_ids:
+        if chat_id not in known:
+            result.append(Subscriber(chat_id=chat_id))
+    return result
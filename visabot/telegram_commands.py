@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import threading
+import time
+from typing import Callable
+
+from visabot.circuit_breaker import CircuitState
+from visabot.config import Account, Settings
+from visabot.domain import Slot
+from visabot.metrics import METRICS
+from visabot.runtime import WorkerRuntime
+from visabot.telegram_notifier import get_telegram_updates, send_telegram_message
+
+logger = logging.getLogger(__name__)
+
+_HELP = (
+    "Команды:\n"
+    "/status — состояние воркера и последних проверок\n"
+    "/slots — текущие свободные даты\n"
+    "/pause — приостановить проверки\n"
+    "/resume — возобновить проверки\n"
+    "/checknow — проверить досрочно"
+)
+
+
+def _fmt_ts(ts: float | None) -> str:
+    if ts is None:
+        return "ещё не было"
+    return dt.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TelegramCommandLoop(threading.Thread):
+    """Long polling `getUpdates` и ответы на команды.
+
+    Ответы строятся только из `WorkerRuntime` и state-хранилища (`load_last_slots`),
+    браузер для них никогда не запускается.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        runtime: WorkerRuntime,
+        *,
+        load_last_slots: Callable[[Account], set[Slot]],
+        poll_timeout_seconds: int = 30,
+    ) -> None:
+        super().__init__(name="telegram-commands", daemon=True)
+        self.settings = settings
+        self.runtime = runtime
+        self.load_last_slots = load_last_slots
+        self.poll_timeout_seconds = poll_timeout_seconds
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _allowed_chats(self) -> set[str]:
+        allowed = set(self.settings.telegram_chat_ids)
+        allowed.update(s.chat_id for s in self.settings.subscribers)
+        if self.settings.telegram_admin_chat_id:
+            allowed.add(self.settings.telegram_admin_chat_id)
+        return allowed
+
+    def _is_admin(self, chat_id: str) -> bool:
+        # Без админского чата управлять может любой известный чат.
+        admin = self.settings.telegram_admin_chat_id
+        return admin is None or chat_id == admin
+
+    def run(self) -> None:
+        offset = self._skip_backlog()
+        while not self._stop_event.is_set():
+            try:
+                updates = get_telegram_updates(
+                    bot_token=self.settings.telegram_bot_token,
+                    offset=offset,
+                    poll_timeout_seconds=self.poll_timeout_seconds,
+                )
+            except Exception as e:
+                logger.warning("Telegram getUpdates failed (%s: %s)", type(e).__name__, e)
+                self._stop_event.wait(5)
+                continue
+
+            for update in updates:
+                offset = int(update["update_id"]) + 1
+                try:
+                    self.handle_update(update)
+                except Exception as e:
+                    logger.warning("Failed to handle Telegram command (%s: %s)", type(e).__name__, e)
+
+    def _skip_backlog(self) -> int | None:
+        # Команды, присланные пока бот лежал (например, старый /pause), не выполняем.
+        try:
+            updates = get_telegram_updates(bot_token=self.settings.telegram_bot_token, offset=-1, poll_timeout_seconds=0)
+        except Exception:
+            return None
+        if not updates:
+            return None
+        return int(updates[-1]["update_id"]) + 1
+
+    def handle_update(self, update: dict) -> None:
+        message = update.get("message") or {}
+        text = str(message.get("text") or "").strip()
+        chat_id = str((message.get("chat") or {}).get("id", ""))
+        if not text.startswith("/") or not chat_id:
+            return
+
+        if chat_id not in self._allowed_chats():
+            logger.info("Ignoring command from unknown chat_id=%s", chat_id)
+            return
+
+        # "/status@KzVisaBot args" -> "/status"
+        command = text.split()[0].split("@", 1)[0].lower()
+        reply = self.handle_command(command, chat_id=chat_id)
+        send_telegram_message(bot_token=self.settings.telegram_bot_token, chat_id=chat_id, text=reply)
+
+    def handle_command(self, command: str, *, chat_id: str) -> str:
+        if command == "/status":
+            return self._status_text()
+        if command == "/slots":
+            return self._slots_text()
+        if command in {"/pause", "/resume"}:
+            if not self._is_admin(chat_id):
+                return "Эта команда доступна только в админском чате."
+            self.runtime.set_paused(command == "/pause")
+            logger.info("Worker %s by chat_id=%s", "paused" if command == "/pause" else "resumed", chat_id)
+            return "Проверки приостановлены." if command == "/pause" else "Проверки возобновлены."
+        if command == "/checknow":
+            if self.runtime.is_paused():
+                return "Проверки приостановлены, сначала /resume."
+            if self.runtime.request_check_now():
+                return "Внеочередная проверка запланирована."
+            return "Внеочередная проверка уже запланирована."
+        return _HELP
+
+    def _status_text(self) -> str:
+        snapshot = self.runtime.snapshot()
+        uptime_min = int((time.time() - self.runtime.started_at) // 60)
+        lines = [
+            f"KzVisaBot: {'на паузе' if self.runtime.is_paused() else 'работает'}, uptime {uptime_min} мин.",
+            f"Интервал: {self.settings.check_interval_seconds}s",
+            (
+                f"Процессов браузера: {METRICS.get('browser_processes_live'):.0f}, "
+                f"RSS: {METRICS.get('browser_rss_bytes') / 2**20:.0f} MiB"
+            ),
+            (
+                f"Очередь уведомлений: {METRICS.get('notify_queue_depth'):.0f}, "
+                f"задержка: {METRICS.get('notify_lag_seconds'):.1f}s"
+            ),
+        ]
+        if METRICS.get("prelogin_hits"):
+            lines.append(
+                f"Предварительный логин: {METRICS.get('prelogin_hits'):.0f} проверок, "
+                f"сэкономлено {METRICS.get('prelogin_seconds_saved'):.0f}s"
+            )
+        if METRICS.get("rate_governor_requests"):
+            lines.append(
+                f"Лимит запросов: ожиданий {METRICS.get('rate_governor_waits'):.0f}, "
+                f"всего {METRICS.get('rate_governor_wait_seconds'):.0f}s"
+            )
+        for key, (state, failures) in sorted(self.runtime.breaker_states().items()):
+            if state != CircuitState.CLOSED:
+                lines.append(f"Предохранитель {key}: {state.value}, неудач подряд: {failures}")
+        for account in self.settings.accounts():
+            status = snapshot.get(account.key)
+            if status is None:
+                lines.append(f"• {account.key}: проверок ещё не было")
+                continue
+            line = f"• {account.key}: {status.last_outcome} в {_fmt_ts(status.last_check_at)}"
+            if status.current_slots is not None:
+                line += f", дат: {len(status.current_slots)}"
+            if status.last_error:
+                line += f"\n  {status.last_error}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _slots_text(self) -> str:
+        snapshot = self.runtime.snapshot()
+        lines: list[str] = []
+        for account in self.settings.accounts():
+            status = snapshot.get(account.key)
+            slots = status.current_slots if status is not None else None
+            if slots is None:
+                # После рестарта в памяти пусто — берём последнее сохранённое состояние.
+                slots = self.load_last_slots(account)
+            lines.append(f"{account.key}:")
+            if slots:
+                lines.extend(f"• {s.date_iso}" for s in sorted(slots))
+            else:
+                lines.append("• свободных дат нет")
+        return "\n".join(lines)
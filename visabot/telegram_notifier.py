@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import httpx
 
+from visabot.metrics import METRICS
+
 
 def send_telegram_message(*, bot_token: str, chat_id: str, text: str, timeout_seconds: float = 20.0) -> None:
     url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
@@ -17,4 +19,26 @@ def send_telegram_message(*, bot_token: str, chat_id: str, text: str, timeout_se
         data = r.json()
         if not data.get("ok", False):
             raise RuntimeError(f"Telegram API error: {data}")
+    # Один счётчик на все отправки: уведомления, статусы, сводки и ответы на команды.
+    METRICS.inc("telegram_messages_sent")
+
 
+def get_telegram_updates(
+    *,
+    bot_token: str,
+    offset: int | None,
+    poll_timeout_seconds: int = 30,
+) -> list[dict]:
+    # Long polling: Telegram держит запрос до poll_timeout_seconds, если новых сообщений нет.
+    url = f"https://api.telegram.org/bot{bot_token}/getUpdates"
+    payload: dict = {"timeout": poll_timeout_seconds, "allowed_updates": ["message"]}
+    if offset is not None:
+        payload["offset"] = offset
+
+    with httpx.Client(timeout=poll_timeout_seconds + 10) as client:
+        r = client.post(url, json=payload)
+        r.raise_for_status()
+        data = r.json()
+        if not data.get("ok", False):
+            raise RuntimeError(f"Telegram API error: {data}")
+        return list(data.get("result", []))
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import pytest
+
+
+class FakeClock:
+    """Часы для параметра `clock=`: время двигает сам тест (`clock.now += 30`)."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+from visabot.browser_processes import BrowserProcessTracker, _group_alive, collect_zombies
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+
+
+def _spawn_group() -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", "import time; time.sleep(60)"],
+        start_new_session=True,
+    )
+
+
+def _driver_for(proc: subprocess.Popen) -> MagicMock:
+    driver = MagicMock()
+    driver.service.process.pid = proc.pid
+    return driver
+
+
+def test_release_kills_leftover_group_and_updates_registry(tmp_path) -> None:
+    registry = tmp_path / "browsers.json"
+    tracker = BrowserProcessTracker(str(registry))
+    proc = _spawn_group()
+
+    pgid = tracker.register(_driver_for(proc))
+    assert json.loads(registry.read_text()) == [{"pgid": proc.pid, "owner_pid": os.getpid()}]
+
+    assert tracker.release(pgid) is True
+    assert proc.poll() is not None
+    assert not _group_alive(proc.pid)
+    assert json.loads(registry.read_text()) == []
+
+
+def test_release_of_finished_group_is_noop(tmp_path) -> None:
+    tracker = BrowserProcessTracker(str(tmp_path / "browsers.json"))
+    proc = _spawn_group()
+    pgid = tracker.register(_driver_for(proc))
+    proc.kill()
+    proc.wait()
+
+    assert tracker.release(pgid) is False
+
+
+def test_mock_driver_without_real_pid_is_not_tracked(tmp_path) -> None:
+    tracker = BrowserProcessTracker(str(tmp_path / "browsers.json"))
+
+    assert tracker.register(MagicMock()) is None
+    assert tracker.release(None) is False
+
+
+def test_reap_orphans_skips_groups_without_browser(tmp_path) -> None:
+    registry = tmp_path / "browsers.json"
+    proc = _spawn_group()
+    try:
+        # Владелец мёртв, но в группе не браузер (pid переиспользован) — трогать нельзя.
+        registry.write_text(json.dumps([{"pgid": proc.pid, "owner_pid": 2**22 + 1}]))
+
+        assert BrowserProcessTracker(str(registry)).reap_orphans() == 0
+        assert proc.poll() is None
+        assert json.loads(registry.read_text()) == []
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+
+@pytest.mark.skipif(os.getpid() == 1, reason="as PID 1 all children are reaped on purpose")
+def test_collect_zombies_leaves_other_children_alone() -> None:
+    other = subprocess.Popen([sys.executable, "-c", "raise SystemExit(3)"])
+    browser = _spawn_group()
+    # Дожидаемся завершения, не забирая код возврата: процесс остаётся зомби.
+    os.waitid(os.P_PID, other.pid, os.WEXITED | os.WNOWAIT)
+
+    browser.kill()
+    browser.wait()
+    collect_zombies((browser.pid,))
+
+    # Код возврата чужого потомка достался его владельцу, а не сборщику зомби.
+    assert other.wait(timeout=5) == 3
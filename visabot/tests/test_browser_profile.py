@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from visabot.browser_profile import BrowserProfile, ProfileBusyError
+from visabot.config import Settings
+from visabot.worker import _run_check_once
+
+
+def test_profile_is_locked_for_a_single_driver(tmp_path) -> None:
+    with BrowserProfile(str(tmp_path), "acc"):
+        with pytest.raises(ProfileBusyError):
+            BrowserProfile(str(tmp_path), "acc").acquire()
+
+    # После освобождения профиль снова доступен.
+    with BrowserProfile(str(tmp_path), "acc"):
+        pass
+
+
+def test_stale_singletons_removed_and_corrupt_profile_recreated(tmp_path) -> None:
+    path = tmp_path / "acc"
+    (path / "Default").mkdir(parents=True)
+    (path / "Default" / "Preferences").write_text("{}", encoding="utf-8")
+    os.symlink("host-12345", path / "SingletonLock")
+
+    with BrowserProfile(str(tmp_path), "acc") as profile:
+        assert profile.warm
+        assert not os.path.lexists(path / "SingletonLock")
+
+    (path / "Local State").write_text("{truncated", encoding="utf-8")
+    with BrowserProfile(str(tmp_path), "acc") as profile:
+        assert not profile.warm
+        assert path.is_dir()
+        assert not (path / "Default").exists()
+
+
+def _settings(profile_dir: str) -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        driver_start_retry_attempts=2,
+        browser_profile_dir=profile_dir,
+        state_file=":memory:",
+    )
+
+
+def test_check_uses_account_profile_and_resets_it_after_failed_start(tmp_path) -> None:
+    settings = _settings(str(tmp_path))
+    profile_path = os.path.join(str(tmp_path), settings.primary_account.key)
+
+    def start(*, headless: bool, user_data_dir: str | None):
+        if start.call_count == 1:
+            os.makedirs(os.path.join(user_data_dir, "Default"))
+            raise RuntimeError("Chrome failed to start")
+        return MagicMock()
+
+    start = MagicMock(side_effect=start)
+    with (
+        patch("visabot.worker._PHASE_RETRY_WAIT_SECONDS", 0),
+        patch("visabot.worker.start_driver", start),
+        patch("visabot.worker.log_in"),
+        patch("visabot.worker.open_appointments_calendar"),
+        patch("visabot.worker.read_calendar", return_value=set()),
+    ):
+        _run_check_once(settings)
+
+    assert [c.kwargs["user_data_dir"] for c in start.call_args_list] == [profile_path, profile_path]
+    assert not os.path.exists(os.path.join(profile_path, "Default"))
+    # Блокировка отпущена после проверки.
+    with BrowserProfile(str(tmp_path), settings.primary_account.key):
+        pass
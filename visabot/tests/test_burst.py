@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+from visabot.burst import BurstScheduler
+from visabot.config import Account, Settings
+from visabot.prelogin import PreLogin
+from visabot.runtime import WorkerRuntime
+from visabot.worker import SeleniumSlotProvider, _local_tick
+
+
+def test_burst_starts_on_change_decays_and_finishes(clock) -> None:
+    burst = BurstScheduler(interval=30, window=600, max_checks=10, clock=clock)
+
+    burst.record("a", changed=False, new_slots=0, normal_interval=300)
+    assert not burst.active("a")
+
+    burst.record("a", changed=True, new_slots=2, normal_interval=300)
+    assert burst.seconds_until("a") == 30
+
+    delays = []
+    while burst.active("a"):
+        clock.now += burst.seconds_until("a")
+        assert burst.due() == ["a"]
+        burst.record("a", changed=False, new_slots=0, normal_interval=300, extra=True)
+        delays.append(burst.seconds_until("a"))
+
+    # 60, 120, 240 → следующий интервал 480 уже больше обычного: обратно к 300s.
+    assert delays == [60, 120, 240, None]
+
+
+def test_burst_is_capped_by_extra_checks_and_extended_by_changes(clock) -> None:
+    burst = BurstScheduler(interval=30, window=60, max_checks=3, clock=clock)
+    burst.record("a", changed=True, new_slots=1, normal_interval=300)
+
+    for _ in range(2):
+        clock.now += 30
+        burst.record("a", changed=True, new_slots=1, normal_interval=300, extra=True)
+        assert burst.seconds_until("a") == 30
+
+    clock.now += 30
+    burst.record("a", changed=True, new_slots=1, normal_interval=300, extra=True)
+    assert not burst.active("a")
+
+
+def test_regular_checks_inside_burst_do_not_spend_its_budget(clock) -> None:
+    burst = BurstScheduler(interval=30, window=600, max_checks=2, clock=clock)
+    burst.record("a", changed=True, new_slots=1, normal_interval=300)
+
+    for _ in range(5):
+        clock.now += 10
+        burst.record("a", changed=False, new_slots=0, normal_interval=300)
+    assert burst.active("a")
+    assert burst.seconds_until("a") == 0
+
+    burst.record("a", changed=False, new_slots=0, normal_interval=300, extra=True)
+    assert burst.seconds_until("a") == 60
+
+
+def test_local_tick_runs_only_accounts_in_burst_between_rounds() -> None:
+    settings = Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="1",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        state_file=":memory:",
+        extra_accounts=(Account("u2", "p2", "ru-kz", "2", 1),),
+    )
+    burst = BurstScheduler(interval=30, window=600, max_checks=10)
+    burst.record(settings.primary_account.key, changed=True, new_slots=1, normal_interval=300)
+    burst._bursts[settings.primary_account.key].due_at = 0.0
+    components = MagicMock(burst=burst, prelogin=None, burst_sessions=None, next_due=float("inf"))
+    runtime = WorkerRuntime()
+
+    with (
+        patch("visabot.worker.run_check_once") as run_check,
+        patch.object(runtime, "wait_for_tick", return_value=False),
+    ):
+        _local_tick(settings, runtime, components)
+
+    assert [c.args[1].key for c in run_check.call_args_list] == [settings.primary_account.key]
+    assert run_check.call_args.kwargs["burst"] is burst
+    assert run_check.call_args.kwargs["burst_check"] is True
+
+
+def test_browser_stays_open_between_burst_checks() -> None:
+    settings = Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="1",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        state_file=":memory:",
+    )
+    closed = []
+    kept = PreLogin(lambda account: None, closed.append)
+    provider = SeleniumSlotProvider(kept=kept)
+    driver = MagicMock()
+
+    with (
+        patch("visabot.worker.start_driver", return_value=driver) as start,
+        patch("visabot.worker.log_in") as login,
+        patch("visabot.worker.open_appointments_calendar") as open_calendar,
+        patch("visabot.worker.read_calendar", return_value=set()),
+        patch("visabot.worker.session_is_alive", return_value=True),
+    ):
+        provider.fetch(settings, settings.primary_account)
+        provider.fetch(settings, settings.primary_account)
+
+    assert start.call_count == 1
+    assert login.call_count == 1
+    assert open_calendar.call_count == 2
+    driver.quit.assert_not_called()
+
+    kept.discard(settings.primary_account.key)
+    assert [s.driver for s in closed] == [driver]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+
+from visabot.calendar_bitmap import CalendarBitmap, benchmark, diff_slots
+from visabot.domain import Slot
+from visabot.state_file import save_slots
+
+
+def _slots(*items: tuple[str, int]) -> set[Slot]:
+    return {Slot(date_iso=d, facility_id=f) for d, f in items}
+
+
+PREVIOUS = _slots(("2025-01-01", 134), ("2025-01-05", 134), ("2025-03-01", 135))
+CURRENT = _slots(("2024-12-30", 134), ("2025-01-05", 134), ("2026-06-01", 135), ("2025-02-01", 136))
+
+
+def test_roundtrip_to_slots_is_lossless() -> None:
+    bitmap = CalendarBitmap.from_slots(CURRENT)
+
+    assert bitmap.to_slots() == CURRENT
+    assert len(bitmap) == len(CURRENT)
+    assert Slot(date_iso="2026-06-01", facility_id=135) in bitmap
+    assert Slot(date_iso="2026-06-01", facility_id=134) not in bitmap
+    assert not CalendarBitmap.from_slots([])
+
+
+def test_diff_matches_set_difference_across_different_bases() -> None:
+    prev, cur = CalendarBitmap.from_slots(PREVIOUS), CalendarBitmap.from_slots(CURRENT)
+
+    assert (cur - prev).to_slots() == CURRENT - PREVIOUS
+    assert (prev - cur).to_slots() == PREVIOUS - CURRENT
+    assert (cur & prev).to_slots() == CURRENT & PREVIOUS
+    assert (cur | prev).to_slots() == CURRENT | PREVIOUS
+    assert (cur | prev) - prev == cur - prev
+    assert diff_slots(PREVIOUS, CURRENT) == (CURRENT - PREVIOUS, PREVIOUS - CURRENT)
+
+
+def test_state_file_format_roundtrip(tmp_path) -> None:
+    path = tmp_path / "state.json"
+    save_slots(str(path), CURRENT)
+    stored = json.loads(path.read_text(encoding="utf-8"))["slots"]
+
+    bitmap = CalendarBitmap.from_state(stored)
+    assert bitmap.to_state() == stored
+    assert bitmap == CalendarBitmap.from_slots(CURRENT)
+
+
+def test_diff_falls_back_to_sets_for_non_dates() -> None:
+    broken = _slots(("not-a-date", 1))
+
+    assert diff_slots(broken, CURRENT) == (CURRENT, broken)
+
+
+def test_benchmark_runs() -> None:
+    result = benchmark(accounts=2, facilities=1, days=30, rounds=1)
+
+    assert result["slots"] > 0
+    assert result["bitmap_diff"] > 0
+
+
+def test_diff_falls_back_to_sets_for_generators() -> None:
+    previous = [Slot("not-a-date", 1), Slot("2030-01-01", 1)]
+    current = [Slot("2030-01-01", 1), Slot("2030-01-02", 1)]
+
+    assert diff_slots((s for s in previous), (s for s in current)) == ({Slot("2030-01-02", 1)}, {Slot("not-a-date", 1)})
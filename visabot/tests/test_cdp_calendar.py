@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from visabot import cdp_calendar
+from visabot.cdp_calendar import CdpChannel, CdpError, read_calendar_cdp
+from visabot.config import Settings
+from visabot.domain import Slot
+from visabot.selenium_provider import CalendarProgress
+from visabot.worker import _run_check_once
+
+
+class _FakeWebSocket:
+    """Отвечает на каждую команду событием и ответом с тем же id."""
+
+    def __init__(self, results: list[dict]) -> None:
+        self.results = results
+        self.sent: list[dict] = []
+        self._inbox: list[str] = []
+
+    def settimeout(self, timeout: float) -> None:
+        pass
+
+    def send(self, data: str) -> None:
+        message = json.loads(data)
+        self.sent.append(message)
+        self._inbox.append(json.dumps({"method": "Runtime.consoleAPICalled", "params": {}}))
+        self._inbox.append(json.dumps({"id": message["id"], **self.results.pop(0)}))
+
+    def recv(self) -> str:
+        return self._inbox.pop(0)
+
+    def close(self) -> None:
+        pass
+
+
+def _channel(*results: dict) -> tuple[CdpChannel, _FakeWebSocket]:
+    ws = _FakeWebSocket(list(results))
+    with patch.object(cdp_calendar.websocket, "create_connection", return_value=ws):
+        return CdpChannel("ws://127.0.0.1:9222/devtools/page/T1"), ws
+
+
+def _value(value) -> dict:
+    return {"result": {"result": {"type": "object", "value": value}}}
+
+
+def test_call_skips_events_and_returns_matching_response() -> None:
+    channel, ws = _channel(_value([1, 2]))
+
+    assert channel.evaluate("[1, 2]") == [1, 2]
+    assert ws.sent[0]["method"] == "Runtime.evaluate"
+    assert ws.sent[0]["params"]["returnByValue"] is True
+
+
+def test_js_exception_becomes_cdp_error() -> None:
+    channel, _ = _channel({"result": {"exceptionDetails": {"text": "Uncaught", "exception": {"description": "boom"}}}})
+
+    with pytest.raises(CdpError, match="boom"):
+        channel.evaluate("throw new Error('boom')")
+
+
+def test_read_calendar_pages_months_until_limit() -> None:
+    channel = MagicMock()
+    channel.evaluate.side_effect = [
+        [{"month": "January", "year": "2030", "days": ["3"]}, {"month": "February", "year": "2030", "days": []}],
+        True,
+        [{"month": "February", "year": "2030", "days": []}, {"month": "March", "year": "2030", "days": ["7", "x"]}],
+        True,
+    ]
+    progress = CalendarProgress()
+
+    slots = read_calendar_cdp(channel, facility_id=134, months_ahead=2, progress=progress)
+
+    assert slots == {Slot("2030-01-03", 134), Slot("2030-03-07", 134)}
+    assert progress.months_read == 2
+
+
+def test_closed_calendar_is_an_error() -> None:
+    channel = MagicMock()
+    channel.evaluate.return_value = []
+
+    with pytest.raises(CdpError, match="not open"):
+        read_calendar_cdp(channel, facility_id=134)
+
+
+def test_for_driver_connects_to_the_drivers_tab() -> None:
+    driver = MagicMock()
+    driver.capabilities = {"goog:chromeOptions": {"debuggerAddress": "localhost:9222"}}
+    driver.current_window_handle = "T2"
+    targets = [
+        {"id": "T1", "webSocketDebuggerUrl": "ws://localhost:9222/devtools/page/T1"},
+        {"id": "T2", "webSocketDebuggerUrl": "ws://localhost:9222/devtools/page/T2"},
+    ]
+
+    with (
+        patch("visabot.cdp_calendar.httpx.get", return_value=MagicMock(json=lambda: targets)),
+        patch.object(cdp_calendar.websocket, "create_connection", return_value=_FakeWebSocket([])) as connect,
+    ):
+        CdpChannel.for_driver(driver)
+
+    assert connect.call_args.args[0] == "ws://localhost:9222/devtools/page/T2"
+
+
+def test_worker_falls_back_to_selenium_when_devtools_fails() -> None:
+    settings = Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        cdp_calendar=True,
+        state_file=":memory:",
+    )
+    slots = {Slot("2030-01-01", 1)}
+
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()),
+        patch("visabot.worker.log_in"),
+        patch("visabot.worker.open_appointments_calendar"),
+        patch("visabot.worker.read_calendar_via_devtools", side_effect=CdpError("no debuggerAddress")) as cdp,
+        patch("visabot.worker.read_calendar", return_value=slots) as selenium_read,
+    ):
+        assert _run_check_once(settings) == slots
+
+    assert cdp.call_count == 1
+    assert selenium_read.call_args.kwargs["progress"] is cdp.call_args.kwargs["progress"]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from visabot.circuit_breaker import CircuitBreaker, CircuitState
+from visabot.config import Settings
+from visabot.domain import BusyError, Slot
+from visabot.runtime import WorkerRuntime
+from visabot.worker import run_check_once
+
+
+def test_breaker_opens_after_threshold_and_allows_single_probe(clock) -> None:
+    breaker = CircuitBreaker("ru-kz", failure_threshold=2, cooldown_seconds=60, clock=clock)
+
+    assert breaker.record_failure() is None
+    assert breaker.record_failure() == (CircuitState.CLOSED, CircuitState.OPEN)
+    assert not breaker.allow()
+
+    clock.now = 60
+    assert breaker.allow()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow()  # пробная проверка уже идёт
+
+    assert breaker.record_failure() == (CircuitState.HALF_OPEN, CircuitState.OPEN)
+    clock.now = 119
+    assert not breaker.allow()
+    clock.now = 120
+    assert breaker.allow()
+    assert breaker.record_success() == (CircuitState.HALF_OPEN, CircuitState.CLOSED)
+    assert breaker.allow()
+
+
+def test_lost_probe_does_not_keep_breaker_half_open(clock) -> None:
+    breaker = CircuitBreaker("ru-kz", failure_threshold=1, cooldown_seconds=60, clock=clock)
+    breaker.record_failure()
+    clock.now = 60
+    assert breaker.allow()
+
+    breaker.abandon_probe()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow()
+
+    # Проба зависла и так и не отчиталась: через cooldown пропускаем следующую.
+    clock.now = 119
+    assert not breaker.allow()
+    clock.now = 120
+    assert breaker.allow()
+
+
+def test_interrupted_probe_check_is_abandoned() -> None:
+    settings = _settings()
+    runtime = WorkerRuntime()
+    breaker = runtime.breaker_for("ru-kz", failure_threshold=2, cooldown_seconds=0)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", side_effect=KeyboardInterrupt),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        run_check_once(settings, runtime=runtime)
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow()
+
+
+def _settings() -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1", "2"),
+        telegram_admin_chat_id="999",
+        check_retry_attempts=1,
+        circuit_breaker_threshold=2,
+        circuit_breaker_cooldown_seconds=600,
+        state_file=":memory:",
+    )
+
+
+def test_open_breaker_skips_checks_and_reports_state_changes_once() -> None:
+    settings = _settings()
+    runtime = WorkerRuntime()
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", side_effect=BusyError("busy")) as check,
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        for _ in range(5):
+            run_check_once(settings, runtime=runtime)
+
+        # Две реальные проверки, затем предохранитель разомкнут и браузер больше не запускается.
+        assert check.call_count == 2
+        texts = [c.kwargs["text"] for c in send_msg.call_args_list]
+        assert all(c.kwargs["chat_id"] == "999" for c in send_msg.call_args_list)
+        assert sum("разомкнут" in t for t in texts) == 1
+        assert len(texts) == 2  # busy-сообщение за первую неудачу + смена состояния
+
+
+def test_failed_probe_does_not_page_admin_again() -> None:
+    settings = _settings()
+    runtime = WorkerRuntime()
+    breaker = runtime.breaker_for("ru-kz", failure_threshold=2, cooldown_seconds=0)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", side_effect=BusyError("busy")),
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        for _ in range(3):
+            run_check_once(settings, runtime=runtime)
+
+    assert breaker.state == CircuitState.OPEN
+    send_msg.assert_not_called()
+
+
+def test_successful_probe_closes_breaker() -> None:
+    settings = _settings()
+    runtime = WorkerRuntime()
+    breaker = runtime.breaker_for("ru-kz", failure_threshold=2, cooldown_seconds=0)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", return_value={Slot(date_iso="2025-01-01", facility_id=1)}),
+        patch("visabot.worker.load_slots", return_value=set()),
+        patch("visabot.worker.save_slots"),
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        run_check_once(settings, runtime=runtime)
+
+    assert breaker.state == CircuitState.CLOSED
+    assert any("замкнут" in c.kwargs["text"] for c in send_msg.call_args_list)
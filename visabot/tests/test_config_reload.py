@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+from dataclasses import replace
+
+import pytest
+
+from visabot.config import load_settings
+from visabot.config_reload import ConfigReloader, changed_fields
+from visabot.runtime import WorkerRuntime
+from visabot.worker import _WorkerComponents
+
+
+_BASE = (
+    "VISA_USERNAME=u\n"
+    "VISA_PASSWORD=p\n"
+    "COUNTRY_CODE=ru-kz\n"
+    "SCHEDULE_ID=1\n"
+    "APPOINTMENTS_CONSULATE_APPOINTMENT_FACILITY_ID=134\n"
+    "TELEGRAM_BOT_TOKEN=t\n"
+)
+
+
+@pytest.fixture
+def config_file(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setattr(os, "environ", {})
+    path = tmp_path / "kzvisabot.env"
+    path.write_text(_BASE + "TELEGRAM_CHAT_ID=1\nCHECK_INTERVAL_SECONDS=300\n")
+    monkeypatch.setenv("CONFIG_FILE", str(path))
+    return path
+
+
+def _touch(path, text: str) -> None:
+    path.write_text(text)
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+
+def test_config_file_overrides_process_env(config_file, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CHECK_INTERVAL_SECONDS", "60")
+
+    settings = load_settings(dotenv_path=None)
+
+    assert settings.check_interval_seconds == 300
+    assert settings.config_sources == (str(config_file),)
+    # os.environ не меняется — значения только из файла.
+    assert os.environ["CHECK_INTERVAL_SECONDS"] == "60"
+
+
+def test_file_change_is_picked_up_and_validated(config_file) -> None:
+    settings = load_settings(dotenv_path=None)
+    reloader = ConfigReloader(lambda: load_settings(dotenv_path=None))
+    reloader.watch(settings)
+
+    assert reloader.poll(settings) is None
+
+    _touch(config_file, _BASE + "TELEGRAM_CHAT_ID=1,2\nCHECK_INTERVAL_SECONDS=120\n")
+    new = reloader.poll(settings)
+    assert new is not None
+    assert changed_fields(settings, new) == {"telegram_chat_ids", "check_interval_seconds"}
+
+    # Невалидный конфиг не применяется — остаёмся на последних рабочих настройках.
+    _touch(config_file, _BASE + "TELEGRAM_CHAT_ID=abc\n")
+    assert reloader.poll(new) is None
+    assert reloader.poll(new) is None
+
+
+def test_sighup_request_triggers_reload_and_wakes_worker(config_file) -> None:
+    settings = load_settings(dotenv_path=None)
+    runtime = WorkerRuntime()
+    reloader = ConfigReloader(
+        lambda: replace(settings, check_interval_seconds=10),
+        on_request=runtime.wake,
+    )
+    reloader.watch(settings)
+
+    reloader.request()
+
+    assert runtime.wait_for_tick(0) is False  # разбудили, но это не /checknow
+    new = reloader.poll(settings)
+    assert new is not None and new.check_interval_seconds == 10
+
+
+def test_only_changed_components_are_rebuilt(config_file) -> None:
+    settings = load_settings(dotenv_path=None)
+    runtime = WorkerRuntime()
+    breaker = runtime.breaker_for("ru-kz", failure_threshold=5, cooldown_seconds=900)
+    components = _WorkerComponents(settings, runtime)
+
+    new = replace(settings, check_interval_seconds=60)
+    components.apply(settings, new, changed_fields(settings, new))
+    assert runtime.breakers == {"ru-kz": breaker}
+    assert components.settings is new
+
+    newer = replace(new, circuit_breaker_threshold=2)
+    components.apply(new, newer, changed_fields(new, newer))
+    assert runtime.breakers == {}
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from visabot.config import Settings
+from visabot.deadline import Deadline
+from visabot.domain import DeadlineExceeded
+from visabot.selenium_provider import _wait_until
+from visabot.worker import _run_check_once_with_retry
+
+
+def test_timeout_is_capped_by_remaining_budget(clock) -> None:
+    deadline = Deadline(30, clock=clock)
+
+    assert deadline.timeout(20) == 20
+    clock.now += 25
+    assert deadline.timeout(20) == 5
+
+    clock.now += 5
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(20, "calendar")
+
+
+def test_unlimited_deadline_never_expires() -> None:
+    deadline = Deadline(None)
+
+    assert not deadline.expired()
+    assert deadline.timeout(20) == 20
+
+
+def test_wait_cut_short_by_deadline_raises_deadline_exceeded() -> None:
+    with pytest.raises(DeadlineExceeded):
+        _wait_until(MagicMock(), Deadline(0.05), 30, lambda driver: False, "calendar")
+
+
+def test_deadline_exceeded_is_not_retried_by_phase_or_check_retries() -> None:
+    settings = Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        check_retry_attempts=3,
+        calendar_retry_attempts=3,
+        check_deadline_seconds=60,
+        state_file=":memory:",
+    )
+
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()) as start,
+        patch("visabot.worker.log_in"),
+        patch("visabot.worker.open_appointments_calendar"),
+        patch("visabot.worker.read_calendar", side_effect=DeadlineExceeded("calendar")) as read,
+        patch("visabot.worker.session_is_alive", return_value=True),
+    ):
+        with pytest.raises(DeadlineExceeded):
+            _run_check_once_with_retry(settings)
+
+    assert start.call_count == 1
+    assert read.call_count == 1
+    assert read.call_args.kwargs["deadline"].seconds == 60
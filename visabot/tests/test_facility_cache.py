@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from visabot.config import Account, Settings
+from visabot.domain import BusyError, Slot
+from visabot.facility_cache import FacilityCache
+from visabot.slot_providers import CachedSlotProvider
+
+
+def _account(schedule_id: str, facility_id: int = 134) -> Account:
+    return Account(
+        visa_username=f"u{schedule_id}",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id=schedule_id,
+        facility_id=facility_id,
+    )
+
+
+def _settings() -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="1",
+        facility_id=134,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        state_file=":memory:",
+    )
+
+
+class _CountingProvider:
+    def __init__(self, slots: set[Slot]) -> None:
+        self.slots = slots
+        self.calls: list[str] = []
+
+    def fetch(self, settings, account, browser=None):
+        self.calls.append(account.key)
+        return set(self.slots)
+
+
+def test_fresh_result_is_shared_until_ttl_expires(clock) -> None:
+    cache = FacilityCache(60, clock=clock)
+    slots = {Slot("2030-01-01", 134)}
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return slots
+
+    assert cache.get_or_fetch("k", fetch) == slots
+    clock.now = 59
+    assert cache.get_or_fetch("k", fetch) == slots
+    assert len(calls) == 1
+
+    clock.now = 60
+    cache.get_or_fetch("k", fetch)
+    assert len(calls) == 2
+
+
+def test_concurrent_reads_share_one_fetch() -> None:
+    cache = FacilityCache(60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {Slot("2030-01-01", 134)}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{Slot("2030-01-01", 134)}] * 4
+
+
+def test_errors_are_shared_but_not_cached() -> None:
+    cache = FacilityCache(60)
+
+    def busy():
+        raise BusyError("busy")
+
+    with pytest.raises(BusyError):
+        cache.get_or_fetch("k", busy)
+
+    assert cache.get_or_fetch("k", lambda: {Slot("2030-01-01", 134)}) == {Slot("2030-01-01", 134)}
+
+
+def test_provider_reads_each_facility_once() -> None:
+    inner = _CountingProvider({Slot("2030-01-01", 134)})
+    hits = []
+    provider = CachedSlotProvider(inner, FacilityCache(60), on_hit=lambda account: hits.append(account.key))
+    a, b, other = _account("1"), _account("2"), _account("3", facility_id=135)
+
+    for account in (a, b, other):
+        assert provider.fetch(_settings(), account) == {Slot("2030-01-01", 134)}
+
+    assert inner.calls == [a.key, other.key]
+    assert hits == [b.key]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import httpx
+
+from visabot import selenium_provider
+from visabot.load_test import load_test_settings, run_load_test
+from visabot.stand_in_site import StandInSite
+
+
+def test_stand_in_site_login_and_appointment_flow() -> None:
+    with StandInSite(facilities=(134, 135), busy_rate=0.0, density=0.5) as site:
+        with httpx.Client(base_url=site.url) as client:
+            r = client.get("/ru-kz/niv/schedule/1/appointment")
+            assert r.status_code == 302
+            assert r.headers["location"] == "/ru-kz/niv/users/sign_in"
+
+            r = client.get("/ru-kz/niv/users/sign_in")
+            assert 'name="user[email]"' in r.text and 'id="sign_in_form"' in r.text
+
+            r = client.post("/ru-kz/niv/users/sign_in", data={"user[email]": "a", "user[password]": "b"})
+            assert r.status_code == 302
+            assert client.get("/ru-kz/niv/users/sign_in").status_code == 302
+
+            page = client.get("/ru-kz/niv/schedule/1/appointment").text
+            assert 'id="appointments_consulate_appointment_facility_id"' in page
+            assert '<option value="135">' in page
+            assert site.available_dates(134)[0] in page
+            assert 'id="consulate_date_time_not_available" class="hidden"' in page
+
+    assert site.logins == 1
+
+
+def test_stand_in_site_busy_page() -> None:
+    with StandInSite(busy_rate=1.0) as site:
+        with httpx.Client(base_url=site.url) as client:
+            client.post("/ru-kz/niv/users/sign_in")
+            page = client.get("/ru-kz/niv/schedule/1/appointment").text
+
+    assert 'id="consulate_date_time_not_available" class=""' in page
+
+
+def test_base_url_can_point_to_stand_in_site(tmp_path) -> None:
+    settings = load_test_settings(str(tmp_path), accounts=1, facilities=(134,), base_url="http://127.0.0.1:8000")
+
+    assert selenium_provider.build_sign_in_url(settings.base_url, "ru-kz") == "http://127.0.0.1:8000/ru-kz/niv/users/sign_in"
+    assert load_test_settings(str(tmp_path), accounts=1, facilities=(134,)).base_url == "https://ais.usvisa-info.com"
+
+
+def test_load_test_reports_throughput_and_failures_without_overlapping_accounts(tmp_path) -> None:
+    settings = load_test_settings(str(tmp_path), accounts=3, facilities=(134,))
+    in_flight: set[str] = set()
+    overlaps = []
+    lock = threading.Lock()
+
+    def check(settings, account, *, runtime) -> None:
+        with lock:
+            if account.key in in_flight:
+                overlaps.append(account.key)
+            in_flight.add(account.key)
+        time.sleep(0.01)
+        with lock:
+            in_flight.discard(account.key)
+        if account.schedule_id.endswith("2"):
+            raise RuntimeError("calendar not found")
+        runtime.record_check(account.key, outcome="busy" if account.schedule_id.endswith("1") else "ok")
+
+    result = run_load_test(settings, minutes=0.005, concurrency=3, check=check, sample_interval=0.05)
+
+    assert overlaps == []
+    assert result["checks"] > 3
+    assert set(result["outcomes"]) == {"ok", "busy", "RuntimeError"}
+    assert result["latency_p50"] <= result["latency_p99"] <= result["latency_max"]
+    assert result["peak_worker_rss_bytes"] > 0
+
+
+def test_check_that_records_nothing_is_skipped_not_previous_outcome(tmp_path) -> None:
+    settings = load_test_settings(str(tmp_path), accounts=1, facilities=(134,))
+    calls = []
+
+    def check(settings, account, *, runtime) -> None:
+        calls.append(1)
+        time.sleep(0.01)
+        # Первая проверка успешна, остальные (как пропуск предохранителем) ничего не пишут.
+        if len(calls) == 1:
+            runtime.record_check(account.key, outcome="ok")
+
+    result = run_load_test(settings, minutes=0.002, concurrency=1, check=check, sample_interval=0.05)
+
+    assert result["outcomes"]["ok"] == 1
+    assert result["outcomes"]["skipped"] == result["checks"] - 1 > 0
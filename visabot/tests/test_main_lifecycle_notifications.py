@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 from unittest.mock import patch
 
 import pytest
@@ -26,6 +27,10 @@ def _settings() -> Settings:
     )
 
 
+def _args(*, once: bool) -> argparse.Namespace:
+    return argparse.Namespace(once=once, profile=False, record=None, replay=None, replay_speed=1.0)
+
+
 def test_main_sends_start_and_shutdown_messages_in_once_mode() -> None:
     settings = _settings()
 
@@ -33,10 +38,10 @@ def test_main_sends_start_and_shutdown_messages_in_once_mode() -> None:
         patch("main.load_settings", return_value=settings),
         patch("main.run_check_once") as run_once,
         patch("main._send_status_message") as send_status,
-        patch("main.argparse.ArgumentParser.parse_args", return_value=type("Args", (), {"once": True})()),
+        patch("main.argparse.ArgumentParser.parse_args", return_value=_args(once=True)),
     ):
         assert main.main() == 0
-        run_once.assert_called_once_with(settings)
+        run_once.assert_called_once_with(settings, provider=None)
 
         # startup + shutdown
         assert send_status.call_count == 2
@@ -51,7 +56,7 @@ def test_main_sends_crash_and_shutdown_messages_on_error() -> None:
         patch("main.load_settings", return_value=settings),
         patch("main.run_forever", side_effect=RuntimeError("boom")),
         patch("main._send_status_message") as send_status,
-        patch("main.argparse.ArgumentParser.parse_args", return_value=type("Args", (), {"once": False})()),
+        patch("main.argparse.ArgumentParser.parse_args", return_value=_args(once=False)),
     ):
         with pytest.raises(RuntimeError):
             main.main()
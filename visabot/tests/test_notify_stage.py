@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import patch
+
+from visabot.config import Settings
+from visabot.domain import Slot
+from visabot.metrics import METRICS
+from visabot.notify_stage import NotifyStage
+from visabot.worker import run_check_once
+
+
+def _settings() -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1", "2"),
+        check_retry_attempts=1,
+        state_file=":memory:",
+    )
+
+
+def test_slow_telegram_does_not_delay_the_check() -> None:
+    stage = NotifyStage()
+    stage.start()
+    release = threading.Event()
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", return_value={Slot(date_iso="2025-01-01", facility_id=1)}),
+        patch("visabot.worker.load_slots", return_value={Slot(date_iso="2025-01-01", facility_id=1)}),
+        patch("visabot.worker.save_slots"),
+        patch("visabot.worker.send_telegram_message", side_effect=lambda **_: release.wait(5)) as send_msg,
+    ):
+        started = time.monotonic()
+        run_check_once(_settings(), notify_stage=stage)
+        assert time.monotonic() - started < 1.0
+
+        release.set()
+        stage.stop()
+        stage.join(5)
+        assert send_msg.call_count == 2
+
+    assert METRICS.get("notify_lag_seconds") >= 0
+
+
+def test_full_queue_applies_backpressure_then_drops() -> None:
+    stage = NotifyStage(maxsize=1, put_timeout=0.05)  # поток не запущен — очередь не разбирается
+
+    assert stage.submit("first", lambda: None) is True
+    started = time.monotonic()
+    assert stage.submit("second", lambda: None) is False
+    assert time.monotonic() - started >= 0.05
+    assert stage.depth == 1
+    assert stage.dropped == 1
+
+
+def test_stop_sends_queued_messages_first() -> None:
+    stage = NotifyStage()
+    sent = []
+    for i in range(3):
+        stage.submit(f"message {i}", lambda i=i: sent.append(i))
+    stage.start()
+
+    stage.stop(timeout=5)
+
+    assert sent == [0, 1, 2]
+    assert not stage.is_alive()
+    assert stage.submit("late", lambda: sent.append("late")) is False
+
+
+def test_failed_sends_are_counted_separately_from_sent() -> None:
+    METRICS.reset()
+    stage = NotifyStage()
+
+    def fail() -> None:
+        raise RuntimeError("Telegram is down")
+
+    stage.submit("ok", lambda: None)
+    stage.submit("broken", fail)
+    stage.start()
+    stage.stop(timeout=5)
+
+    assert METRICS.get("notify_sent") == 1
+    assert METRICS.get("notify_failed") == 1
+
+
+def test_stop_is_bounded_when_telegram_hangs() -> None:
+    stage = NotifyStage(maxsize=2)
+    release = threading.Event()
+    stage.submit("stuck", lambda: release.wait(5))
+    stage.submit("queued", lambda: None)
+    stage.start()
+
+    started = time.monotonic()
+    stage.stop(timeout=0.2)
+    assert time.monotonic() - started < 1.0
+    assert stage.dropped == 1
+
+    release.set()
+    stage.join(5)
+    assert not stage.is_alive()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+from visabot.config import Settings
+from visabot.domain import Slot
+from visabot.outbox import FileOutbox, QueueOutbox, deliver_outbox, new_outbox_messages
+from visabot.state_file import load_outbox, load_slots, save_slots
+from visabot.work_queue import SqliteWorkQueue
+from visabot.worker import run_check_once
+
+SLOT = Slot(date_iso="2025-01-01", facility_id=1)
+
+
+def _settings(state_file: str) -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1", "2", "3"),
+        check_retry_attempts=1,
+        state_file=state_file,
+    )
+
+
+def test_outbox_is_saved_atomically_with_slots_and_survives_later_saves(tmp_path) -> None:
+    path = str(tmp_path / "state.json")
+    messages = new_outbox_messages([("1", "hi"), ("2", "hi")])
+
+    save_slots(path, {SLOT}, messages)
+    save_slots(path, set())
+
+    assert load_slots(path) == set()
+    assert [m.chat_id for m in load_outbox(path)] == ["1", "2"]
+
+
+def test_partial_failure_keeps_only_failed_recipients(tmp_path) -> None:
+    path = str(tmp_path / "state.json")
+    save_slots(path, {SLOT}, new_outbox_messages([("1", "a"), ("2", "a"), ("3", "a")]))
+    sent: list[str] = []
+
+    def send(chat_id: str, text: str) -> None:
+        if chat_id == "2":
+            raise RuntimeError("429")
+        sent.append(chat_id)
+
+    assert deliver_outbox(FileOutbox(path), send) == (2, 1)
+    pending = load_outbox(path)
+    assert [(m.chat_id, m.attempts) for m in pending] == [("2", 1)]
+
+    assert deliver_outbox(FileOutbox(path), lambda chat_id, text: sent.append(chat_id)) == (1, 0)
+    assert sent == ["1", "3", "2"]
+    assert load_outbox(path) == []
+    assert load_slots(path) == {SLOT}
+
+
+def test_failed_chat_gets_alert_on_next_check_without_duplicates_for_others(tmp_path) -> None:
+    settings = _settings(str(tmp_path / "state.json"))
+
+    def flaky(*, bot_token: str, chat_id: str, text: str) -> None:
+        if chat_id == "2" and "Появились" in text:
+            raise RuntimeError("network")
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", return_value={SLOT}),
+        patch("visabot.worker.send_telegram_message", side_effect=flaky),
+    ):
+        run_check_once(settings)  # частичный сбой Telegram больше не роняет проверку
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", return_value={SLOT}),
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        run_check_once(settings)
+
+    alerts = [c.kwargs["chat_id"] for c in send_msg.call_args_list if "Появились" in c.kwargs["text"]]
+    assert alerts == ["2"]
+
+
+def test_queue_outbox_is_leased_to_one_replica(tmp_path) -> None:
+    db = str(tmp_path / "queue.sqlite")
+    a = SqliteWorkQueue(db, worker_id="a", lease_seconds=60)
+    b = SqliteWorkQueue(db, worker_id="b", lease_seconds=60)
+    a.save_slots("k", {SLOT}, new_outbox_messages([("1", "x")]))
+
+    assert [m.chat_id for m in a.claim_outbox(["k"])] == ["1"]
+    assert b.claim_outbox(["k"]) == []
+
+    sent: list[str] = []
+    assert deliver_outbox(QueueOutbox(b, ["k"]), lambda chat_id, text: sent.append(chat_id)) == (0, 0)
+    assert sent == []
+
+
+def test_outbox_lease_is_shorter_than_check_lease(tmp_path) -> None:
+    db = str(tmp_path / "queue.sqlite")
+    dead = SqliteWorkQueue(db, worker_id="dead", lease_seconds=900, outbox_lease_seconds=30)
+    alive = SqliteWorkQueue(db, worker_id="alive", lease_seconds=900, outbox_lease_seconds=30)
+    dead.save_slots("k", {SLOT}, new_outbox_messages([("1", "x")], now=1000.0))
+    assert dead.claim_outbox(["k"], now=1000.0)
+
+    # Реплика умерла посреди доставки: через 30 с, а не через 15 минут, сообщение берёт другая.
+    assert alive.claim_outbox(["k"], now=1029.0) == []
+    assert [m.chat_id for m in alive.claim_outbox(["k"], now=1030.0)] == ["1"]
+
+
+def test_slow_pass_skips_messages_reclaimed_after_its_lease_expired(tmp_path) -> None:
+    db = str(tmp_path / "queue.sqlite")
+    slow = SqliteWorkQueue(db, worker_id="slow", lease_seconds=900, outbox_lease_seconds=30)
+    other = SqliteWorkQueue(db, worker_id="other", lease_seconds=900, outbox_lease_seconds=30)
+    slow.save_slots("k", {SLOT}, new_outbox_messages([("1", "x"), ("2", "y")]))
+    claimed = slow.claim_outbox(["k"], now=time.time() - 60)  # аренда пачки уже истекла
+
+    # Аренда медленной реплики истекла посреди прохода, и пачку забрала другая.
+    assert [m.chat_id for m in other.claim_outbox(["k"])] == ["1", "2"]
+    sent: list[str] = []
+    store = QueueOutbox(slow, ["k"])
+    assert deliver_outbox(store, lambda chat_id, text: sent.append(chat_id), extra=claimed) == (0, 0)
+    assert sent == []
+
+    assert deliver_outbox(QueueOutbox(other, ["k"]), lambda chat_id, text: sent.append(chat_id), extra=claimed) == (2, 0)
+    assert sent == ["1", "2"]
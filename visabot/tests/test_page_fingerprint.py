@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+from tenacity import wait_none
+
+from visabot.config import Settings
+from visabot.domain import PageStructureError
+from visabot.selenium_provider import check_page_structure, log_in
+from visabot.worker import _run_check_once_with_retry
+
+
+class _FakeDriver:
+    """find_elements по заданному набору локаторов; снимок страницы пишется в tmp."""
+
+    def __init__(self, present: set[str]) -> None:
+        self.present = present
+        self.page_source = "<html><body>redesigned</body></html>"
+        self.screenshots: list[str] = []
+
+    def find_elements(self, by, value):
+        return [object()] if value in self.present else []
+
+    def save_screenshot(self, path: str) -> bool:
+        self.screenshots.append(path)
+        return True
+
+
+_SIGN_IN = {
+    "user[email]",
+    "user[password]",
+    '//*[@id="sign_in_form"]/div[3]/label/div',
+    '//*[@id="sign_in_form"]/p[1]/input',
+}
+
+
+def test_page_with_all_landmarks_passes_immediately() -> None:
+    started = time.monotonic()
+    check_page_structure(_FakeDriver(_SIGN_IN), "sign_in", grace_seconds=5)
+    assert time.monotonic() - started < 1
+
+
+def test_busy_container_is_enough_for_appointments_page() -> None:
+    driver = _FakeDriver({"appointments_consulate_appointment_facility_id", "consulate_date_time_not_available"})
+    check_page_structure(driver, "appointments", grace_seconds=0)
+
+
+def test_missing_landmark_raises_with_snapshot(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    driver = _FakeDriver(_SIGN_IN - {'//*[@id="sign_in_form"]/p[1]/input'})
+
+    with pytest.raises(PageStructureError) as excinfo:
+        check_page_structure(driver, "sign_in", grace_seconds=0)
+
+    error = excinfo.value
+    assert error.page == "sign_in"
+    assert error.missing == ['//*[@id="sign_in_form"]/p[1]/input']
+    assert error.snapshot is not None
+    assert (tmp_path / f"{error.snapshot}.html").read_text(encoding="utf-8") == driver.page_source
+    assert driver.screenshots == [f"{error.snapshot}.png"]
+
+
+def test_slow_sign_in_page_is_a_timeout_not_a_structure_change() -> None:
+    driver = _FakeDriver(set())
+
+    with (
+        patch("visabot.selenium_provider._get"),
+        patch("visabot.selenium_provider._wait_until", side_effect=TimeoutException("sign-in form")) as wait,
+        pytest.raises(TimeoutException),
+    ):
+        log_in(driver, sign_in_url="https://example.test/ru-kz/niv/users/sign_in", username="u", password="p")
+
+    # Форму ждём полный wait_seconds, как раньше.
+    assert wait.call_args.args[2] == 60
+
+
+def test_structure_error_is_not_retried() -> None:
+    settings = Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        check_retry_attempts=3,
+        facility_retry_attempts=3,
+        state_file=":memory:",
+    )
+    error = PageStructureError("appointments", ["appointments_consulate_appointment_facility_id"])
+
+    with (
+        patch("visabot.worker._PHASE_RETRY_WAIT_SECONDS", 0),
+        patch("visabot.worker.wait_exponential", return_value=wait_none()),
+        patch("visabot.worker.start_driver", return_value=MagicMock()) as start,
+        patch("visabot.worker.log_in"),
+        patch("visabot.worker.open_appointments_calendar", side_effect=error) as open_calendar,
+        patch("visabot.worker.session_is_alive", return_value=True),
+    ):
+        with pytest.raises(PageStructureError):
+            _run_check_once_with_retry(settings)
+
+    assert open_calendar.call_count == 1
+    assert start.call_count == 1
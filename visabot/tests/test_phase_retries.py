@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException
+from tenacity import wait_none
+
+from visabot.config import Settings
+from visabot.domain import LoggedOutError, SessionLostError, Slot
+from visabot.selenium_provider import CalendarProgress, read_calendar
+from visabot.worker import _run_check_once, _run_check_once_with_retry
+
+
+def _settings(**overrides) -> Settings:
+    values = dict(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        check_retry_attempts=2,
+        state_file=":memory:",
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+@pytest.fixture(autouse=True)
+def _no_retry_sleep():
+    with (
+        patch("visabot.worker._PHASE_RETRY_WAIT_SECONDS", 0),
+        patch("visabot.worker.wait_exponential", return_value=wait_none()),
+    ):
+        yield
+
+
+def test_calendar_failure_retries_only_calendar_phase() -> None:
+    slots = {Slot(date_iso="2025-01-01", facility_id=1)}
+
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()) as start,
+        patch("visabot.worker.log_in") as log_in,
+        patch("visabot.worker.open_appointments_calendar") as open_calendar,
+        patch("visabot.worker.read_calendar", side_effect=[RuntimeError("calendar timeout"), slots]) as read,
+        patch("visabot.worker.session_is_alive", return_value=True),
+    ):
+        assert _run_check_once(_settings()) == slots
+
+    assert start.call_count == 1
+    assert log_in.call_count == 1
+    assert open_calendar.call_count == 1
+    assert read.call_count == 2
+
+
+def test_expired_login_is_redone_on_the_same_browser() -> None:
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()) as start,
+        patch("visabot.worker.log_in") as log_in,
+        patch("visabot.worker.open_appointments_calendar", side_effect=[LoggedOutError("sign_in"), None]),
+        patch("visabot.worker.read_calendar", return_value=set()),
+    ):
+        _run_check_once(_settings())
+
+    assert start.call_count == 1
+    assert log_in.call_count == 2
+
+
+def test_phase_gives_up_after_configured_attempts_without_restarting_browser() -> None:
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()) as start,
+        patch("visabot.worker.log_in"),
+        patch("visabot.worker.open_appointments_calendar", side_effect=RuntimeError("no calendar")) as open_calendar,
+        patch("visabot.worker.session_is_alive", return_value=True),
+    ):
+        with pytest.raises(RuntimeError, match="no calendar"):
+            _run_check_once_with_retry(_settings(facility_retry_attempts=3))
+
+    assert open_calendar.call_count == 3
+    assert start.call_count == 1
+
+
+def test_dead_session_escalates_to_full_restart() -> None:
+    slots = {Slot(date_iso="2025-01-01", facility_id=1)}
+
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()) as start,
+        patch("visabot.worker.log_in"),
+        patch("visabot.worker.open_appointments_calendar"),
+        patch("visabot.worker.read_calendar", side_effect=[RuntimeError("disconnected"), slots]),
+        patch("visabot.worker.session_is_alive", side_effect=[False]),
+    ):
+        assert _run_check_once_with_retry(_settings()) == slots
+
+    assert start.call_count == 2
+
+
+def test_session_lost_is_not_retried_within_phase() -> None:
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()),
+        patch("visabot.worker.log_in"),
+        patch("visabot.worker.open_appointments_calendar", side_effect=SessionLostError("DevTools")) as open_calendar,
+    ):
+        with pytest.raises(SessionLostError):
+            _run_check_once(_settings(facility_retry_attempts=5))
+
+    assert open_calendar.call_count == 1
+
+
+class _Datepicker:
+    """Datepicker на шесть месяцев; `close_on_click` — на каком клике «вперёд» он падает и закрывается."""
+
+    _MONTHS = ["January", "February", "March", "April", "May", "June", "July"]
+
+    def __init__(self, close_on_click: int) -> None:
+        self.open = True
+        self.month = 0
+        self.clicks = 0
+        self.close_on_click = close_on_click
+
+    def _group(self):
+        day = MagicMock()
+        day.find_element.return_value.text = "1"
+        group = MagicMock()
+        group.find_element.side_effect = lambda by, name: MagicMock(
+            text=self._MONTHS[self.month] if name == "ui-datepicker-month" else "2030"
+        )
+        group.find_elements.return_value = [day]
+        return group
+
+    def find_elements(self, by, value):
+        if value == "ui-datepicker-group":
+            return [self._group()] if self.open else []
+        return [MagicMock()]
+
+    def find_element(self, by, value):
+        # Поле даты: клик снова открывает календарь на первом месяце.
+        return MagicMock(click=self._reopen)
+
+    def _reopen(self) -> None:
+        self.open, self.month = True, 0
+
+    def next_button(self, *args):
+        return MagicMock(click=self._next)
+
+    def _next(self) -> None:
+        self.clicks += 1
+        if self.clicks == self.close_on_click:
+            self.open = False
+            raise StaleElementReferenceException("next month")
+        self.month += 1
+
+
+def test_reopened_calendar_is_read_from_the_first_month() -> None:
+    driver = _Datepicker(close_on_click=3)
+    progress = CalendarProgress()
+
+    with (
+        patch("visabot.selenium_provider.check_page_structure"),
+        patch("visabot.selenium_provider._wait_until", side_effect=driver.next_button),
+    ):
+        with pytest.raises(StaleElementReferenceException):
+            read_calendar(driver, facility_id=1, progress=progress, deadline=MagicMock())
+        assert progress.months_read == 2
+
+        slots = read_calendar(driver, facility_id=1, progress=progress, deadline=MagicMock())
+
+    assert sorted(s.date_iso for s in slots) == [f"2030-{m:02d}-01" for m in range(1, 7)]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from visabot.config import Settings
+from visabot.metrics import METRICS
+from visabot.prelogin import PreLogin, PreparedSession
+from visabot.worker import _run_check_once, _WorkerComponents
+
+
+def _settings() -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        state_file=":memory:",
+        session_file=None,
+    )
+
+
+def _prepared(driver, seconds: float = 7.5) -> PreparedSession:
+    return PreparedSession(key="k", driver=driver, pgid=None, profile=None, seconds=seconds, prepared_at=time.time())
+
+
+def test_take_waits_for_started_preparation_and_discard_closes_leftovers() -> None:
+    release = threading.Event()
+    closed: list[str] = []
+    account_a, account_b = MagicMock(key="a"), MagicMock(key="b")
+
+    def prepare(account):
+        release.wait(1)
+        if account.key == "b":
+            raise RuntimeError("login failed")
+        return _prepared(MagicMock())
+
+    prelogin = PreLogin(prepare, lambda session: closed.append(session.key))
+    prelogin.start(account_a)
+    prelogin.start(account_a)  # повторный старт не запускает вторую подготовку
+    prelogin.start(account_b)
+    release.set()
+
+    assert prelogin.take("a") is not None
+    assert prelogin.take("a") is None
+    assert prelogin.take("b") is None
+
+    prelogin.start(account_a)
+    prelogin.discard_all()
+    assert closed == ["k"]
+
+
+def test_check_on_prepared_session_skips_start_and_login() -> None:
+    METRICS.reset()
+    driver = MagicMock()
+    with (
+        patch("visabot.worker.start_driver") as start,
+        patch("visabot.worker.log_in") as log_in,
+        patch("visabot.worker.session_is_alive", return_value=True),
+        patch("visabot.worker.open_appointments_calendar") as open_calendar,
+        patch("visabot.worker.read_calendar", return_value=set()),
+    ):
+        _run_check_once(_settings(), prepared=_prepared(driver))
+
+    start.assert_not_called()
+    log_in.assert_not_called()
+    assert open_calendar.call_args.args[0] is driver
+    driver.quit.assert_called_once()
+    assert METRICS.get("prelogin_seconds_saved") == 7.5
+
+
+def test_dead_prepared_session_falls_back_to_a_fresh_browser() -> None:
+    stale, fresh = MagicMock(), MagicMock()
+    with (
+        patch("visabot.worker.start_driver", return_value=fresh) as start,
+        patch("visabot.worker.log_in") as log_in,
+        patch("visabot.worker.session_is_alive", return_value=False),
+        patch("visabot.worker.open_appointments_calendar"),
+        patch("visabot.worker.read_calendar", return_value=set()),
+    ):
+        _run_check_once(_settings(), prepared=_prepared(stale))
+
+    stale.quit.assert_called_once()
+    start.assert_called_once()
+    log_in.assert_called_once()
+    fresh.quit.assert_called_once()
+
+
+def test_reload_rebuilds_prelogin_only_when_its_fields_change() -> None:
+    settings = _settings()
+    # apply() вызывается на заглушке: пересборки других компонентов здесь не важны.
+    components = MagicMock(next_due=0.0)
+
+    _WorkerComponents.apply(components, settings, settings, {"telegram_chat_ids", "status_digest_seconds"})
+    components._build_prelogin.assert_not_called()
+
+    _WorkerComponents.apply(components, settings, settings, {"visa_password"})
+    components._build_prelogin.assert_called_once_with(settings)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+import time
+from unittest.mock import patch
+
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+from visabot.profiling import profile_check
+
+
+def _busy_python(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_counts_webdriver_commands_and_writes_folded_stacks(tmp_path) -> None:
+    def fake_execute(connection, command, params):
+        time.sleep(0.01)
+        return {"value": None}
+
+    with patch.object(RemoteConnection, "execute", fake_execute):
+        with profile_check(str(tmp_path), interval=0.001):
+            RemoteConnection.execute(None, "get", {"url": "https://example.com"})
+            RemoteConnection.execute(None, "findElement", {})
+            RemoteConnection.execute(None, "findElement", {})
+            RemoteConnection.execute(None, "executeCdpCommand", {"cmd": "Target.createTarget", "params": {}})
+            _busy_python(0.05)
+
+        # Обёртка снята после профилирования.
+        assert RemoteConnection.execute is fake_execute
+
+    summary = json.loads((tmp_path / "profile-summary.json").read_text())
+    assert summary["webdriver_commands_total"] == 4
+    assert summary["webdriver_commands"]["findElement"]["count"] == 2
+    assert "executeCdpCommand:Target.createTarget" in summary["webdriver_commands"]
+    assert summary["webdriver_seconds"] >= 0.04
+    assert summary["samples"] > 0
+
+    folded = (tmp_path / "profile.folded").read_text().splitlines()
+    assert any("_busy_python" in line for line in folded)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import math
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from visabot.config import Settings, _parse_rate_limits
+from visabot.deadline import Deadline
+from visabot.domain import DeadlineExceeded
+from visabot.metrics import METRICS
+from visabot.rate_governor import FileTokenBucket, RateGovernor, TokenBucket
+from visabot.selenium_provider import _get
+
+
+def _settings(**overrides) -> Settings:
+    values = dict(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        state_file=":memory:",
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+def test_token_bucket_allows_burst_then_queues_callers(clock) -> None:
+    bucket = TokenBucket(60, 2, clock=clock)
+
+    assert [bucket.reserve(), bucket.reserve()] == [0, 0]
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+    clock.now += 10
+    assert bucket.reserve() == 0
+
+
+def test_file_bucket_budget_is_shared_between_instances(tmp_path, clock) -> None:
+    path = str(tmp_path / "rate-ru-kz.json")
+    first = FileTokenBucket(path, 30, 1, clock=clock)
+    second = FileTokenBucket(path, 30, 1, clock=clock)
+
+    assert first.reserve() == 0
+    assert second.reserve() == pytest.approx(2.0)
+
+
+def test_governor_uses_per_country_budget_and_counts_wait_time() -> None:
+    METRICS.reset()
+    governor = RateGovernor()
+    governor.configure(_settings(rate_limit_per_minute=0, rate_limits=(("ru-kz", 6000.0),), rate_limit_burst=1))
+    sleeps: list[float] = []
+    deadline = MagicMock(sleep=lambda seconds, what: sleeps.append(seconds), remaining=lambda: math.inf)
+
+    assert governor.acquire_for_url("https://ais.usvisa-info.com/ru-kz/niv/users/sign_in", deadline=deadline) == 0
+    waited = governor.acquire_for_url("https://ais.usvisa-info.com/ru-kz/niv/account", deadline=deadline)
+    # Для остальных стран лимита нет.
+    assert governor.acquire_for_url("https://ais.usvisa-info.com/am-am/niv/account", deadline=deadline) == 0
+
+    assert waited > 0
+    assert sleeps == [waited]
+    assert METRICS.get("rate_governor_waits") == 1
+    assert METRICS.get("rate_governor_wait_seconds") == pytest.approx(waited)
+
+
+@pytest.mark.parametrize("file_bucket", [False, True])
+def test_request_dropped_by_deadline_returns_its_token(tmp_path, file_bucket) -> None:
+    governor = RateGovernor()
+    governor.configure(
+        _settings(rate_limit_per_minute=60, rate_limit_burst=1, rate_limit_dir=str(tmp_path) if file_bucket else None)
+    )
+    assert governor.acquire("ru-kz") == 0
+
+    # Очередь ~1s, а до дедлайна меньше: запрос отменяется сразу, без сна.
+    with pytest.raises(DeadlineExceeded):
+        governor.acquire("ru-kz", deadline=Deadline(0.5))
+
+    sleeps: list[float] = []
+    deadline = MagicMock(sleep=lambda seconds, what: sleeps.append(seconds), remaining=lambda: math.inf)
+    governor.acquire("ru-kz", deadline=deadline)
+    # Ждём только за первым запросом, а не ещё и за отменённым.
+    assert sleeps == [pytest.approx(1.0, abs=0.1)]
+
+
+def test_every_navigation_passes_through_governor() -> None:
+    driver = MagicMock()
+    with patch("visabot.selenium_provider.GOVERNOR") as governor:
+        _get(driver, "https://ais.usvisa-info.com/ru-kz/niv/users/sign_in", MagicMock())
+
+    governor.acquire_for_url.assert_called_once()
+    driver.get.assert_called_once()
+
+
+def test_rate_limits_parsing() -> None:
+    assert _parse_rate_limits("ru-kz=30, am-am=12.5") == (("ru-kz", 30.0), ("am-am", 12.5))
+    with pytest.raises(RuntimeError):
+        _parse_rate_limits("ru-kz")
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import stat
+from unittest.mock import MagicMock, patch
+
+from visabot.config import Settings
+from visabot.session_store import load_cookies, save_cookies
+from visabot.worker import _run_check_once
+
+
+def _settings(session_file: str | None) -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        check_interval_seconds=1,
+        check_retry_attempts=1,
+        appointments_max_refresh_attempts=1,
+        state_file=":memory:",
+        session_file=session_file,
+    )
+
+
+def test_cookies_roundtrip_is_owner_only(tmp_path) -> None:
+    path = str(tmp_path / "session.json")
+    cookies = [{"name": "_yatri_session", "value": "abc", "domain": "ais.usvisa-info.com"}]
+
+    save_cookies(path, cookies, username="u")
+
+    assert load_cookies(path, username="u") == cookies
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_cookies_of_another_user_or_expired_are_ignored(tmp_path) -> None:
+    path = str(tmp_path / "session.json")
+    save_cookies(path, [{"name": "a", "value": "b"}], username="u")
+
+    assert load_cookies(path, username="someone-else") == []
+    assert load_cookies(path, username="u", max_age_seconds=-1) == []
+
+
+def test_corrupted_session_file_is_ignored(tmp_path) -> None:
+    path = tmp_path / "session.json"
+    path.write_text("{not json")
+
+    assert load_cookies(str(path), username="u") == []
+
+
+def test_valid_saved_session_skips_login(tmp_path) -> None:
+    path = str(tmp_path / "session.json")
+    save_cookies(path, [{"name": "a", "value": "b"}], username="u")
+    settings = _settings(path)
+
+    with (
+        patch("visabot.worker.start_driver", return_value=MagicMock()),
+        patch("visabot.worker.restore_session", return_value=True),
+        patch("visabot.worker.log_in") as log_in,
+        patch("visabot.worker.open_appointments_calendar"),
+        patch("visabot.worker.read_calendar", return_value=set()),
+    ):
+        _run_check_once(settings)
+        log_in.assert_not_called()
+
+
+def test_expired_session_falls_back_to_login_and_saves_new_cookies(tmp_path) -> None:
+    path = str(tmp_path / "session.json")
+    save_cookies(path, [{"name": "old", "value": "1"}], username="u")
+    settings = _settings(path)
+
+    driver = MagicMock()
+    driver.get_cookies.return_value = [{"name": "new", "value": "2"}]
+
+    with (
+        patch("visabot.worker.start_driver", return_value=driver),
+        patch("visabot.worker.restore_session", return_value=False),
+        patch("visabot.worker.log_in") as log_in,
+        patch("visabot.worker.open_appointments_calendar"),
+        patch("visabot.worker.read_calendar", return_value=set()),
+    ):
+        _run_check_once(settings)
+        log_in.assert_called_once()
+
+    assert load_cookies(path, username="u") == [{"name": "new", "value": "2"}]
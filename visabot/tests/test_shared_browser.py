@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import itertools
+from unittest.mock import MagicMock, patch
+
+from visabot.config import Settings
+from visabot.domain import LoggedOutError
+from visabot.shared_browser import SharedBrowser
+from visabot.worker import _run_check_once
+
+
+class _FakeChrome:
+    """Минимальный chromedriver: окна = targetId, CDP создаёт/удаляет контексты."""
+
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+        self.window_handles = ["DEFAULT"]
+        self.window_context: dict[str, str | None] = {"DEFAULT": None}
+        self.current = "DEFAULT"
+        self.alive = True
+        self.heap = 10 * 2**20
+        self.switch_to = MagicMock()
+        self.switch_to.window.side_effect = self._switch
+        self.get = MagicMock()
+        self.quit = MagicMock()
+
+    def _switch(self, handle: str) -> None:
+        self.current = handle
+
+    @property
+    def current_window_handle(self) -> str:
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return self.current
+
+    def execute_cdp_cmd(self, cmd: str, params: dict) -> dict:
+        if cmd == "Target.createBrowserContext":
+            return {"browserContextId": f"CTX{next(self._ids)}"}
+        if cmd == "Target.createTarget":
+            target = f"T{next(self._ids)}"
+            self.window_handles.append(target)
+            self.window_context[target] = params["browserContextId"]
+            return {"targetId": target}
+        if cmd == "Target.disposeBrowserContext":
+            for handle, ctx in list(self.window_context.items()):
+                if ctx == params["browserContextId"]:
+                    self.window_handles.remove(handle)
+                    del self.window_context[handle]
+            return {}
+        raise AssertionError(cmd)
+
+    def execute_script(self, script: str):
+        return self.heap
+
+
+def _browser(*drivers: _FakeChrome) -> SharedBrowser:
+    return SharedBrowser(headless=True, max_heap_mb=64, start=MagicMock(side_effect=list(drivers)))
+
+
+def test_each_account_gets_its_own_context_in_one_browser() -> None:
+    chrome = _FakeChrome()
+    browser = _browser(chrome)
+
+    browser.acquire("a")
+    window_a = chrome.current
+    browser.release("a", healthy=True)
+    browser.acquire("b")
+    window_b = chrome.current
+    browser.release("b", healthy=True)
+    browser.acquire("a")
+
+    assert browser._start.call_count == 1
+    assert chrome.window_context[window_a] != chrome.window_context[window_b]
+    assert chrome.current == window_a
+    assert browser.contexts == 2
+
+
+def test_failed_check_disposes_only_that_context() -> None:
+    chrome = _FakeChrome()
+    browser = _browser(chrome)
+    browser.acquire("a")
+    browser.release("a", healthy=True)
+    browser.acquire("b")
+    window_b = chrome.current
+
+    browser.release("b", healthy=False)
+
+    assert window_b not in chrome.window_handles
+    assert browser.contexts == 1
+    # Текущее окно закрыто вместе с контекстом — драйвер переключён на живое.
+    assert chrome.current in chrome.window_handles
+    browser.acquire("b")
+    assert chrome.current != window_b
+
+
+def test_context_with_grown_heap_is_recycled() -> None:
+    chrome = _FakeChrome()
+    browser = _browser(chrome)
+    browser.acquire("a")
+    chrome.heap = 100 * 2**20
+
+    browser.release("a", healthy=True)
+
+    assert browser.contexts == 0
+
+
+def test_dead_browser_is_restarted_with_fresh_contexts() -> None:
+    first, second = _FakeChrome(), _FakeChrome()
+    browser = _browser(first, second)
+    browser.acquire("a")
+    browser.release("a", healthy=True)
+
+    first.alive = False
+    driver = browser.acquire("a")
+
+    assert driver is second
+    assert browser.restarts == 1
+    first.quit.assert_called_once()
+
+
+def _settings() -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="1",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        state_file=":memory:",
+    )
+
+
+def test_logged_in_context_skips_login_until_site_logs_it_out() -> None:
+    browser = _browser(_FakeChrome())
+    settings = _settings()
+
+    with (
+        patch("visabot.worker._try_restore_session", return_value=False),
+        patch("visabot.worker.log_in") as login,
+        patch("visabot.worker.open_appointments_calendar", side_effect=[None, None, LoggedOutError("out"), None]),
+        patch("visabot.worker.read_calendar", return_value=set()),
+    ):
+        _run_check_once(settings, browser=browser)
+        _run_check_once(settings, browser=browser)
+        assert login.call_count == 1
+
+        # Сайт выкинул сессию — логинимся в том же контексте прямо по ходу проверки.
+        _run_check_once(settings, browser=browser)
+        assert login.call_count == 2
+
+    browser.dispose(settings.primary_account.key)
+    browser.acquire(settings.primary_account.key)
+    assert not browser.logged_in(settings.primary_account.key)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import dataclasses
+
+import pytest
+
+from visabot.config import Account, Settings
+from visabot.domain import BusyError, Slot
+from visabot.replay import run_replay
+from visabot.slot_providers import RecordingSlotProvider, ReplayExhausted, ReplaySlotProvider, load_recording
+
+_ACCOUNT = Account(visa_username="u", visa_password="p", country_code="ru-kz", schedule_id="1", facility_id=134)
+
+
+def _settings() -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="1",
+        facility_id=134,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        state_file=":memory:",
+    )
+
+
+class _ScriptedProvider:
+    def __init__(self, *results) -> None:
+        self.results = list(results)
+
+    def fetch(self, settings, account, browser=None):
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _record(path: str, *results) -> None:
+    recorder = RecordingSlotProvider(_ScriptedProvider(*results), path)
+    for _ in results:
+        try:
+            recorder.fetch(_settings(), _ACCOUNT)
+        except Exception:
+            pass
+
+
+def test_recording_replays_the_same_sequence(tmp_path) -> None:
+    path = str(tmp_path / "rec.jsonl")
+    slots = {Slot(date_iso="2025-03-01", facility_id=134)}
+    _record(path, slots, BusyError("Система занята"), RuntimeError("boom"))
+
+    replay = ReplaySlotProvider(load_recording(path), speed=0)
+
+    assert replay.fetch(_settings(), _ACCOUNT) == slots
+    with pytest.raises(BusyError):
+        replay.fetch(_settings(), _ACCOUNT)
+    with pytest.raises(RuntimeError, match="boom"):
+        replay.fetch(_settings(), _ACCOUNT)
+    with pytest.raises(ReplayExhausted):
+        replay.fetch(_settings(), _ACCOUNT)
+
+
+def test_replay_speed_scales_recorded_durations(tmp_path) -> None:
+    path = str(tmp_path / "rec.jsonl")
+    _record(path, set())
+    checks = [dataclasses.replace(c, duration=4.0) for c in load_recording(path)]
+    sleeps: list[float] = []
+
+    ReplaySlotProvider(checks, speed=2.0, sleep=sleeps.append).fetch(_settings(), _ACCOUNT)
+
+    assert sleeps == [2.0]
+
+
+def test_replay_runs_through_the_worker_without_browser(tmp_path) -> None:
+    path = str(tmp_path / "rec.jsonl")
+    first = {Slot(date_iso="2025-03-01", facility_id=134)}
+    _record(path, first, first, first | {Slot(date_iso="2025-03-05", facility_id=134)}, BusyError("busy"))
+
+    result = run_replay(path, speed=0, state_dir=str(tmp_path / "state"))
+
+    assert result["checks"] == 4
+    assert result["failed"] == 0
+    # Первая проверка (всё новое) и третья (одна новая дата).
+    assert result["new_slot_notifications"] == 2
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+from visabot.config import Settings
+from visabot.domain import Slot
+from visabot.slot_stats import SlotStats, append_events, load_stats, rebuild_stats, save_stats
+from visabot.state_file import load_slots
+from visabot.worker import _account_file, run_check_once
+
+A = Slot(date_iso="2025-03-01", facility_id=134)
+B = Slot(date_iso="2025-03-02", facility_id=134)
+
+
+def test_lifetime_and_detection_delay_use_check_interval_midpoints() -> None:
+    stats = SlotStats()
+    stats.observe("k", set(), set(), now=0)
+    stats.observe("k", set(), {A}, now=600)  # появился между 0 и 600
+    stats.observe("k", {A}, {A}, now=1200)
+    events = stats.observe("k", {A}, set(), now=1800)  # исчез между 1200 и 1800
+
+    assert [e["event"] for e in events] == ["disappeared"]
+    assert stats.lifetime_count == 1
+    assert stats.lifetime_sum == 1500 - 300
+    assert stats.detection_delay_sum == 300
+    assert stats.detection_delay_max == 600
+    assert sum(stats.by_hour) == 1 and sum(stats.by_weekday) == 1
+
+
+def test_slots_seen_on_first_check_are_not_in_lifetime_distribution() -> None:
+    stats = SlotStats()
+    stats.observe("k", set(), {A}, now=0)
+    stats.observe("k", {A}, set(), now=600)
+
+    assert stats.appeared == 1 and stats.disappeared == 1
+    assert stats.lifetime_count == 0
+    assert stats.detection_delay_count == 0
+
+
+def test_accounts_are_tracked_separately() -> None:
+    stats = SlotStats()
+    stats.observe("a", set(), set(), now=0)
+    stats.observe("b", set(), {A}, now=100)
+
+    # У аккаунта b не было предыдущей проверки — задержка неизвестна.
+    assert stats.detection_delay_count == 0
+
+
+def test_aggregates_roundtrip_and_rebuild_from_journal(tmp_path) -> None:
+    journal = str(tmp_path / "events.jsonl")
+    stats = SlotStats()
+    for now, previous, current in [(0, set(), set()), (300, set(), {A, B}), (600, {A, B}, {B}), (900, {B}, set())]:
+        append_events(journal, stats.observe("k", previous, current, now=now))
+
+    save_stats(str(tmp_path / "stats.json"), stats)
+    loaded = load_stats(str(tmp_path / "stats.json"))
+    rebuilt = rebuild_stats(journal)
+
+    for other in (loaded, rebuilt):
+        assert other.lifetime_buckets == stats.lifetime_buckets
+        assert other.lifetime_sum == stats.lifetime_sum
+        assert other.detection_delay_sum == stats.detection_delay_sum
+        assert other.by_hour == stats.by_hour
+    assert "Lifetime (2 slots)" in rebuilt.report()
+
+
+def test_malformed_stats_file_does_not_block_alerts(tmp_path) -> None:
+    settings = Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=134,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1",),
+        check_retry_attempts=1,
+        state_file=str(tmp_path / "state.json"),
+        slot_stats_file=str(tmp_path / "slot_stats.json"),
+    )
+    # Время прошлой проверки строкой: observe() падает на вычитании.
+    with open(settings.slot_stats_file, "w", encoding="utf-8") as f:
+        json.dump({"last_check_at": {settings.primary_account.key: "x"}}, f)
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", return_value={A}),
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        run_check_once(settings, settings.primary_account)
+
+    assert any("2025-03-01" in c.kwargs["text"] for c in send_msg.call_args_list)
+    assert load_slots(_account_file(settings.state_file, settings, settings.primary_account)) == {A}
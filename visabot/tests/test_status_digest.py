@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from visabot.config import Settings, load_settings
+from visabot.domain import BusyError, Slot
+from visabot.metrics import METRICS
+from visabot.status_digest import StatusDigest
+from visabot.worker import _send_status_digest, run_check_once
+
+
+def _settings(**overrides) -> Settings:
+    values = dict(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=1,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1", "2"),
+        telegram_admin_chat_id="999",
+        check_retry_attempts=1,
+        state_file=":memory:",
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+def test_digest_counts_outcomes_and_resets_after_take(clock) -> None:
+    digest = StatusDigest(3600, clock=clock)
+    assert not digest.due()
+
+    digest.record("a", "ok", slots=3)
+    digest.record("a", "busy", error="busy")
+    digest.record("a", "error", error="RuntimeError: boom")
+    assert not digest.due()
+
+    clock.now = 3600
+    assert digest.due()
+    text = digest.take()
+    assert "проверок 3" in text
+    assert "успешно: 1" in text and "система занята: 1" in text and "ошибки: 1" in text
+    assert "Дат в календаре сейчас: 3" in text
+    assert "a: RuntimeError: boom" in text
+
+    assert digest.take() is None
+    assert not digest.due()
+
+
+def test_digest_reports_telegram_calls_in_period(clock) -> None:
+    digest = StatusDigest(3600, clock=clock)
+    METRICS.inc("telegram_messages_sent", 5)
+    digest.record("a", "ok", slots=0)
+    clock.now = 3600
+
+    assert "Сообщений в Telegram за период: 5 (≈120 в сутки)" in digest.take()
+
+
+def test_check_with_digest_sends_nothing_per_check(tmp_path) -> None:
+    settings = _settings(state_file=str(tmp_path / "state.json"))
+    digest = StatusDigest(3600)
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", side_effect=[set(), BusyError("busy"), RuntimeError("boom")]),
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        run_check_once(settings, digest=digest)
+        run_check_once(settings, digest=digest)
+        with pytest.raises(RuntimeError):
+            run_check_once(settings, digest=digest)
+
+    send_msg.assert_not_called()
+    assert "проверок 3" in digest.take()
+
+
+def test_new_slots_are_sent_immediately_with_digest(tmp_path) -> None:
+    settings = _settings(state_file=str(tmp_path / "state.json"))
+    digest = StatusDigest(3600)
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", return_value={Slot("2030-01-01", 1)}),
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        run_check_once(settings, digest=digest)
+
+    assert sorted(c.kwargs["chat_id"] for c in send_msg.call_args_list) == ["1", "2", "999"]
+
+
+def test_digest_goes_to_admin_or_everyone() -> None:
+    with patch("visabot.worker.send_telegram_message") as send_msg:
+        _send_status_digest(_settings(), "digest")
+        _send_status_digest(_settings(telegram_admin_chat_id=None), "digest")
+        _send_status_digest(_settings(status_digest_to="all"), "digest")
+
+    assert [c.kwargs["chat_id"] for c in send_msg.call_args_list] == ["999", "1", "2", "1", "2", "999"]
+
+
+def test_status_digest_settings(monkeypatch) -> None:
+    env = {
+        "VISA_USERNAME": "u",
+        "VISA_PASSWORD": "p",
+        "COUNTRY_CODE": "ru-kz",
+        "SCHEDULE_ID": "1",
+        "APPOINTMENTS_CONSULATE_APPOINTMENT_FACILITY_ID": "1",
+        "TELEGRAM_BOT_TOKEN": "T",
+        "TELEGRAM_CHAT_ID": "1",
+    }
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("CONFIG_FILE", raising=False)
+    monkeypatch.setenv("STATUS_DIGEST_SECONDS", "0")
+    monkeypatch.setenv("STATUS_DIGEST_TO", "all")
+
+    settings = load_settings(dotenv_path=None)
+    assert settings.status_digest_seconds == 0
+    assert settings.status_digest_to == "all"
+    assert StatusDigest.from_settings(settings) is None
+
+    monkeypatch.setenv("STATUS_DIGEST_TO", "nobody")
+    with pytest.raises(RuntimeError, match="STATUS_DIGEST_TO"):
+        load_settings(dotenv_path=None)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+
+from visabot.config import Settings
+from visabot.domain import Slot
+from visabot.subscribers import Subscriber, SubscriberIndex, load_subscribers
+from visabot.worker import run_check_once
+
+
+def _slot(date_iso: str, facility_id: int = 134) -> Slot:
+    return Slot(date_iso=date_iso, facility_id=facility_id)
+
+
+def test_index_matches_facility_and_date_range() -> None:
+    index = SubscriberIndex(
+        [
+            Subscriber(chat_id="1"),
+            Subscriber(chat_id="2", facility_ids=frozenset({135})),
+            Subscriber(chat_id="3", date_from=dt.date(2025, 1, 10), date_to=dt.date(2025, 1, 20)),
+            Subscriber(chat_id="4", facility_ids=frozenset({134}), date_to=dt.date(2025, 1, 5)),
+        ]
+    )
+
+    assert index.chats_for(_slot("2025-01-01")) == {"1", "4"}
+    assert index.chats_for(_slot("2025-01-10")) == {"1", "3"}
+    assert index.chats_for(_slot("2025-01-20", facility_id=135)) == {"1", "2", "3"}
+    assert index.chats_for(_slot("2025-02-01")) == {"1"}
+
+
+def test_index_agrees_with_linear_scan() -> None:
+    rnd = random.Random(42)
+    base = dt.date(2025, 1, 1)
+    subs = []
+    for i in range(300):
+        start = base + dt.timedelta(days=rnd.randint(0, 200))
+        subs.append(
+            Subscriber(
+                chat_id=str(i + 1),
+                facility_ids=frozenset({rnd.choice([134, 135])}) if rnd.random() < 0.5 else None,
+                date_from=start if rnd.random() < 0.8 else None,
+                date_to=start + dt.timedelta(days=rnd.randint(0, 60)) if rnd.random() < 0.8 else None,
+            )
+        )
+    index = SubscriberIndex(subs)
+
+    for _ in range(200):
+        slot = _slot((base + dt.timedelta(days=rnd.randint(-10, 270))).isoformat(), rnd.choice([134, 135]))
+        point = dt.date.fromisoformat(slot.date_iso).toordinal()
+        expected = {
+            s.chat_id
+            for s in subs
+            if (s.facility_ids is None or slot.facility_id in s.facility_ids)
+            and s.interval[0] <= point <= s.interval[1]
+        }
+        assert index.chats_for(slot) == expected
+
+
+def test_load_subscribers_validates_records(tmp_path) -> None:
+    path = tmp_path / "subscribers.json"
+    path.write_text(json.dumps([{"chat_id": "5", "facility_ids": [134], "date_from": "2025-01-01"}]))
+    assert load_subscribers(str(path)) == (
+        Subscriber(chat_id="5", facility_ids=frozenset({134}), date_from=dt.date(2025, 1, 1)),
+    )
+
+    path.write_text(json.dumps([{"chat_id": "5", "date_from": "2025-02-01", "date_to": "2025-01-01"}]))
+    with pytest.raises(RuntimeError, match=r"date_from is after date_to"):
+        load_subscribers(str(path))
+
+
+def test_new_slots_are_sent_only_to_matching_subscribers() -> None:
+    settings = Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=134,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1", "2"),
+        telegram_admin_chat_id="999",
+        check_retry_attempts=1,
+        state_file=":memory:",
+        subscribers=(Subscriber(chat_id="1", date_to=dt.date(2025, 1, 5)),),
+    )
+    current = {_slot("2025-01-01"), _slot("2025-01-10")}
+
+    with (
+        patch("visabot.worker._run_check_once_with_retry", return_value=current),
+        patch("visabot.worker.load_slots", return_value=set()),
+        patch("visabot.worker.save_slots"),
+        patch("visabot.worker.send_telegram_message") as send_msg,
+    ):
+        run_check_once(settings)
+
+    sent = {c.kwargs["chat_id"]: c.kwargs["text"] for c in send_msg.call_args_list}
+    assert set(sent) == {"1", "2", "999"}
+    # Подписчик с фильтром видит только свою дату; "2" без записи — всё, как раньше.
+    assert "2025-01-01" in sent["1"] and "2025-01-10" not in sent["1"]
+    assert "2025-01-10" in sent["2"]
+    assert "2025-01-01" in sent["999"] and "2025-01-10" in sent["999"]
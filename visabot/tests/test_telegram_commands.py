@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+from unittest.mock import MagicMock, patch
+
+from visabot.config import Settings
+from visabot.domain import Slot
+from visabot.metrics import METRICS
+from visabot.runtime import WorkerRuntime
+from visabot.telegram_commands import TelegramCommandLoop
+
+
+def _settings(admin_chat_id: str | None = "999") -> Settings:
+    return Settings(
+        visa_username="u",
+        visa_password="p",
+        country_code="ru-kz",
+        schedule_id="71716653",
+        facility_id=134,
+        telegram_bot_token="TEST_TOKEN",
+        telegram_chat_ids=("1", "2"),
+        telegram_admin_chat_id=admin_chat_id,
+        state_file=":memory:",
+    )
+
+
+def _update(chat_id: str, text: str, update_id: int = 1) -> dict:
+    return {"update_id": update_id, "message": {"chat": {"id": int(chat_id)}, "text": text}}
+
+
+def test_slots_come_from_runtime_without_touching_state_store() -> None:
+    runtime = WorkerRuntime()
+    runtime.record_check("ru-kz_71716653_134", outcome="ok", slots={Slot(date_iso="2025-01-01", facility_id=134)})
+    load_last_slots = MagicMock()
+    loop = TelegramCommandLoop(_settings(), runtime, load_last_slots=load_last_slots)
+
+    with patch("visabot.telegram_commands.send_telegram_message") as send_msg:
+        loop.handle_update(_update("1", "/slots"))
+
+    assert "2025-01-01" in send_msg.call_args.kwargs["text"]
+    load_last_slots.assert_not_called()
+
+
+def test_slots_fall_back_to_state_store_after_restart() -> None:
+    loop = TelegramCommandLoop(
+        _settings(),
+        WorkerRuntime(),
+        load_last_slots=lambda account: {Slot(date_iso="2025-02-02", facility_id=account.facility_id)},
+    )
+
+    assert "2025-02-02" in loop.handle_command("/slots", chat_id="1")
+
+
+def test_command_replies_are_counted_as_sent_messages() -> None:
+    loop = TelegramCommandLoop(_settings(), WorkerRuntime(), load_last_slots=MagicMock())
+    client = MagicMock()
+    client.__enter__.return_value.post.return_value.json.return_value = {"ok": True}
+    before = METRICS.get("telegram_messages_sent")
+
+    with patch("visabot.telegram_notifier.httpx.Client", return_value=client):
+        loop.handle_update(_update("1", "/status"))
+
+    assert METRICS.get("telegram_messages_sent") == before + 1
+
+
+def test_unknown_chats_are_ignored() -> None:
+    loop = TelegramCommandLoop(_settings(), WorkerRuntime(), load_last_slots=MagicMock())
+
+    with patch("visabot.telegram_commands.send_telegram_message") as send_msg:
+        loop.handle_update(_update("12345", "/status"))
+
+    send_msg.assert_not_called()
+
+
+def test_status_shows_open_breakers() -> None:
+    runtime = WorkerRuntime()
+    breaker = runtime.breaker_for("ru-kz", failure_threshold=1, cooldown_seconds=600)
+    breaker.record_failure()
+    loop = TelegramCommandLoop(_settings(), runtime, load_last_slots=MagicMock())
+
+    assert "Предохранитель ru-kz: open, неудач подряд: 1" in loop.handle_command("/status", chat_id="1")
+
+
+def test_pause_is_admin_only() -> None:
+    runtime = WorkerRuntime()
+    loop = TelegramCommandLoop(_settings(), runtime, load_last_slots=MagicMock())
+
+    loop.handle_command("/pause", chat_id="1")
+    assert not runtime.is_paused()
+
+    loop.handle_command("/pause", chat_id="999")
+    assert runtime.is_paused()
+    loop.handle_command("/resume", chat_id="999")
+    assert not runtime.is_paused()
+
+
+def test_concurrent_checknow_requests_are_coalesced() -> None:
+    runtime = WorkerRuntime()
+    loop = TelegramCommandLoop(_settings(), runtime, load_last_slots=MagicMock())
+
+    replies: list[str] = []
+    threads = [threading.Thread(target=lambda: replies.append(loop.handle_command("/checknow", chat_id="1"))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert replies.count("Внеочередная проверка запланирована.") == 1
+    assert runtime.wait_for_tick(0) is True
+    # Запрос обработан — следующий тик снова обычный.
+    assert runtime.wait_for_tick(0) is False
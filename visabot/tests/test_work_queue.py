@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from visabot.config import load_settings
+from visabot.domain import Slot
+from visabot.work_queue import SqliteWorkQueue
+
+
+def _queue(path: str, worker_id: str, lease_seconds: int = 60) -> SqliteWorkQueue:
+    return SqliteWorkQueue(path, worker_id=worker_id, lease_seconds=lease_seconds)
+
+
+def test_each_due_account_is_claimed_by_exactly_one_worker(tmp_path) -> None:
+    db = str(tmp_path / "queue.sqlite")
+    a = _queue(db, "a")
+    b = _queue(db, "b")
+    a.register(["k1", "k2"])
+    b.register(["k1", "k2"])
+
+    claimed = {a.claim_next(["k1", "k2"], now=100), b.claim_next(["k1", "k2"], now=100)}
+
+    assert claimed == {"k1", "k2"}
+    assert a.claim_next(["k1", "k2"], now=100) is None
+
+
+def test_completed_account_is_not_due_until_next_run(tmp_path) -> None:
+    q = _queue(str(tmp_path / "queue.sqlite"), "a")
+    q.register(["k1"])
+
+    assert q.claim_next(["k1"], now=100) == "k1"
+    assert q.complete("k1", next_run_at=400)
+
+    assert q.claim_next(["k1"], now=399) is None
+    assert q.seconds_until_next_due(["k1"], now=100) == pytest.approx(300)
+    assert q.claim_next(["k1"], now=400) == "k1"
+
+
+def test_lease_of_dead_worker_expires(tmp_path) -> None:
+    db = str(tmp_path / "queue.sqlite")
+    dead = _queue(db, "dead", lease_seconds=30)
+    alive = _queue(db, "alive")
+    dead.register(["k1"])
+
+    assert dead.claim_next(["k1"], now=100) == "k1"
+    assert alive.claim_next(["k1"], now=129) is None
+    assert alive.claim_next(["k1"], now=130) == "k1"
+
+    # Опоздавшая реплика не может "завершить" чужую аренду.
+    assert not dead.complete("k1", next_run_at=1000)
+
+
+def test_slot_state_is_shared_between_workers(tmp_path) -> None:
+    db = str(tmp_path / "queue.sqlite")
+    slots = {Slot(date_iso="2025-01-01", facility_id=134)}
+
+    _queue(db, "a").save_slots("k1", slots)
+
+    assert _queue(db, "b").load_slots("k1") == slots
+    assert _queue(db, "b").load_slots("unknown") == set()
+
+
+def test_load_settings_reads_extra_accounts(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setenv("VISA_USERNAME", "u")
+    monkeypatch.setenv("VISA_PASSWORD", "p")
+    monkeypatch.setenv("COUNTRY_CODE", "ru-kz")
+    monkeypatch.setenv("SCHEDULE_ID", "1")
+    monkeypatch.setenv("APPOINTMENTS_CONSULATE_APPOINTMENT_FACILITY_ID", "134")
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "1")
+
+    accounts_file = tmp_path / "accounts.json"
+    accounts_file.write_text(
+        json.dumps(
+            [
+                {"username": "u2", "password": "p2", "schedule_id": "2", "facility_id": 135},
+                # Дубликат основного аккаунта не должен проверяться дважды.
+                {"username": "u", "password": "p", "schedule_id": "1", "facility_id": 134},
+            ]
+        )
+    )
+    monkeypatch.setenv("ACCOUNTS_FILE", str(accounts_file))
+
+    settings = load_settings(dotenv_path=None)
+
+    assert [a.key for a in settings.accounts()] == ["ru-kz_1_134", "ru-kz_2_135"]
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from visabot.domain import OutboxMessage, Slot
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    key TEXT PRIMARY KEY,
+    next_run_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS slot_state (
+    key TEXT PRIMARY KEY,
+    slots_json TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class SqliteWorkQueue:
+    """Общая очередь проверок для нескольких процессов/реплик.
+
+    Каждая реплика регистрирует свои аккаунты и забирает следующую "созревшую"
+    проверку через аренду (lease). Пока аренда не истекла, этот аккаунт не достанется
+    никому другому; если нода умерла посреди проверки, аренда протухнет через
+    `lease_seconds` и аккаунт подхватит другая реплика. Уведомления outbox берутся в
+    отдельную короткую аренду `outbox_lease_seconds`, которая продлевается перед каждой
+    отправкой (`renew_outbox_lease`): после смерти реплики они уйдут через секунды, а не
+    через минуты, и медленная пачка не достанется двум репликам сразу.
+
+    Здесь же лежит состояние "последних виденных слотов" (аналог state.json), чтобы
+    дедупликация уведомлений была общей для всех реплик.
+
+    Файл базы рассчитан на общий volume одного хоста (docker-compose replicas):
+    SQLite-блокировки через сетевые ФС (NFS/SMB) ненадёжны.
+    """
+
+    def __init__(self, path: str, *, worker_id: str, lease_seconds: int, outbox_lease_seconds: int = 60) -> None:
+        self.path = path
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.outbox_lease_seconds = outbox_lease_seconds
+
+        folder = os.path.dirname(os.path.abspath(path))
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        # executescript() сам коммитит, поэтому схему создаём вне _tx().
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        # isolation_level=None + явный BEGIN IMMEDIATE: берём write-lock сразу,
+        # чтобы выбор и захват аккаунта были одной атомарной операцией.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def register(self, keys: Iterable[str]) -> None:
+        with self._tx() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO accounts (key, next_run_at) VALUES (?, 0)",
+                [(k,) for k in keys],
+            )
+
+    def claim_next(self, keys: Iterable[str], *, now: float | None = None) -> str | None:
+        """Захватывает аренду одного "созревшего" аккаунта из `keys` (или None)."""
+
+        now = time.time() if now is None else now
+        keys = list(keys)
+        if not keys:
+            return None
+
+        placeholders = ",".join("?" * len(keys))
+        with self._tx() as conn:
+            row = conn.execute(
+                f"""
+                SELECT key FROM accounts
+                WHERE key IN ({placeholders})
+                  AND next_run_at <= ?
+                  AND (lease_owner IS NULL OR lease_expires_at <= ?)
+                ORDER BY next_run_at
+                LIMIT 1
+                """,
+                (*keys, now, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE accounts SET lease_owner = ?, lease_expires_at = ? WHERE key = ?",
+                (self.worker_id, now + self.lease_seconds, row[0]),
+            )
+            return str(row[0])
+
+    def complete(self, key: str, *, next_run_at: float) -> bool:
+        """Отпускает аренду и планирует следующую проверку.
+
+        Возвращает False, если аренда уже истекла и досталась другой реплике.
+        """
+
+        with self._tx() as conn:
+            cur = conn.execute(
+                """
+                UPDATE accounts SET lease_owner = NULL, lease_expires_at = 0, next_run_at = ?
+                WHERE key = ? AND lease_owner = ?
+                """,
+                (next_run_at, key, self.worker_id),
+            )
+            return cur.rowcount == 1
+
+    def make_due(self, keys: Iterable[str]) -> None:
+        """Планирует внеочередную проверку (аренды не трогает)."""
+
+        with self._tx() as conn:
+            conn.executemany("UPDATE accounts SET next_run_at = 0 WHERE key = ?", [(k,) for k in keys])
+
+    def seconds_until_next_due(self, keys: Iterable[str], *, now: float | None = None) -> float | None:
+        now = time.time() if now is None else now
+        keys = list(keys)
+        if not keys:
+            return None
+
+        placeholders = ",".join("?" * len(keys))
+        with self._tx() as conn:
+            row = conn.execute(
+                f"""
+                SELECT MIN(MAX(next_run_at, CASE WHEN lease_owner IS NULL THEN 0 ELSE lease_expires_at END))
+                FROM accounts WHERE key IN ({placeholders})
+                """,
+                keys,
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return max(0.0, float(row[0]) - now)
+
+    def load_slots(self, key: str) -> set[Slot]:
+        with self._tx() as conn:
+            row = conn.execute("SELECT slots_json FROM slot_state WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return set()
+
+        try:
+            raw = json.loads(row[0])
+        except json.JSONDecodeError:
+            return set()
+
+        slots: set[Slot] = set()
+        for item in raw:
+            try:
+                slots.add(Slot(date_iso=str(item["date_iso"]), facility_id=int(item["facility_id"])))
+            except Exception:
+                continue
+        return slots
+
+    def save_slots(self, key: str, slots: Iterable[Slot], outbox: Iterable[OutboxMessage] = ()) -> None:
+        """Сохраняет слоты и новые уведомления одной транзакцией."""
+
+        data = [{"date_iso": s.date_iso, "facility_id": s.facility_id} for s in sorted(set(slots))]
+        with self._tx() as conn:
+            conn.execute(
+                """
+                INSERT INTO slot_state (key, slots_json, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET slots_json = excluded.slots_json, updated_at = excluded.updated_at
+                """,
+                (key, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO outbox (id, key, chat_id, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(m.id, key, m.chat_id, m.text, m.created_at) for m in outbox],
+            )
+
+    def claim_outbox(self, keys: Iterable[str], *, limit: int = 50, now: float | None = None) -> list[OutboxMessage]:
+        """Забирает в аренду недоставленные уведомления, чтобы их не отправили две реплики."""
+
+        now = time.time() if now is None else now
+        keys = list(keys)
+        if not keys:
+            return []
+
+        placeholders = ",".join("?" * len(keys))
+        with self._tx() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, chat_id, text, created_at, attempts FROM outbox
+                WHERE key IN ({placeholders}) AND lease_expires_at <= ?
+                ORDER BY created_at
+                LIMIT ?
+                """,
+                (*keys, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET lease_owner = ?, lease_expires_at = ? WHERE id = ?",
+                [(self.worker_id, now + self.outbox_lease_seconds, r[0]) for r in rows],
+            )
+        return [
+            OutboxMessage(id=r[0], chat_id=r[1], text=r[2], created_at=float(r[3]), attempts=int(r[4])) for r in rows
+        ]
+
+    def renew_outbox_lease(self, message_id: str, *, now: float | None = None) -> bool:
+        """Продлевает аренду сообщения перед отправкой.
+
+        Удаётся, если аренда наша или уже истекла; False — сообщение доставлено или его
+        держит другая реплика.
+        """
+
+        now = time.time() if now is None else now
+        with self._tx() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE outbox SET lease_owner = ?, lease_expires_at = ?
+                WHERE id = ? AND (lease_owner = ? OR lease_expires_at <= ?)
+                """,
+                (self.worker_id, now + self.outbox_lease_seconds, message_id, self.worker_id, now),
+            )
+            return cursor.rowcount == 1
+
+    def update_outbox(
+        self,
+        *,
+        sent: Iterable[str] = (),
+        failed: Iterable[str] = (),
+        dropped: Iterable[str] = (),
+        retry_at: float = 0.0,
+    ) -> None:
+        with self._tx() as conn:
+            conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in (*sent, *dropped)])
+            conn.executemany(
+                """
+                UPDATE outbox SET attempts = attempts + 1, lease_owner = NULL, lease_expires_at = ?
+                WHERE id = ?
+                """,
+                [(retry_at, i) for i in failed],
+            )
@@ -1,22 +1,75 @@
 from __future__ import annotations
 
 import logging
+import os
 import time
-from typing import Iterable
+from functools import lru_cache
+from typing import Callable, Iterable
 
-from tenacity import RetryCallState, retry, stop_after_attempt, wait_exponential
+from tenacity import (
+    RetryCallState,
+    Retrying,
+    retry,
+    retry_if_exception_type,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    stop_any,
+    wait_exponential,
+    wait_fixed,
+)
 
-from visabot.config import Settings
-from visabot.domain import Slot, BusyError
+from visabot.browser_processes import BrowserProcessTracker
+from visabot.browser_profile import BrowserProfile
+from visabot.burst import BurstScheduler
+from visabot.cdp_calendar import CdpError, read_calendar_via_devtools
+from visabot.circuit_breaker import CircuitBreaker, CircuitState
+from visabot.config import Account, Settings
+from visabot.config_reload import ConfigReloader, changed_fields
+from visabot.facility_cache import FacilityCache
+from visabot.notify_stage import NotifyStage
+from visabot.outbox import (
+    FileOutbox,
+    OutboxDeliveryLoop,
+    OutboxStore,
+    QueueOutbox,
+    deliver_outbox,
+    new_outbox_messages,
+)
+from visabot.prelogin import PreLogin, PreparedSession
+from visabot.rate_governor import GOVERNOR
+from visabot.runtime import WorkerRuntime
+from visabot.deadline import UNLIMITED, Deadline
+from visabot.domain import (
+    OutboxMessage,
+    Slot,
+    BusyError,
+    DeadlineExceeded,
+    LoggedOutError,
+    PageStructureError,
+    SessionLostError,
+)
+from visabot.metrics import METRICS, write_metrics_file
 from visabot.selenium_provider import (
+    CalendarProgress,
     build_appointments_url,
     build_sign_in_url,
-    fetch_available_slots,
     log_in,
+    open_appointments_calendar,
+    read_calendar,
+    restore_session,
+    session_is_alive,
     start_driver,
 )
+from visabot.shared_browser import SharedBrowser
+from visabot.slot_providers import CachedSlotProvider, SlotProvider
+from visabot.slot_stats import append_events, load_stats, save_stats
+from visabot.status_digest import StatusDigest
+from visabot.session_store import clear_cookies, load_cookies, save_cookies
 from visabot.state_file import load_slots, save_slots
+from visabot.subscribers import Subscriber, SubscriberIndex, effective_subscribers
+from visabot.telegram_commands import TelegramCommandLoop
 from visabot.telegram_notifier import send_telegram_message
+from visabot.work_queue import SqliteWorkQueue
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +79,29 @@ def _format_slots(slots: Iterable[Slot]) -> str:
     return "\n".join([f"• {s.date_iso} (facility_id={s.facility_id})" for s in by_date])
 
 
-def _broadcast_telegram(settings: Settings, text: str) -> None:
+def _send_each(settings: Settings, messages: Iterable[tuple[str, str]]) -> None:
     errors: list[tuple[str, Exception]] = []
 
+    for chat_id, text in messages:
+        try:
+            _send_one(settings, chat_id, text)
+        except Exception as e:
+            # Best-effort: don't stop sending to other chat_ids.
+            logger.warning("Failed to send telegram message to chat_id=%s (%s: %s)", chat_id, type(e).__name__, e)
+            errors.append((chat_id, e))
+
+    if errors:
+        # Keep behavior explicit: if at least one send failed, raise.
+        # This is safer for monitoring; caller may catch.
+        failed = ", ".join([cid for cid, _ in errors])
+        raise RuntimeError(f"Failed to send telegram message to some recipients: {failed}")
+
+
+def _send_one(settings: Settings, chat_id: str, text: str) -> None:
+    send_telegram_message(bot_token=settings.telegram_bot_token, chat_id=chat_id, text=text)
+
+
+def _recipients(settings: Settings) -> list[str]:
     # Основные получатели из TELEGRAM_CHAT_ID, плюс (опционально) админский чат,
     # который получает копию всех сообщений.
     recipients: list[str] = list(settings.telegram_chat_ids)
@@ -43,40 +116,61 @@ def _broadcast_telegram(settings: Settings, text: str) -> None:
             continue
         seen.add(chat_id)
         recipients_unique.append(chat_id)
+    return recipients_unique
 
-    for chat_id in recipients_unique:
-        try:
-            send_telegram_message(
-                bot_token=settings.telegram_bot_token,
-                chat_id=chat_id,
-                text=text,
-            )
-        except Exception as e:
-            # Best-effort: don't stop sending to other chat_ids.
-            logger.warning("Failed to send telegram message to chat_id=%s (%s: %s)", chat_id, type(e).__name__, e)
-            errors.append((chat_id, e))
 
-    if errors:
-        # Keep behavior explicit: if at least one send failed, raise.
-        # This is safer for monitoring; caller may catch.
-        failed = ", ".join([cid for cid, _ in errors])
-        raise RuntimeError(f"Failed to send telegram message to some recipients: {failed}")
+def _broadcast_telegram(settings: Settings, text: str) -> None:
+    _send_each(settings, [(chat_id, text) for chat_id in _recipients(settings)])
+
+
+@lru_cache(maxsize=4)
+def _subscriber_index(chat_ids: tuple[str, ...], subscribers: tuple[Subscriber, ...]) -> SubscriberIndex:
+    return SubscriberIndex(effective_subscribers(chat_ids, subscribers))
+
+
+def _new_slots_text(slots: Iterable[Slot], appointments_url: str) -> str:
+    return (
+        "Появились новые свободные даты на собеседование:\n\n"
+        f"{_format_slots(slots)}\n\n"
+        f"Ссылка: {appointments_url}"
+    )
+
+
+def _new_slot_messages(settings: Settings, new_slots: set[Slot], appointments_url: str) -> list[tuple[str, str]]:
+    METRICS.inc("new_slot_notifications")
+    if not settings.subscribers:
+        text = _new_slots_text(new_slots, appointments_url)
+        return [(chat_id, text) for chat_id in _recipients(settings)]
+
+    # Каждый подписчик получает только подходящие ему даты; админ — полную копию.
+    matches = _subscriber_index(settings.telegram_chat_ids, settings.subscribers).match(new_slots)
+    messages = [(chat_id, _new_slots_text(slots, appointments_url)) for chat_id, slots in matches.items()]
+    if settings.telegram_admin_chat_id:
+        messages = [(c, t) for c, t in messages if c != settings.telegram_admin_chat_id]
+        messages.append((settings.telegram_admin_chat_id, _new_slots_text(new_slots, appointments_url)))
+
+    logger.info("New slots matched %d subscriber chat(s)", len(messages))
+    return messages
 
 
 def _send_status_message(settings: Settings, text: str) -> None:
-    # Статусные сообщения полезны для контроля, но могут спамить.
-    # Если захочешь — легко выключим через env-флаг.
+    # Статусные сообщения полезны для контроля, но могут спамить: в run_forever вместо
+    # них по умолчанию уходит сводка (STATUS_DIGEST_SECONDS).
     _broadcast_telegram(settings, text)
 
 
 def _send_admin_only(settings: Settings, text: str) -> None:
     if not settings.telegram_admin_chat_id:
         return
-    send_telegram_message(
-        bot_token=settings.telegram_bot_token,
-        chat_id=settings.telegram_admin_chat_id,
-        text=text,
-    )
+    _send_one(settings, settings.telegram_admin_chat_id, text)
+
+
+def _send_status_digest(settings: Settings, text: str) -> None:
+    # Без админского чата сводку иначе никто бы не увидел.
+    if settings.status_digest_to == "admin" and settings.telegram_admin_chat_id:
+        _send_admin_only(settings, text)
+    else:
+        _broadcast_telegram(settings, text)
 
 
 def _short_exc(retry_state: RetryCallState) -> str | None:
@@ -127,39 +221,404 @@ def _log_before_sleep(retry_state: RetryCallState) -> None:
         logger.info("Перед попыткой %s пауза %.0f сек.", next_attempt, sleep_seconds)
 
 
-def _run_check_once(settings: Settings) -> set[Slot]:
-    sign_in_url = build_sign_in_url(settings.country_code)
-    appointments_url = build_appointments_url(settings.country_code, settings.schedule_id)
+def _account_file(path: str, settings: Settings, account: Account) -> str:
+    # Основной аккаунт использует файлы как есть (обратная совместимость),
+    # дополнительные — с суффиксом ключа аккаунта: state.ru-kz_123_134.json.
+    if account.key == settings.primary_account.key:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{account.key}{ext}"
+
+
+def _session_file_for(settings: Settings, account: Account) -> str | None:
+    if not settings.session_file:
+        return None
+    return _account_file(settings.session_file, settings, account)
+
+
+def _try_restore_session(
+    settings: Settings,
+    account: Account,
+    driver,
+    sign_in_url: str,
+    deadline: Deadline = UNLIMITED,
+) -> bool:
+    session_file = _session_file_for(settings, account)
+    if not session_file:
+        return False
+
+    cookies = load_cookies(session_file, username=account.visa_username)
+    if not cookies:
+        return False
+
+    started = time.monotonic()
+    try:
+        restored = restore_session(driver, sign_in_url=sign_in_url, cookies=cookies, deadline=deadline)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.warning("Failed to restore saved session (%s: %s)", type(e).__name__, e)
+        restored = False
+
+    if restored:
+        logger.info("Session restored from %s in %.1fs, skipping login", session_file, time.monotonic() - started)
+    else:
+        logger.info("Saved session is no longer valid, falling back to login")
+        clear_cookies(session_file)
+    return restored
+
+
+def _save_session(settings: Settings, account: Account, driver) -> None:
+    session_file = _session_file_for(settings, account)
+    if not session_file:
+        return
+    try:
+        save_cookies(session_file, driver.get_cookies(), username=account.visa_username)
+    except Exception as e:
+        # Сохранение сессии — оптимизация, проверку из-за него не валим.
+        logger.warning("Failed to save session cookies (%s: %s)", type(e).__name__, e)
+
+
+# Ошибки, которые бессмысленно повторять внутри шага: либо браузер мёртв (нужен полный
+# перезапуск), либо протухла авторизация (нужен повторный логин, а не тот же шаг),
+# либо кончилось время всей проверки, либо сайт поменял разметку (повтор найдёт то же самое).
+_NOT_RETRIED_IN_PHASE = (SessionLostError, LoggedOutError, DeadlineExceeded, PageStructureError)
+
+_PHASE_RETRY_WAIT_SECONDS = 1.0
+
+
+class _PhaseRunner:
+    """Повторы по шагам проверки на одной и той же браузерной сессии.
+
+    Шаги: driver_start → login → facility (страница записи + календарь) → calendar (чтение дат).
+    Упавший шаг повторяется сам по себе; если после ошибки браузер не отвечает,
+    это SessionLostError и решение о полном перезапуске принимает внешний ретрай.
+    """
+
+    def __init__(self, account: Account, deadline: Deadline = UNLIMITED) -> None:
+        self.account = account
+        self.deadline = deadline
+        self.attempts: dict[str, int] = {}
+
+    def run(self, phase: str, max_attempts: int, fn, driver=None):
+        for attempt in Retrying(
+            stop=stop_any(stop_after_attempt(max_attempts), lambda _: self.deadline.expired()),
+            wait=wait_fixed(_PHASE_RETRY_WAIT_SECONDS),
+            retry=retry_if_not_exception_type(_NOT_RETRIED_IN_PHASE),
+            reraise=True,
+        ):
+            with attempt:
+                self.deadline.check(phase)
+                n = self.attempts[phase] = self.attempts.get(phase, 0) + 1
+                try:
+                    return fn()
+                except _NOT_RETRIED_IN_PHASE:
+                    raise
+                except Exception as e:
+                    if driver is not None and not session_is_alive(driver):
+                        raise SessionLostError(f"Браузер не отвечает после ошибки на шаге {phase}") from e
+                    log = logger.warning if n < max_attempts else logger.error
+                    log("Phase %s attempt %d/%d failed (%s: %s)", phase, n, max_attempts, type(e).__name__, e)
+                    raise
+
+    def summary(self) -> str:
+        return " ".join(f"{phase}={n}" for phase, n in self.attempts.items())
+
+
+def _log_in_and_save(
+    settings: Settings,
+    account: Account,
+    driver,
+    sign_in_url: str,
+    deadline: Deadline = UNLIMITED,
+) -> None:
+    logger.info("Logging in: %s", sign_in_url)
+    started = time.monotonic()
+    log_in(
+        driver,
+        sign_in_url=sign_in_url,
+        username=account.visa_username,
+        password=account.visa_password,
+        deadline=deadline,
+    )
+    logger.info("Logged in in %.1fs", time.monotonic() - started)
+    _save_session(settings, account, driver)
+
+
+def _acquire_profile(settings: Settings, account: Account) -> BrowserProfile | None:
+    if not settings.browser_profile_dir:
+        return None
+    return BrowserProfile(settings.browser_profile_dir, account.key).acquire()
+
+
+def _start_own_browser(settings: Settings, phases: _PhaseRunner, profile: BrowserProfile | None):
+    kind = "none" if profile is None else ("warm" if profile.warm else "cold")
+    logger.info("Starting browser (headless=%s, profile=%s)", settings.headless, kind)
+
+    def _start():
+        try:
+            return start_driver(headless=settings.headless, user_data_dir=profile.path if profile else None)
+        except Exception:
+            if profile is not None:
+                # Chrome мог не подняться из-за самого профиля — следующая попытка начнёт с чистого.
+                logger.warning("Browser failed to start with profile %s, resetting it", profile.path)
+                profile.reset()
+            raise
+
+    started = time.monotonic()
+    driver = phases.run("driver_start", settings.driver_start_retry_attempts, _start)
+    elapsed = time.monotonic() - started
+    METRICS.inc("browser_starts")
+    METRICS.set(f"browser_start_seconds_{kind}", elapsed)
+    logger.info("Browser started in %.1fs (profile=%s)", elapsed, kind)
+    return driver
+
+
+def _check_deadline(settings: Settings) -> Deadline:
+    return Deadline(settings.check_deadline)
+
+
+@lru_cache(maxsize=None)
+def _browser_tracker(registry_file: str | None) -> BrowserProcessTracker:
+    return BrowserProcessTracker(registry_file)
+
+
+def reap_orphaned_browsers(settings: Settings) -> int:
+    """Добивает Chrome/chromedriver, оставшиеся от предыдущего (упавшего/убитого) запуска."""
+
+    return _browser_tracker(settings.browser_registry_file).reap_orphans()
+
+
+def _record_browser_usage(settings: Settings, tracker: BrowserProcessTracker) -> None:
+    count, rss_bytes = tracker.usage()
+    METRICS.set("browser_processes_live", count)
+    METRICS.set("browser_rss_bytes", rss_bytes)
+    logger.info("Browser processes after check: %d (RSS %.1f MiB)", count, rss_bytes / 2**20)
+
+    if settings.metrics_file:
+        try:
+            write_metrics_file(settings.metrics_file)
+        except OSError as e:
+            logger.warning("Failed to write metrics file %s (%s)", settings.metrics_file, e)
+
+
+def _close_own_browser(
+    tracker: BrowserProcessTracker, driver, pgid: int | None, profile: BrowserProfile | None
+) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        logger.warning("Failed to quit driver cleanly", exc_info=True)
+    if tracker.release(pgid):
+        METRICS.inc("browser_groups_killed")
+    # Блокировку профиля держим, пока группа процессов Chrome не добита.
+    if profile is not None:
+        profile.release()
+
+
+def prepare_session(settings: Settings, account: Account) -> PreparedSession:
+    """Заранее запускает браузер аккаунта и авторизуется (для PreLogin в run_forever)."""
+
+    started = time.monotonic()
+    # Подготовка может идти раньше первой проверки — лимиты запросов уже должны действовать.
+    GOVERNOR.configure(settings)
+    deadline = _check_deadline(settings)
+    sign_in_url = build_sign_in_url(settings.base_url, account.country_code)
+    phases = _PhaseRunner(account, deadline)
+    tracker = _browser_tracker(settings.browser_registry_file)
+    profile = _acquire_profile(settings, account)
+    try:
+        driver = _start_own_browser(settings, phases, profile)
+    except BaseException:
+        if profile is not None:
+            profile.release()
+        raise
+    pgid = tracker.register(driver)
 
-    logger.info("Starting browser (headless=%s)", settings.headless)
-    driver = start_driver(headless=settings.headless)
+    def _login() -> None:
+        if not _try_restore_session(settings, account, driver, sign_in_url, deadline):
+            _log_in_and_save(settings, account, driver, sign_in_url, deadline)
 
     try:
-        logger.info("Logging in: %s", sign_in_url)
-        log_in(
-            driver,
-            sign_in_url=sign_in_url,
-            username=settings.visa_username,
-            password=settings.visa_password,
+        phases.run("login", settings.login_retry_attempts, _login, driver)
+    except BaseException:
+        _close_own_browser(tracker, driver, pgid, profile)
+        raise
+    return PreparedSession(
+        key=account.key,
+        driver=driver,
+        pgid=pgid,
+        profile=profile,
+        seconds=time.monotonic() - started,
+        prepared_at=time.time(),
+    )
+
+
+def close_prepared_session(settings: Settings, session: PreparedSession) -> None:
+    _close_own_browser(_browser_tracker(settings.browser_registry_file), session.driver, session.pgid, session.profile)
+
+
+def _run_check_once(
+    settings: Settings,
+    account: Account | None = None,
+    browser: SharedBrowser | None = None,
+    deadline: Deadline | None = None,
+    prepared: PreparedSession | None = None,
+    keep: Callable[[PreparedSession], None] | None = None,
+) -> set[Slot]:
+    account = account or settings.primary_account
+    deadline = deadline or _check_deadline(settings)
+    # Дёшево, если лимиты не менялись; после перезагрузки конфига подхватывает новые.
+    GOVERNOR.configure(settings)
+    sign_in_url = build_sign_in_url(settings.base_url, account.country_code)
+    appointments_url = build_appointments_url(settings.base_url, account.country_code, account.schedule_id)
+    phases = _PhaseRunner(account, deadline)
+    tracker = _browser_tracker(settings.browser_registry_file)
+    driver = None
+    pgid = None
+    profile = None
+
+    if prepared is not None and not prepared.used:
+        # Подготовлено заранее (PreLogin) — при повторе после SessionLostError уже не используем.
+        prepared.used = True
+        if session_is_alive(prepared.driver):
+            driver, pgid, profile = prepared.driver, prepared.pgid, prepared.profile
+            if prepared.kept:
+                METRICS.inc("burst_browser_reuses")
+                logger.info("Reusing browser kept open for the burst (%.0fs idle)", time.time() - prepared.prepared_at)
+            else:
+                METRICS.inc("prelogin_hits")
+                METRICS.inc("prelogin_seconds_saved", prepared.seconds)
+                logger.info(
+                    "Using pre-logged-in browser (prepared %.0fs ago), saved %.1fs of start and login",
+                    time.time() - prepared.prepared_at,
+                    prepared.seconds,
+                )
+        else:
+            logger.info("Pre-logged-in browser is dead, starting a new one")
+            close_prepared_session(settings, prepared)
+
+    # Браузер заранее подготовлен и авторизован — старт и логин пропускаем.
+    logged_in = driver is not None
+    session_ready = logged_in
+    if not logged_in and browser is not None:
+        driver = phases.run(
+            "driver_start",
+            settings.driver_start_retry_attempts,
+            lambda: browser.acquire(account.key),
         )
+        # Контекст уже авторизовался на прошлой проверке; если сайт его выкинул,
+        # _open_calendar поймает LoggedOutError и залогинится заново.
+        session_ready = browser.logged_in(account.key)
+        if session_ready:
+            logger.info("Browser context of %s is already logged in, skipping login", account.key)
+    elif not logged_in:
+        profile = _acquire_profile(settings, account)
+        try:
+            driver = _start_own_browser(settings, phases, profile)
+        except BaseException:
+            if profile is not None:
+                profile.release()
+            raise
+        pgid = tracker.register(driver)
+
+    healthy = False
+    try:
+        def _login() -> None:
+            if not _try_restore_session(settings, account, driver, sign_in_url, deadline):
+                _log_in_and_save(settings, account, driver, sign_in_url, deadline)
+
+        if not session_ready:
+            phases.run("login", settings.login_retry_attempts, _login, driver)
+            if browser is not None:
+                browser.mark_logged_in(account.key)
+
+        def _open_calendar() -> None:
+            try:
+                open_appointments_calendar(
+                    driver,
+                    appointments_url=appointments_url,
+                    facility_id=account.facility_id,
+                    max_refresh_attempts=settings.appointments_max_refresh_attempts,
+                    deadline=deadline,
+                )
+            except LoggedOutError:
+                # Браузер жив, протухла только авторизация: логинимся в нём же и продолжаем.
+                logger.info("Session expired on the appointments page, logging in again")
+                phases.run(
+                    "login",
+                    settings.login_retry_attempts,
+                    lambda: _log_in_and_save(settings, account, driver, sign_in_url, deadline),
+                    driver,
+                )
+                open_appointments_calendar(
+                    driver,
+                    appointments_url=appointments_url,
+                    facility_id=account.facility_id,
+                    max_refresh_attempts=settings.appointments_max_refresh_attempts,
+                    deadline=deadline,
+                )
 
         logger.info("Fetching available slots: %s", appointments_url)
-        return fetch_available_slots(
-            driver,
-            appointments_url=appointments_url,
-            facility_id=settings.facility_id,
-            max_refresh_attempts=settings.appointments_max_refresh_attempts,
-        )
+        phases.run("facility", settings.facility_retry_attempts, _open_calendar, driver)
+
+        progress = CalendarProgress()
+
+        def _read_calendar() -> set[Slot]:
+            if settings.cdp_calendar:
+                try:
+                    return read_calendar_via_devtools(
+                        driver, facility_id=account.facility_id, progress=progress, deadline=deadline
+                    )
+                except CdpError as e:
+                    # Продолжаем с того же месяца обычным путём.
+                    logger.warning("DevTools calendar read failed, using Selenium (%s)", e)
+                    METRICS.inc("cdp_calendar_fallbacks")
+            return read_calendar(driver, facility_id=account.facility_id, progress=progress, deadline=deadline)
+
+        slots = phases.run("calendar", settings.calendar_retry_attempts, _read_calendar, driver)
+        healthy = True
+        return slots
+    except BusyError:
+        # Сайт занят — с браузером всё в порядке.
+        healthy = True
+        raise
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            logger.warning("Failed to quit driver cleanly", exc_info=True)
+        logger.info("Phase attempts: %s", phases.summary())
+        if browser is not None and not logged_in:
+            browser.release(account.key, healthy=healthy)
+            METRICS.set("browser_contexts", browser.contexts)
+        elif keep is not None and healthy:
+            # Следующая учащённая проверка начнётся сразу с календаря.
+            keep(
+                PreparedSession(
+                    key=account.key,
+                    driver=driver,
+                    pgid=pgid,
+                    profile=profile,
+                    seconds=0.0,
+                    prepared_at=time.time(),
+                    kept=True,
+                )
+            )
+        else:
+            _close_own_browser(tracker, driver, pgid, profile)
+        _record_browser_usage(settings, tracker)
 
 
-def _run_check_once_with_retry(settings: Settings) -> set[Slot]:
+def _run_check_once_with_retry(
+    settings: Settings,
+    account: Account | None = None,
+    browser: SharedBrowser | None = None,
+    prepared: PreparedSession | None = None,
+    keep: Callable[[PreparedSession], None] | None = None,
+) -> set[Slot]:
+    # Шаги повторяются внутри _run_check_once; здесь — только полный перезапуск
+    # браузера, когда сессия доказанно мертва. Дедлайн общий на все перезапуски.
+    deadline = _check_deadline(settings)
     decorated = retry(
-        stop=stop_after_attempt(settings.check_retry_attempts),
+        stop=stop_any(stop_after_attempt(settings.check_retry_attempts), lambda _: deadline.expired()),
+        retry=retry_if_exception_type(SessionLostError),
         wait=wait_exponential(multiplier=2, min=2, max=4),
         before=_log_before_attempt,
         after=_log_after_attempt,
@@ -167,58 +626,227 @@ def _run_check_once_with_retry(settings: Settings) -> set[Slot]:
         reraise=True,
     )(_run_check_once)
 
-    return decorated(settings)
+    return decorated(settings, account, browser, deadline, prepared, keep)
+
+
+class SeleniumSlotProvider:
+    """Провайдер по умолчанию: настоящий Chrome (или контекст общего браузера).
+
+    С `prelogin` берёт заранее запущенный и авторизованный браузер, если он готов. С `kept`
+    не закрывает браузер после удачной проверки, а оставляет его там для следующей.
+    """
+
+    def __init__(self, prelogin: PreLogin | None = None, kept: PreLogin | None = None) -> None:
+        self.prelogin = prelogin
+        self.kept = kept
+
+    def fetch(self, settings: Settings, account: Account, browser: SharedBrowser | None = None) -> set[Slot]:
+        prepared = self.kept.take(account.key) if self.kept is not None else None
+        if self.prelogin is not None:
+            if prepared is None:
+                prepared = self.prelogin.take(account.key)
+            else:
+                self.prelogin.discard(account.key)
+        keep = self.kept.put if self.kept is not None else None
+        return _run_check_once_with_retry(settings, account, browser, prepared, keep)
+
+
+def _load_previous(settings: Settings, account: Account, queue: SqliteWorkQueue | None) -> set[Slot]:
+    if queue is not None:
+        return queue.load_slots(account.key)
+    return load_slots(_account_file(settings.state_file, settings, account))
+
+
+def _save_current(
+    settings: Settings,
+    account: Account,
+    queue: SqliteWorkQueue | None,
+    slots: set[Slot],
+    outbox: list[OutboxMessage],
+) -> str:
+    # Слоты и уведомления о них пишутся одной атомарной записью: после падения
+    # не будет ни «даты сохранены, а уведомление потеряно», ни повторной рассылки.
+    if queue is not None:
+        queue.save_slots(account.key, slots, outbox)
+        return queue.path
+    path = _account_file(settings.state_file, settings, account)
+    save_slots(path, slots, outbox)
+    return path
+
+
+def _outbox_store(settings: Settings, account: Account, queue: SqliteWorkQueue | None) -> OutboxStore:
+    if queue is not None:
+        return QueueOutbox(queue, [account.key])
+    return FileOutbox(_account_file(settings.state_file, settings, account))
+
+
+def _record_slot_events(settings: Settings, account: Account, previous: set[Slot], current: set[Slot]) -> None:
+    if not settings.slot_stats_file:
+        return
+    try:
+        stats = load_stats(settings.slot_stats_file)
+        events = stats.observe(account.key, previous, current, time.time())
+        if settings.slot_events_file:
+            append_events(settings.slot_events_file, events)
+        save_stats(settings.slot_stats_file, stats)
+    except Exception as e:
+        # Статистика вторична: ни битый файл, ни ошибка записи не должны валить проверку.
+        logger.warning("Failed to update slot statistics (%s: %s)", type(e).__name__, e)
+        return
+    if events:
+        logger.info(
+            "Slot events: appeared=%d disappeared=%d",
+            sum(e["event"] == "appeared" for e in events),
+            sum(e["event"] == "disappeared" for e in events),
+        )
+
+
+def _breaker_for(settings: Settings, account: Account, runtime: WorkerRuntime | None) -> CircuitBreaker | None:
+    # Предохранитель живёт между проверками, поэтому только в run_forever (есть runtime).
+    if runtime is None or settings.circuit_breaker_threshold < 1:
+        return None
+    return runtime.breaker_for(
+        account.country_code,
+        failure_threshold=settings.circuit_breaker_threshold,
+        cooldown_seconds=settings.circuit_breaker_cooldown_seconds,
+    )
+
 
+def _notify(notify_stage: NotifyStage | None, description: str, send: Callable[[], None]) -> None:
+    # Без стадии уведомлений (--once, тесты) — синхронно, ошибки видит вызывающий.
+    if notify_stage is None:
+        send()
+    else:
+        notify_stage.submit(description, send)
+
+
+def _report_breaker_transition(
+    settings: Settings,
+    breaker: CircuitBreaker,
+    transition: tuple[CircuitState, CircuitState] | None,
+    notify_stage: NotifyStage | None = None,
+) -> None:
+    if transition is None:
+        return
+    before, after = transition
+    logger.warning("Circuit breaker %s: %s -> %s", breaker.key, before.value, after.value)
+    if before == CircuitState.HALF_OPEN and after == CircuitState.OPEN:
+        # Об открытии админ уже знает; неудачные пробы видны только в логе и /status.
+        return
+
+    if after == CircuitState.OPEN:
+        text = (
+            f"Предохранитель сайта ({breaker.key}) разомкнут: {breaker.consecutive_failures} неудачных проверок подряд.\n"
+            f"Проверки приостановлены на {breaker.cooldown_seconds:.0f} сек., затем будет одна пробная."
+        )
+    else:
+        text = f"Предохранитель сайта ({breaker.key}) замкнут: проверки снова проходят успешно."
+    try:
+        _notify(notify_stage, "circuit breaker message", lambda: _send_admin_only(settings, text=text))
+    except Exception as e:
+        logger.warning("Failed to send circuit breaker message to admin chat (%s: %s)", type(e).__name__, e)
+
+
+def run_check_once(
+    settings: Settings,
+    account: Account | None = None,
+    *,
+    queue: SqliteWorkQueue | None = None,
+    runtime: WorkerRuntime | None = None,
+    browser: SharedBrowser | None = None,
+    provider: SlotProvider | None = None,
+    outbox_worker: OutboxDeliveryLoop | None = None,
+    notify_stage: NotifyStage | None = None,
+    burst: BurstScheduler | None = None,
+    burst_check: bool = False,
+    digest: StatusDigest | None = None,
+) -> None:
+    account = account or settings.primary_account
+    provider = provider or SeleniumSlotProvider()
+    appointments_url = build_appointments_url(settings.base_url, account.country_code, account.schedule_id)
 
-def run_check_once(settings: Settings) -> None:
-    appointments_url = build_appointments_url(settings.country_code, settings.schedule_id)
+    breaker = _breaker_for(settings, account, runtime)
+    if breaker is not None and not breaker.allow():
+        # Дёшево пропускаем: без браузера, логина и сообщений в чаты.
+        logger.info(
+            "Circuit breaker %s is %s, skipping check (next probe in %.0fs)",
+            breaker.key,
+            breaker.state.value,
+            breaker.seconds_until_probe(),
+        )
+        return
+    probing = breaker is not None and breaker.state == CircuitState.HALF_OPEN
 
+    fetched = False
+    changed, new_count = False, 0
     try:
-        current = _run_check_once_with_retry(settings)
+        current = provider.fetch(settings, account, browser)
+        fetched = True
+        if runtime is not None:
+            runtime.record_check(account.key, outcome="ok", slots=current)
+        if digest is not None:
+            digest.record(account.key, "ok", slots=len(current))
+        if breaker is not None:
+            _report_breaker_transition(settings, breaker, breaker.record_success(), notify_stage)
 
-        previous = load_slots(settings.state_file)
+        previous = _load_previous(settings, account, queue)
         new_slots = set(current) - set(previous)
 
         logger.info("Slots: current=%d previous=%d new=%d", len(current), len(previous), len(new_slots))
+        changed, new_count = set(current) != set(previous), len(new_slots)
 
         # По требованию: если календарь появился (а значит мы получили current), можно уведомлять.
         # Но чтобы не спамить, минимально продолжаем уведомлять только при появлении новых дат,
-        # а при отсутствии новых дат отправляем статус (как было раньше).
-        if new_slots:
-            text = (
-                "Появились новые свободные даты на собеседование:\n\n"
-                f"{_format_slots(new_slots)}\n\n"
-                f"Ссылка: {appointments_url}"
-            )
-            _broadcast_telegram(settings, text)
-            logger.info("Telegram notification sent.")
+        # а при отсутствии новых дат отправляем статус (как было раньше) или копим его в сводку.
+        outbox = new_outbox_messages(_new_slot_messages(settings, new_slots, appointments_url)) if new_slots else []
+        saved_to = _save_current(settings, account, queue, current, outbox)
+        logger.info("State saved to %s", saved_to)
+
+        if outbox_worker is not None:
+            if outbox:
+                outbox_worker.wake()
         else:
-            _send_status_message(
-                settings,
-                text=(
-                    "Проверка выполнена: новых свободных дат не найдено.\n"
-                    f"Текущее количество дат в календаре: {len(current)}\n"
-                    f"Ссылка: {appointments_url}"
-                ),
+            # Без фонового потока (--once) доставляем сразу, заодно добирая хвосты прошлых запусков.
+            sent, failed = deliver_outbox(
+                _outbox_store(settings, account, queue),
+                lambda chat_id, text: _send_one(settings, chat_id, text),
+                extra=outbox,
             )
+            if sent or failed:
+                logger.info("New-slot notifications: sent=%d failed=%d", sent, failed)
+
+        # Уже после сохранения state и outbox: статистика не может помешать уведомлениям.
+        _record_slot_events(settings, account, set(previous), set(current))
 
-        save_slots(settings.state_file, current)
-        logger.info("State saved to %s", settings.state_file)
+        if not new_slots and digest is None:
+            status_text = (
+                "Проверка выполнена: новых свободных дат не найдено.\n"
+                f"Текущее количество дат в календаре: {len(current)}\n"
+                f"Ссылка: {appointments_url}"
+            )
+            _notify(notify_stage, "status message", lambda: _send_status_message(settings, text=status_text))
 
     except BusyError as e:
         # Штатное состояние сайта. Раньше в Telegram не шлём, но теперь (если задан админский чат)
         # отправляем уведомление туда.
         logger.info("Site is busy, skipping notification (%s)", e)
-        if settings.telegram_admin_chat_id:
+        if runtime is not None:
+            runtime.record_check(account.key, outcome="busy", error=str(e))
+        if digest is not None:
+            digest.record(account.key, "busy", error=str(e))
+        if breaker is not None:
+            _report_breaker_transition(settings, breaker, breaker.record_failure(), notify_stage)
+            if breaker.state != CircuitState.CLOSED:
+                # Админ уже получил сообщение о смене состояния предохранителя.
+                return
+        if settings.telegram_admin_chat_id and digest is None:
+            busy_text = (
+                "Сайт сообщает: система занята (BusyError).\n"
+                f"Причина: {e}\n"
+                f"Ссылка: {appointments_url}"
+            )
             try:
-                _send_admin_only(
-                    settings,
-                    text=(
-                        "Сайт сообщает: система занята (BusyError).\n"
-                        f"Причина: {e}\n"
-                        f"Ссылка: {appointments_url}"
-                    ),
-                )
+                _notify(notify_stage, "BusyError message", lambda: _send_admin_only(settings, text=busy_text))
             except Exception as send_exc:
                 # Busy — штатно; не хотим падать из-за проблем с Telegram.
                 logger.warning(
@@ -231,26 +859,410 @@ def run_check_once(settings: Settings) -> None:
     except Exception as e:
         # Стектрейс не логируем, чтобы не засорять логи
         logger.error("Check failed (%s: %s)", type(e).__name__, e)
+        if isinstance(e, PageStructureError):
+            METRICS.inc("page_structure_errors")
+        if isinstance(e, DeadlineExceeded):
+            outcome = "deadline"
+        elif isinstance(e, PageStructureError):
+            outcome = "structure"
+        else:
+            outcome = "error"
+        if runtime is not None and not fetched:
+            runtime.record_check(account.key, outcome=outcome, error=f"{type(e).__name__}: {e}")
+        if digest is not None and not fetched:
+            digest.record(account.key, outcome, error=f"{type(e).__name__}: {e}")
+        if breaker is not None and not fetched:
+            _report_breaker_transition(settings, breaker, breaker.record_failure(), notify_stage)
+            if breaker.state != CircuitState.CLOSED:
+                # Не заваливаем чаты одинаковыми ошибками, пока сайт лежит.
+                raise
+        if digest is not None:
+            # Ошибка попадёт в ближайшую сводку.
+            raise
+        failure_text = (
+            "Проверка НЕ удалась (ошибка при получении календаря/слотов).\n"
+            f"Причина: {type(e).__name__}: {e}\n"
+            f"Ссылка: {appointments_url}"
+        )
         try:
-            _send_status_message(
-                settings,
-                text=(
-                    "Проверка НЕ удалась (ошибка при получении календаря/слотов).\n"
-                    f"Причина: {type(e).__name__}: {e}\n"
-                    f"Ссылка: {appointments_url}"
-                ),
-            )
+            _notify(notify_stage, "failure message", lambda: _send_status_message(settings, text=failure_text))
         except Exception:
             logger.warning("Failed to send telegram status message", exc_info=True)
         raise
+    finally:
+        if probing:
+            # Проба прервана до record_* (например, KeyboardInterrupt) — не держим half-open вечно.
+            breaker.abandon_probe()
+        if burst is not None:
+            burst.record(
+                account.key,
+                changed=changed,
+                new_slots=new_count,
+                normal_interval=settings.check_interval_seconds,
+                extra=burst_check,
+            )
 
 
-def run_forever(settings: Settings) -> None:
-    logger.info("Worker started. Interval=%ss", settings.check_interval_seconds)
-    while True:
-        try:
-            run_check_once(settings)
-        except Exception as e:
-            # Не дублируем полный traceback: он уже залогирован в run_check_once().
-            logger.error("Check failed in run_forever (%s: %s)", type(e).__name__, e)
-        time.sleep(settings.check_interval_seconds)
+# Поля Settings, от которых зависят долгоживущие компоненты run_forever.
+_QUEUE_FIELDS = {"work_queue_db", "work_queue_lease_seconds", "work_queue_outbox_lease_seconds", "worker_id"}
+_COMMANDS_FIELDS = {"telegram_bot_token", "telegram_commands_enabled"}
+_BREAKER_FIELDS = {"circuit_breaker_threshold", "circuit_breaker_cooldown_seconds"}
+_BROWSER_FIELDS = {"shared_browser", "shared_browser_max_heap_mb", "headless", "browser_registry_file"}
+_BURST_FIELDS = {"burst_window_seconds", "burst_interval_seconds", "burst_max_checks"}
+# Заранее подготовленные сессии открыты с этими учётками, браузером и профилем.
+_PRELOGIN_FIELDS = {
+    "visa_username",
+    "visa_password",
+    "country_code",
+    "schedule_id",
+    "facility_id",
+    "extra_accounts",
+    "headless",
+    "shared_browser",
+    "work_queue_db",
+    "browser_profile_dir",
+    "browser_registry_file",
+    "session_file",
+    "prelogin",
+}
+
+# Как часто просыпаться между проверками, чтобы заметить изменение файлов конфигурации.
+_IDLE_POLL_SECONDS = 5.0
+
+
+class _WorkerComponents:
+    """Долгоживущие части run_forever, которые пересобираются при hot reload."""
+
+    def __init__(self, settings: Settings, runtime: WorkerRuntime) -> None:
+        self.settings = settings
+        self.runtime = runtime
+        self.queue: SqliteWorkQueue | None = None
+        self.commands: TelegramCommandLoop | None = None
+        self.browser: SharedBrowser | None = None
+        self.burst = BurstScheduler.from_settings(settings)
+        self.digest = StatusDigest.from_settings(settings)
+        self.facility_cache = FacilityCache.from_settings(settings)
+        self.prelogin: PreLogin | None = None
+        self.burst_sessions: PreLogin | None = None
+        self.next_due = 0.0
+        self._build_queue(settings)
+        self._build_commands(settings)
+        self._build_browser(settings)
+        self._build_prelogin(settings)
+        self._build_burst_sessions(settings)
+
+        # Поток доставки читает self.settings/self.queue при каждом проходе, поэтому
+        # hot reload его не пересоздаёт. Первый проход — сразу: хвосты прошлого запуска.
+        self.outbox = OutboxDeliveryLoop(
+            self._outbox_stores,
+            lambda chat_id, text: _send_one(self.settings, chat_id, text),
+        )
+        self.outbox.start()
+        self.outbox.wake()
+
+        # Статусные и служебные сообщения уходят из отдельного потока: медленный Telegram
+        # не сдвигает проверки.
+        self.notify = NotifyStage()
+        self.notify.start()
+
+    def _outbox_stores(self) -> list[OutboxStore]:
+        accounts = self.settings.accounts()
+        if self.queue is not None:
+            return [QueueOutbox(self.queue, [a.key for a in accounts])]
+        return [_outbox_store(self.settings, a, None) for a in accounts]
+
+    def _build_queue(self, settings: Settings) -> None:
+        self.queue = None
+        if settings.work_queue_db:
+            self.queue = SqliteWorkQueue(
+                settings.work_queue_db,
+                worker_id=settings.worker_id,
+                lease_seconds=settings.work_queue_lease_seconds,
+                outbox_lease_seconds=settings.work_queue_outbox_lease_seconds,
+            )
+            self.queue.register(a.key for a in settings.accounts())
+            logger.info("Using shared work queue %s as %s", settings.work_queue_db, settings.worker_id)
+
+    def _build_commands(self, settings: Settings) -> None:
+        if self.commands is not None:
+            self.commands.stop()
+            self.commands = None
+        if settings.telegram_commands_enabled:
+            self.commands = TelegramCommandLoop(
+                settings,
+                self.runtime,
+                load_last_slots=lambda account: _load_previous(self.settings, account, self.queue),
+            )
+            self.commands.start()
+
+    def _build_browser(self, settings: Settings) -> None:
+        if self.browser is not None:
+            self.browser.close()
+            self.browser = None
+        if settings.shared_browser:
+            # Браузер стартует лениво, при первой проверке.
+            self.browser = SharedBrowser(
+                headless=settings.headless,
+                max_heap_mb=settings.shared_browser_max_heap_mb,
+                tracker=_browser_tracker(settings.browser_registry_file),
+            )
+            logger.info("Using one shared browser with a browser context per account")
+
+    def _build_prelogin(self, settings: Settings) -> None:
+        if self.prelogin is not None:
+            self.prelogin.discard_all()
+            self.prelogin = None
+        if not settings.prelogin:
+            return
+        if settings.shared_browser or settings.work_queue_db:
+            # Общий браузер и так держит сессии; в очереди следующий аккаунт заранее неизвестен.
+            logger.warning("PRELOGIN is ignored with SHARED_BROWSER or WORK_QUEUE_DB")
+            return
+        self.prelogin = PreLogin(
+            lambda account: prepare_session(self.settings, account),
+            lambda session: close_prepared_session(self.settings, session),
+        )
+        logger.info("Pre-login enabled: browsers are prepared %ss before the tick", settings.prelogin_lead_seconds)
+
+    def _build_burst_sessions(self, settings: Settings) -> None:
+        if self.burst_sessions is not None:
+            self.burst_sessions.discard_all()
+            self.burst_sessions = None
+        if self.burst is None or settings.shared_browser or settings.work_queue_db:
+            # Общий браузер и так держит контексты; в очереди следующую проверку может взять другая реплика.
+            return
+        # Сессии сюда только кладутся после проверок — сам он браузеры не готовит.
+        self.burst_sessions = PreLogin(
+            lambda account: prepare_session(self.settings, account),
+            lambda session: close_prepared_session(self.settings, session),
+        )
+
+    def send_digest_if_due(self) -> None:
+        if self.digest is None or not self.digest.due():
+            return
+        text = self.digest.take()
+        if text is None:
+            return
+        settings = self.settings
+        self.notify.submit("status digest", lambda: _send_status_digest(settings, text))
+
+    def close(self) -> None:
+        if self.prelogin is not None:
+            self.prelogin.discard_all()
+        if self.burst_sessions is not None:
+            self.burst_sessions.discard_all()
+        self.outbox.stop()
+        self.notify.stop()
+        if self.commands is not None:
+            self.commands.stop()
+        if self.browser is not None:
+            self.browser.close()
+
+    def apply(self, old: Settings, new: Settings, changed: set[str]) -> None:
+        self.settings = new
+        if changed & _QUEUE_FIELDS:
+            self._build_queue(new)
+        elif self.queue is not None and "extra_accounts" in changed:
+            self.queue.register(a.key for a in new.accounts())
+
+        if changed & _COMMANDS_FIELDS:
+            self._build_commands(new)
+        elif self.commands is not None:
+            # Поток команд читает settings при каждом запросе — достаточно подменить ссылку.
+            self.commands.settings = new
+
+        if changed & _BREAKER_FIELDS:
+            self.runtime.reset_breakers()
+
+        if changed & _BROWSER_FIELDS:
+            self._build_browser(new)
+
+        if changed & _BURST_FIELDS:
+            self.burst = BurstScheduler.from_settings(new)
+
+        if "facility_cache_seconds" in changed:
+            self.facility_cache = FacilityCache.from_settings(new)
+
+        if "status_digest_seconds" in changed:
+            if self.digest is not None and new.status_digest_seconds > 0:
+                # Накопленное за текущий период не теряем.
+                self.digest.period = new.status_digest_seconds
+            else:
+                self.digest = StatusDigest.from_settings(new)
+
+        if changed & _PRELOGIN_FIELDS:
+            self._build_prelogin(new)
+        if changed & (_PRELOGIN_FIELDS | _BURST_FIELDS):
+            self._build_burst_sessions(new)
+
+        if "check_interval_seconds" in changed and self.next_due:
+            self.next_due += new.check_interval_seconds - old.check_interval_seconds
+
+
+def _with_facility_cache(
+    provider: SlotProvider | None,
+    cache: FacilityCache | None,
+    prelogin: PreLogin | None = None,
+) -> SlotProvider | None:
+    if cache is None:
+        return provider
+    # Календарь взят из кеша — заранее подготовленный браузер аккаунту не нужен.
+    on_hit = (lambda account: prelogin.discard(account.key)) if prelogin is not None else None
+    return CachedSlotProvider(provider or SeleniumSlotProvider(), cache, on_hit=on_hit)
+
+
+def _queue_tick(
+    settings: Settings,
+    runtime: WorkerRuntime,
+    queue: SqliteWorkQueue,
+    browser: SharedBrowser | None = None,
+    provider: SlotProvider | None = None,
+    outbox_worker: OutboxDeliveryLoop | None = None,
+    notify_stage: NotifyStage | None = None,
+    burst: BurstScheduler | None = None,
+    digest: StatusDigest | None = None,
+) -> None:
+    accounts = {a.key: a for a in settings.accounts()}
+    key = None if runtime.is_paused() else queue.claim_next(accounts)
+    if key is None:
+        # Всё разобрано другими репликами или ещё не пора — спим до ближайшей проверки.
+        wait = queue.seconds_until_next_due(accounts)
+        timeout = min(settings.check_interval_seconds, max(1.0, wait if wait is not None else 1.0))
+        if runtime.wait_for_tick(timeout):
+            # Досрочная проверка через очередь: её всё так же возьмёт ровно одна реплика.
+            logger.info("Out-of-schedule check requested")
+            queue.make_due(accounts)
+        return
+
+    try:
+        run_check_once(
+            settings,
+            accounts[key],
+            queue=queue,
+            runtime=runtime,
+            browser=browser,
+            provider=provider,
+            outbox_worker=outbox_worker,
+            notify_stage=notify_stage,
+            burst=burst,
+            # Во время всплеска очередь выдаёт аккаунт по его учащённому расписанию.
+            burst_check=burst is not None and burst.active(key),
+            digest=digest,
+        )
+    except Exception as e:
+        logger.error("Check failed in run_forever (%s: %s)", type(e).__name__, e)
+    finally:
+        delay = burst.seconds_until(key) if burst is not None else None
+        if delay is None:
+            delay = settings.check_interval_seconds
+        if not queue.complete(key, next_run_at=time.time() + delay):
+            logger.warning("Lease for %s expired before the check finished", key)
+
+
+def _local_tick(
+    settings: Settings,
+    runtime: WorkerRuntime,
+    components: _WorkerComponents,
+    provider: SlotProvider | None = None,
+) -> None:
+    prelogin = components.prelogin if provider is None else None
+    kept = components.burst_sessions if provider is None else None
+    if prelogin is not None or kept is not None:
+        provider = SeleniumSlotProvider(prelogin, kept)
+    provider = _with_facility_cache(provider, components.facility_cache, prelogin)
+
+    def check(accounts: Iterable[Account], *, pipeline: bool = False, burst_check: bool = False) -> None:
+        accounts = list(accounts)
+        for i, account in enumerate(accounts):
+            if pipeline and prelogin is not None and i + 1 < len(accounts):
+                # Пока проверяется этот аккаунт, следующий уже запускает браузер и логинится.
+                prelogin.start(accounts[i + 1])
+            try:
+                run_check_once(
+                    settings,
+                    account,
+                    runtime=runtime,
+                    browser=components.browser,
+                    provider=provider,
+                    outbox_worker=components.outbox,
+                    notify_stage=components.notify,
+                    burst=components.burst,
+                    burst_check=burst_check,
+                    digest=components.digest,
+                )
+            except Exception as e:
+                # Не дублируем полный traceback: он уже залогирован в run_check_once().
+                logger.error("Check failed in run_forever (%s: %s)", type(e).__name__, e)
+            if kept is not None and not components.burst.active(account.key):
+                kept.discard(account.key)
+
+    if time.monotonic() >= components.next_due:
+        if runtime.is_paused():
+            logger.info("Worker is paused, skipping checks")
+        else:
+            check(settings.accounts(), pipeline=True)
+        components.next_due = time.monotonic() + settings.check_interval_seconds
+    elif components.burst is not None and not runtime.is_paused():
+        due = set(components.burst.due())
+        check((a for a in settings.accounts() if a.key in due), burst_check=True)
+
+    wake_at = components.next_due
+    if components.burst is not None:
+        wake_at = min(wake_at, components.burst.next_due_at() or wake_at)
+    if prelogin is not None and not runtime.is_paused():
+        # В простое перед тиком готовим первый аккаунт, чтобы на тике сразу открыть календарь.
+        first = settings.accounts()[0]
+        prepare_at = components.next_due - settings.prelogin_lead_seconds
+        if not prelogin.pending(first.key):
+            if time.monotonic() >= prepare_at:
+                prelogin.start(first)
+            else:
+                wake_at = min(wake_at, prepare_at)
+
+    # Будить могут /checknow (тогда проверяем сразу) и hot reload (тогда просто
+    # пересчитываем ожидание с новыми настройками).
+    if runtime.wait_for_tick(min(_IDLE_POLL_SECONDS, max(0.0, wake_at - time.monotonic()))):
+        logger.info("Out-of-schedule check requested")
+        components.next_due = 0.0
+
+
+def run_forever(
+    settings: Settings,
+    runtime: WorkerRuntime | None = None,
+    *,
+    reloader: ConfigReloader | None = None,
+    provider: SlotProvider | None = None,
+) -> None:
+    runtime = runtime or WorkerRuntime()
+    components = _WorkerComponents(settings, runtime)
+    if reloader is not None:
+        reloader.watch(settings)
+
+    logger.info("Worker started. Accounts=%d interval=%ss", len(settings.accounts()), settings.check_interval_seconds)
+    try:
+        while not runtime.stopping():
+            if reloader is not None:
+                new_settings = reloader.poll(settings)
+                if new_settings is not None:
+                    changed = changed_fields(settings, new_settings)
+                    logger.info("Config reloaded, changed: %s", ", ".join(sorted(changed)))
+                    components.apply(settings, new_settings, changed)
+                    settings = new_settings
+
+            if components.queue is not None:
+                _queue_tick(
+                    settings,
+                    runtime,
+                    components.queue,
+                    components.browser,
+                    _with_facility_cache(provider, components.facility_cache),
+                    components.outbox,
+                    components.notify,
+                    components.burst,
+                    components.digest,
+                )
+            else:
+                _local_tick(settings, runtime, components, provider)
+            components.send_digest_if_due()
+    finally:
+        components.close()